@@ -0,0 +1,229 @@
+"""
+AIRM oszlop-kinyerés szókoordinátákból (pdfplumber extract_words kimenete).
+
+Az extract_text() egy sorba lapítja az oszlopokat, ezért a szöveges heurisztikáknak utólag kell
+szétvágniuk a ragadt számláncokat ("1 855 6991 704 071"). Itt oldalanként egyszer felismerjük az
+Előző év / (Módosítások) / Tárgyév oszlopok x-tartományát, és egyetlen O(szavak) menetben oszlopokhoz
+rendeljük a sorok számait. A jobbra zárt számoszlopokat a számok jobb szélének klaszterei adják;
+a fejléc ("Előző év", "Módosítások", "Tárgyév") az oszlopok számát erősíti meg. Ha egy szó átnyúlik
+egy oszlophatáron (a PDF-ben összeérő számok), a karakterszélesség alapján a határon vágjuk szét
+(a számjegyek táblázatos, azonos szélességűek).
+
+Kimenet: {sor szövege: (tárgyév, előző év)} – a kulcs ugyanaz a sor, amit az extract_text() ad
+(a szavak szóközzel fűzve), így a motor sor-alapú kereséséhez közvetlenül illeszthető. Amit nem
+tudunk biztosan feloldani (nincs oszlopfelismerés, nem illeszkedő szám, ütköző oszlop), az kimarad:
+ott a szöveges heurisztika dönt.
+"""
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from airm_numparse import AMOUNT, number_parser
+
+Y_TOLERANCE = 3.0        # pdfplumber extract_text alapértéke: ennyin belül egy sor
+CLUSTER_GAP = 6.0        # pt; ennél közelebbi jobb szélek egy oszlopba esnek
+MIN_SUPPORT = 3          # ennyi jól tagolt szám kell egy oszlophoz
+MIN_SUPPORT_RATIO = 0.2  # ... és a legerősebb oszlop támogatottságának ennyi része
+EDGE_SLACK = 1.0         # pt; ennyivel a jobb szélen túl még nem számít átnyúlásnak
+
+_NUM_WORD_RE = re.compile(r"^[()+\-\u2212\u2012\u2013\u2014]*\d[\d()]*$")  # összeért szó is: '654(1'
+_AMOUNT_RE = re.compile(r"^(?:\(\d{1,3}(?: \d{3})*\)|[+\-\u2212\u2012\u2013\u2014]?\d{1,3}(?: \d{3})*)$")
+_EMPTY_CELL = {"-", "\u2013", "\u2014"}
+_HEADER_MOD = ("modositas", "helyesbites", "korrekcio")
+_parse_amount = number_parser(AMOUNT)
+
+Words = Sequence[dict]
+Row = Tuple[Optional[int], Optional[int]]
+
+
+def _fold(s: str) -> str:
+    return s.lower().translate(_FOLD)
+
+_FOLD = str.maketrans("áéíóöőúüű", "aeiooouuu")
+
+
+def _lines(words: Words) -> List[List[dict]]:
+    """Szavak sorokba (top szerint, Y_TOLERANCE-en belül), soron belül x szerint."""
+    out: List[List[dict]] = []
+    cur: List[dict] = []
+    top = None
+    for w in sorted(words, key=lambda w: (round(w["top"], 1), w["x0"])):
+        if top is None or abs(w["top"] - top) > Y_TOLERANCE:
+            if cur:
+                out.append(sorted(cur, key=lambda w: w["x0"]))
+            cur, top = [], w["top"]
+        cur.append(w)
+    if cur:
+        out.append(sorted(cur, key=lambda w: w["x0"]))
+    return out
+
+
+def _char_w(w: dict) -> float:
+    return (w["x1"] - w["x0"]) / max(1, len(w["text"]))
+
+
+def _tail_start(line: List[dict]) -> int:
+    """A sor végi számrész eleje: az utolsó nem-szám szó utáni index (szövegközi számok nem oszlopértékek)."""
+    i = len(line)
+    while i and (_NUM_WORD_RE.match(line[i - 1]["text"]) or line[i - 1]["text"] in _EMPTY_CELL):
+        i -= 1
+    return i
+
+
+def _runs(line: List[dict]) -> List[List[dict]]:
+    """A sor végi számszavak láncai: '1' '855' '699' -> egy lánc, ha a köz legfeljebb egy szóköznyi.
+    Oszlophatáron átnyúló lánc is lehet; azt a page_rows vágja szét."""
+    runs: List[List[dict]] = []
+    run: List[dict] = []
+    for w in line[_tail_start(line):]:
+        t = w["text"]
+        if not _NUM_WORD_RE.match(t):
+            if run:
+                runs.append(run)
+            run = []
+            continue
+        if run:
+            prev = run[-1]
+            if w["x0"] - prev["x1"] <= _char_w(prev) * 1.2:
+                run.append(w)
+                continue
+            runs.append(run)
+        run = [w]
+    if run:
+        runs.append(run)
+    return runs
+
+
+def _run_text(run: List[dict]) -> str:
+    return " ".join(w["text"] for w in run)
+
+
+def _column_edges(runs_by_line: List[List[List[dict]]]) -> List[float]:
+    """A jól tagolt számok jobb széleiből oszlop-jobbszélek (balról jobbra)."""
+    xs = sorted(r[-1]["x1"] for runs in runs_by_line for r in runs if _AMOUNT_RE.match(_run_text(r)))
+    clusters: List[List[float]] = []
+    for x in xs:
+        if clusters and x - clusters[-1][-1] <= CLUSTER_GAP:
+            clusters[-1].append(x)
+        else:
+            clusters.append([x])
+    if not clusters:
+        return []
+    top = max(len(c) for c in clusters)
+    keep = [c for c in clusters if len(c) >= max(MIN_SUPPORT, top * MIN_SUPPORT_RATIO)]
+    return [max(c) for c in keep]
+
+
+def _header_columns(lines: List[List[dict]]) -> Optional[int]:
+    """A fejlécből az oszlopszám: 3, ha van Módosítások oszlop, 2 ha csak Előző év / Tárgyév."""
+    for line in lines:
+        folded = " ".join(_fold(w["text"]) for w in line)
+        if "targyev" in folded and "elozo" in folded:
+            return 3 if any(m in folded for m in _HEADER_MOD) else 2
+    return None
+
+
+def _split_at(run: List[dict], edge: float) -> Optional[Tuple[List[dict], List[dict]]]:
+    """Egy oszlophatáron (edge) átnyúló láncot két láncra vág: szóköznél, vagy a szón belül
+    a karakterszélesség szerint."""
+    for i, w in enumerate(run):
+        if w["x1"] <= edge + EDGE_SLACK and (i + 1 == len(run) or run[i + 1]["x0"] >= edge - EDGE_SLACK):
+            return (run[:i + 1], run[i + 1:]) if i + 1 < len(run) else None
+        if w["x0"] < edge < w["x1"]:
+            cw = _char_w(w)
+            k = round((edge - w["x0"]) / cw)
+            t = w["text"]
+            if not 0 < k < len(t):
+                return None
+            left = dict(w, text=t[:k], x1=w["x0"] + k * cw)
+            right = dict(w, text=t[k:], x0=w["x0"] + k * cw)
+            return run[:i] + [left], [right] + run[i + 1:]
+    return None
+
+
+def page_rows(words: Words, want: Optional[int] = None) -> Tuple[Dict[str, Row], Optional[int]]:
+    """Egy oldal feloldott sorai: ({sor szövege: (tárgyév, előző év)}, oszlopszám a fejlécből).
+    want: az előző oldal fejlécéből ismert oszlopszám (a táblázat átnyúlhat a következő oldalra)."""
+    lines = _lines(words)
+    runs_by_line = [_runs(line) for line in lines]
+    edges = _column_edges(runs_by_line)
+    want = _header_columns(lines) or want
+    if want is not None and len(edges) > want:
+        edges = edges[-want:]
+    if len(edges) not in (2, 3) or (want is not None and len(edges) != want):
+        return {}, want
+    tol = CLUSTER_GAP
+    anchored = [r for runs in runs_by_line for r in runs
+                if _AMOUNT_RE.match(_run_text(r)) and any(abs(r[-1]["x1"] - e) <= tol for e in edges)]
+    table_left = min(r[0]["x0"] for r in anchored) - tol
+    out: Dict[str, Row] = {}
+    for line, runs in zip(lines, runs_by_line):
+        cells: List[Optional[str]] = [None] * len(edges)
+        ok = True
+        pending = [r for r in runs if r[-1]["x1"] > table_left + tol]
+        while pending and ok:
+            run = pending.pop(0)
+            # összeérő oszlopok: vágás az első átnyúlt oszlophatáron
+            cut = next((e for e in edges if run[0]["x0"] < e - EDGE_SLACK and e + EDGE_SLACK < run[-1]["x1"]), None)
+            if cut is not None:
+                parts = _split_at(run, cut)
+                if parts is None:
+                    ok = False
+                    break
+                pending[:0] = list(parts)
+                continue
+            col = next((i for i, e in enumerate(edges) if abs(run[-1]["x1"] - e) <= tol), None)
+            if col is None:
+                ok = False
+                break
+            text = _run_text(run)
+            if cells[col] is not None or not _AMOUNT_RE.match(text):
+                ok = False
+                break
+            cells[col] = text
+        if not ok or (cells[0] is None and cells[-1] is None):
+            continue
+        if any(w["x0"] > table_left for w in line[:_tail_start(line)]):
+            continue  # szöveg a számoszlopokban (pl. melléklet-bekezdés): nem táblasor
+        cur = _parse_amount(cells[-1]) if cells[-1] is not None else None
+        prev = _parse_amount(cells[0]) if cells[0] is not None else None
+        out[" ".join(w["text"] for w in line)] = (cur, prev)
+    return out, want
+
+
+class ColumnRows:
+    """column_rows oldalanként etetve: a feed(szavak) után az oldal szavai eldobhatók (a kinyerés memóriája
+    nem nő az oldalszámmal). feed(None): egy oldalnak nincs koordinátája -> az eredmény üres (mint eddig)."""
+    __slots__ = ("_out", "_clash", "_want", "complete")
+
+    def __init__(self):
+        self._out: Dict[str, Row] = {}
+        self._clash = set()
+        self._want: Optional[int] = None
+        self.complete = True
+
+    def feed(self, words: Optional[Words]):
+        if words is None:
+            self.complete = False
+        if not self.complete:
+            return
+        rows, self._want = page_rows(words, self._want)
+        out = self._out
+        for line, row in rows.items():
+            if line in out and out[line] != row:
+                self._clash.add(line)
+            out[line] = row
+
+    def rows(self) -> Dict[str, Row]:
+        if not self.complete:
+            return {}
+        return {line: row for line, row in self._out.items() if line not in self._clash}
+
+
+def column_rows(pages_words: Sequence[Words]) -> Dict[str, Row]:
+    """Az összes oldal feloldott sorai. Ha ugyanaz a sorszöveg eltérő értékkel többször szerepel, kimarad."""
+    acc = ColumnRows()
+    for words in pages_words or ():
+        acc.feed(words)
+    return acc.rows()
@@ -9,6 +9,10 @@ AIRM v17p9p1 – UNIVERSAL HOTFIX
 """
 import re, sys
 
+from airm_numparse import AMOUNT, number_parser
+
+_parse_amount = number_parser(AMOUNT)
+
 WS = "\u00A0\u2007\u202F"  # NBSP és társai
 SPACE_CLASS = f"[ \\t{WS}]"
 UNICODE_MINUS = "\u2212"
@@ -22,26 +26,24 @@ NUM_RE = re.compile(
 )
 
 def _normalize_num_token(token: str) -> int:
-    s = token.strip()
-    neg = False
-    if s.startswith("(") and s.endswith(")"):
-        neg = True
-        s = s[1:-1].strip()
-    s = s.replace(UNICODE_MINUS, "-")
-    if s.startswith("-"):
-        neg = not neg
-    s = THOUSAND_SEP.sub("", s)
-    if s.startswith("-"):
-        core = s[1:]
-    else:
-        core = s
-    if not core.isdigit():
-        digits = "".join(ch for ch in core if ch.isdigit())
+    # tab / figure space is ezres-elválasztó itt: egy menetben kivesszük az összes elválasztót;
+    # az előjelet / zárójelet az airm_numparse mag intézi (az elválasztók elhagyása az eredményén nem változtat)
+    d = THOUSAND_SEP.sub("", token)
+    if d.isdecimal():  # gyors út: tagolt pozitív egész, a mag hívása nélkül
+        return int(d)
+    val = _parse_amount(d)
+    if val is None:
+        digits = "".join(ch for ch in token if ch.isdigit())
         if not digits:
             raise ValueError(f"Nem szám: {token!r}")
-        core = digits
-    val = int(core)
-    return -val if neg else val
+        s = token.strip()
+        neg = s.startswith("(") and s.endswith(")")
+        if neg:
+            s = s[1:-1].strip()
+        if s.startswith(("-", UNICODE_MINUS)):
+            neg = not neg
+        val = -int(digits) if neg else int(digits)
+    return int(val)
 
 def normalize_numbers_in_obj(obj):
     """Bejárja a strukturát és a str-ként tárolt számokat normalizált str-re alakítja."""
@@ -0,0 +1,206 @@
+"""
+AIRM KPI-függőségi gráf – bemeneti mezők -> mutatók -> sávpontok -> pontszám.
+
+A csomópontok a definíció sorrendjében topologikusan rendezettek (egy csomópont csak korábban
+felvett bemenetekre / csomópontokra hivatkozhat). Két használat:
+
+  evaluate(values, targets)   teljes (vagy a targets őseire szűkített) kiértékelés; ami már benne van
+                              a values-ban (bemenet vagy rögzített csomópont), azt nem számolja újra
+  update(values, changes)     növekményes: csak a megváltozott bemenetek leszármazottai futnak újra,
+                              és ahol az új érték megegyezik a régivel, ott a lánc megáll
+  batch(values, scenarios, outputs)
+                              sok forgatókönyv egy hívásban, csak a kért kimenetekkel
+  grid(values, axes, outputs) Descartes-rács (what-if): csomópontonként csak a legbelső érintett tengely lépésein
+
+A gráf maga állapotmentes; az értékeket (sima dict) a hívó tartja meg, pl. egy elemzés cache-ében.
+"""
+from __future__ import annotations
+
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+_MISSING = object()
+
+
+class Node:
+    __slots__ = ("name", "deps", "fn")
+
+    def __init__(self, name: str, deps: Tuple[str, ...], fn: Callable):
+        self.name = name
+        self.deps = deps
+        self.fn = fn
+
+
+class KpiGraph:
+    def __init__(self):
+        self.inputs: Dict[str, None] = {}      # név -> None (sorrendtartó halmaz)
+        self.nodes: Dict[str, Node] = {}
+        self._children: Dict[str, List[str]] = {}
+        self._plans: Dict[frozenset, List[Tuple[str, Callable, Callable]]] = {}  # batch: bemenet-halmaz -> terv
+
+    # ---- definíció ----
+    def input(self, *names: str):
+        for n in names:
+            if n in self.nodes:
+                raise ValueError(f"{n!r} már csomópont")
+            self.inputs[n] = None
+            self._children.setdefault(n, [])
+
+    def node(self, name: str, *deps: str):
+        """Dekorátor: @graph.node("Current ratio", "CA", "CL") def _(ca, cl): ..."""
+        def register(fn):
+            for d in deps:
+                if d not in self.inputs and d not in self.nodes:
+                    raise ValueError(f"{name!r}: ismeretlen függőség {d!r}")
+            self.nodes[name] = Node(name, tuple(deps), fn)
+            self._plans.clear()
+            self._children.setdefault(name, [])
+            for d in deps:
+                self._children[d].append(name)
+            return fn
+        return register
+
+    # ---- kiértékelés ----
+    def _needed(self, values: Dict[str, object], targets: Optional[Iterable[str]]) -> List[str]:
+        """A kiszámolandó csomópontok; egy már meglévő (rögzített) érték őseihez nem megyünk tovább."""
+        if targets is None:
+            return [n for n in self.nodes if n not in values]
+        need = set()
+        stack = list(targets)
+        while stack:
+            n = stack.pop()
+            if n in need or n in values or n not in self.nodes:
+                continue
+            need.add(n)
+            stack.extend(self.nodes[n].deps)
+        return [n for n in self.nodes if n in need]
+
+    def evaluate(self, values: Dict[str, object], targets: Optional[Iterable[str]] = None) -> Dict[str, object]:
+        """A hiányzó csomópontok kiszámolása (helyben, a values-ba); a hiányzó bemenet None."""
+        for name in self._needed(values, targets):
+            node = self.nodes[name]
+            values[name] = node.fn(*[values.get(d) for d in node.deps])
+        return values
+
+    def update(self, values: Dict[str, object], changes: Dict[str, object]) -> Tuple[Dict[str, object], List[str], int]:
+        """Új értékkészlet a változott bemenetekkel: (értékek, megváltozott nevek sorrendben, újraszámolt db).
+        A régi values dict nem módosul."""
+        new = dict(values)
+        dirty = set()
+        changed: List[str] = []
+        for k, v in changes.items():
+            if not _same(new.get(k, _MISSING), v):
+                new[k] = v
+                dirty.add(k)
+                changed.append(k)
+        if not dirty:
+            return new, changed, 0
+        recomputed = 0
+        for name in self._affected(dirty):
+            node = self.nodes[name]
+            if not any(d in dirty for d in node.deps):
+                continue
+            v = node.fn(*[new.get(d) for d in node.deps])
+            recomputed += 1
+            if not _same(new.get(name, _MISSING), v):
+                new[name] = v
+                dirty.add(name)
+                changed.append(name)
+        return new, changed, recomputed
+
+    def _plan(self, names: Iterable[str]) -> List[Tuple[str, Callable, Callable]]:
+        """(név, fn, argumentum-kiolvasó) a csomópontokra; a kiolvasó egy teljes értékdict-ből adja a függőségeket."""
+        plan = []
+        for n in names:
+            node = self.nodes[n]
+            getter = itemgetter(*node.deps) if node.deps else (lambda v: ())
+            if len(node.deps) == 1:
+                getter = (lambda g: lambda v: (g(v),))(getter)
+            plan.append((n, node.fn, getter))
+        return plan
+
+    def _full(self, values: Dict[str, object]) -> Dict[str, object]:
+        """Másolat, amiben minden bemenet és csomópont szerepel (hiányzó: kiértékelve / None)."""
+        new = dict(values)
+        if len(new) < len(self.inputs) + len(self.nodes):
+            for k in self.inputs:
+                new.setdefault(k, None)
+            self.evaluate(new)
+        return new
+
+    def batch(self, values: Dict[str, object], scenarios: Iterable[Dict[str, object]],
+              outputs: Sequence[str]) -> List[tuple]:
+        """Sok forgatókönyv egy hívásban: mindegyik a values-ból indul, a saját bemenet-változtatásaival;
+        csak a változtatott bemenetek leszármazottai futnak. Forgatókönyvenként az outputs értékei (tuple).
+        A leszármazott-sorrendet bemenet-halmazonként egyszer számoljuk (egy rácsban mind ugyanaz)."""
+        base = self._full(values)
+        pick = itemgetter(*outputs)
+        plans = self._plans
+        out: List[tuple] = []
+        for changes in scenarios:
+            keys = frozenset(changes)
+            plan = plans.get(keys)
+            if plan is None:
+                plan = plans[keys] = self._plan(self._affected(keys))
+            new = dict(base)
+            new.update(changes)
+            for name, fn, args in plan:
+                new[name] = fn(*args(new))
+            out.append(_as_tuple(pick(new), len(outputs)))
+        return out
+
+    def grid(self, values: Dict[str, object], axes: Sequence[Tuple[str, Sequence[object]]],
+             outputs: Sequence[str]) -> List[tuple]:
+        """Descartes-rács (sorrend, mint itertools.product(*értékek)): axes = [(bemenet, [értékek]), ...].
+        Egy csomópont azon a szinten fut újra, ahol a legbelső tőle függő tengely lép; a belső ciklusban
+        csak az utolsó tengely leszármazottai számolódnak."""
+        keys = [k for k, _ in axes]
+        level = {k: i for i, k in enumerate(keys)}
+        for name, node in self.nodes.items():
+            lv = max((level.get(d, -1) for d in node.deps), default=-1)
+            if lv >= 0:
+                level[name] = lv
+        plans = [self._plan(n for n in self.nodes if level.get(n) == i) for i in range(len(axes))]
+        new = self._full(values)
+        pick = itemgetter(*outputs)
+        n_out = len(outputs)
+        out: List[tuple] = []
+        last = len(axes) - 1
+
+        def walk(i: int):
+            key, vals = axes[i]
+            plan = plans[i]
+            for v in vals:
+                new[key] = v
+                for name, fn, args in plan:
+                    new[name] = fn(*args(new))
+                if i == last:
+                    out.append(_as_tuple(pick(new), n_out))
+                else:
+                    walk(i + 1)
+
+        if axes:
+            walk(0)
+        return out
+
+    def _affected(self, roots: Iterable[str]) -> List[str]:
+        seen = set()
+        stack = list(roots)
+        while stack:
+            for c in self._children.get(stack.pop(), ()):
+                if c not in seen:
+                    seen.add(c)
+                    stack.append(c)
+        return [n for n in self.nodes if n in seen]
+
+    def dependents(self, names: Sequence[str]) -> List[str]:
+        """A bemenetektől/csomópontoktól függő összes csomópont (topologikus sorrendben)."""
+        return self._affected(names)
+
+
+def _as_tuple(picked, n: int) -> tuple:
+    return picked if n != 1 else (picked,)
+
+
+def _same(a, b) -> bool:
+    return a is b or (type(a) is type(b) and a == b)
@@ -0,0 +1,223 @@
+"""
+AIRM számértelmező mag – egyetlen, előre fordított parser minden számfelismerő helyhez.
+
+Módok (bitflagek, kombinálhatók):
+  GROUPED        ezres tagolás: szóköz, NBSP, keskeny NBSP, pont ('1 234 567', '1.234.567');
+                 tizedesvessző nélkül a vessző is ezres-elválasztó ('1,234,567')
+  PAREN_NEG      zárójeles negatív: '(1 234)' -> -1234
+  UNICODE_MINUS  a '−' (U+2212) és a '‒ – —' kötőjelek is mínuszjelek (különben csak '-')
+  DECIMAL_COMMA  tizedesvessző: '12,5' -> 12.5 (float); egész szám továbbra is int
+
+Két belépési pont:
+  parse_number(token, mode)  egyetlen token szigorúan (szemét -> None)
+  scan_numbers(text, mode)   minden szám egy sorban/szövegben; két szomszédos tagolt összeget
+                             ('510 432 155 474') NEM von össze
+A módonkénti függvényeket a number_parser()/number_scanner()/number_finder() egyszer építi fel és cache-eli;
+forró úton ezeket érdemes modulszinten lekötni.
+"""
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Union
+
+Number = Union[int, float]
+
+GROUPED = 1
+PAREN_NEG = 2
+UNICODE_MINUS = 4
+DECIMAL_COMMA = 8
+
+# beszámoló-összegek: tagolt, zárójeles/unicode negatívval (a motor sor-heurisztikáinak tokenjei)
+AMOUNT = GROUPED | PAREN_NEG | UNICODE_MINUS
+# szabad szöveg / kézi bevitel, ahol tört is előfordulhat (pontszám, arányok)
+DECIMAL = AMOUNT | DECIMAL_COMMA
+
+MINUS_CHARS = "\u2212\u2012\u2013\u2014"
+GROUP_SPACES = " \xa0\u202f"
+
+
+def _group_seps(mode: int) -> str:
+    if not mode & GROUPED:
+        return ""
+    return GROUP_SPACES + "." + ("" if mode & DECIMAL_COMMA else ",")
+
+
+def _minus_chars(mode: int) -> str:
+    return "-" + (MINUS_CHARS if mode & UNICODE_MINUS else "")
+
+
+def _to_value(digits: str, seps: str, dec: bool) -> Optional[Number]:
+    """Számjegyek + elválasztók -> int (tizedesvesszővel float); egyébként None."""
+    d = digits
+    for ch in seps:
+        if ch in d:
+            d = d.replace(ch, "")
+    if d.isdecimal():
+        return int(d)
+    if dec:
+        ip, comma, fp = d.partition(",")
+        if comma and ip.isdecimal() and fp.isdecimal():
+            return float(ip + "." + fp)  # a float() is elfogad minden Unicode decimális számjegyet
+    return None
+
+
+@lru_cache(maxsize=None)
+def number_parser(mode: int = AMOUNT) -> Callable[[object], Optional[Number]]:
+    """Egy-tokenes parser a módhoz: strip, zárójel, egy előjel (utána szóköz lehet), elválasztók, számjegyek."""
+    seps = _group_seps(mode)
+    minus = frozenset(_minus_chars(mode))
+    signs = minus | {"+"}
+    paren = bool(mode & PAREN_NEG)
+    dec = bool(mode & DECIMAL_COMMA)
+    grouped = bool(mode & GROUPED)
+    rest = seps.replace(" ", "").replace(".", "")  # a szóköz / pont után még kiveendő (ritkább) elválasztók
+
+    def parse(token) -> Optional[Number]:
+        if token.__class__ is not str:
+            if token is None:
+                return None
+            token = str(token)
+        s = token.strip()
+        if s.isdecimal():
+            return int(s)
+        neg = False
+        c = s[:1]
+        if c == "(" and paren and s[-1] == ")":
+            neg = True
+            s = s[1:-1].strip()
+            c = s[:1]
+        if c in signs:
+            if c in minus:
+                neg = not neg
+            s = s[1:].lstrip()
+        if grouped:  # a gyakori tagolás (szóköz, pont) itt, a ritkább elválasztók a _to_value-ban
+            s = s.replace(" ", "").replace(".", "")
+        if s.isdecimal():
+            v = int(s)
+        else:
+            v = _to_value(s, rest, dec)
+            if v is None:
+                return None
+        return -v if neg else v
+
+    return parse
+
+
+@lru_cache(maxsize=None)
+def _scan_pattern(mode: int) -> "re.Pattern[str]":
+    # csoportok: (nyitó zárójel, előjel, szám)
+    sign = "[+" + re.escape(_minus_chars(mode)) + "]?"
+    if mode & GROUPED:
+        # = '\d{1,3}(?:[sep]\d{3})+|\d+', de közös előtaggal: nincs visszalépés a második ágra (gyorsabb keresés)
+        body = rf"\d{{1,3}}(?:(?:[{re.escape(_group_seps(mode))}]\d{{3}})+|\d*)"
+    else:
+        body = r"\d+"
+    frac = r"(?:,\d+)?" if mode & DECIMAL_COMMA else ""
+    num = rf"({sign})({body}{frac})"
+    # a lookahead (lehetséges első karakterek) miatt az re gyorsan átugorja a szám nélküli szakaszokat
+    first = "(?=[\\d" + ("(" if mode & PAREN_NEG else "") + re.escape("+" + _minus_chars(mode)) + "])"
+    if mode & PAREN_NEG:
+        return re.compile(rf"{first}(\()?{num}(?(1)\))")
+    return re.compile(rf"{first}(){num}")
+
+
+def _match_converter(mode: int):
+    rest = _group_seps(mode).replace(" ", "")
+    minus = frozenset(_minus_chars(mode))
+    dec = bool(mode & DECIMAL_COMMA)
+
+    def value(opened: Optional[str], sign: str, num: str) -> Number:
+        if num.isdecimal():  # gyors út: tagolatlan egész
+            v = int(num)
+        else:
+            d = num.replace(" ", "")  # a szkenner csak tagolt szám belsejében enged szóközt
+            v = int(d) if d.isdecimal() else _to_value(d, rest, dec)
+        return -v if (sign in minus) != bool(opened) else v
+
+    return value
+
+
+@lru_cache(maxsize=None)
+def number_scanner(mode: int = GROUPED | UNICODE_MINUS) -> Callable[[str], List[Number]]:
+    """Soron belüli számkereső a módhoz. Az előjel csak közvetlenül a szám előtt állhat ('-1 234')."""
+    findall = _scan_pattern(mode).findall
+    value = _match_converter(mode)
+
+    def scan(text: str) -> List[Number]:
+        if not text:
+            return []
+        return [value(*g) for g in findall(text)]
+
+    return scan
+
+
+@lru_cache(maxsize=None)
+def number_finder(mode: int = DECIMAL, as_float: bool = False) -> Callable[[str], Optional[Number]]:
+    """Az első szám keresője a módhoz (a first_number lekötött alakja); as_float=True: mindig float (vagy None)."""
+    search = _scan_pattern(mode).search
+    rest = _group_seps(mode).replace(" ", "")
+    minus = frozenset(_minus_chars(mode))
+    dec = bool(mode & DECIMAL_COMMA)
+    conv = float if as_float else int  # számjegy-sztring -> érték; a módot egyszer, itt döntjük el
+
+    def first(text: str) -> Optional[Number]:
+        if not text:
+            return None
+        if text.isdecimal():  # gyors út: a szöveg maga egy tagolatlan szám (regex nélkül)
+            return conv(text)
+        m = search(text)
+        if m is None:
+            return None
+        opened, sign, num = m.groups()  # a _match_converter értéke, hívás nélkül (forró út: find_score)
+        if num.isdecimal():
+            v = conv(num)
+        else:
+            d = num.replace(" ", "").replace(".", "")  # pont csak elválasztóként lehet a találatban
+            if d.isdecimal():
+                v = conv(d)
+            elif dec and d.replace(",", "", 1).isdecimal():  # a szkenner legfeljebb egy tizedesvesszőt enged
+                v = float(d.replace(",", "."))
+            else:
+                v = _to_value(d, rest, dec)
+                if as_float:
+                    v = float(v)
+        if (sign or opened) and (sign in minus) != bool(opened):
+            v = -v
+        return v
+
+    return first
+
+
+_PARSERS: Dict[int, Callable[[object], Optional[Number]]] = {}   # mód -> parser, az lru_cache-hívás nélkül
+
+
+def _parser(mode: int) -> Callable[[object], Optional[Number]]:
+    p = _PARSERS.get(mode)
+    if p is None:
+        p = _PARSERS[mode] = number_parser(mode)
+    return p
+
+
+def parse_number(token, mode: int = AMOUNT) -> Optional[Number]:
+    return (_PARSERS.get(mode) or _parser(mode))(token)
+
+
+def scan_numbers(text: str, mode: int = GROUPED | UNICODE_MINUS) -> List[Number]:
+    return number_scanner(mode)(text)
+
+
+def first_number(text: str, mode: int = DECIMAL) -> Optional[Number]:
+    """Az első szám a szövegben (pl. 'Pontszám: 53/100' -> 53)."""
+    return number_finder(mode)(text)
+
+
+def to_number(x, mode: int = AMOUNT) -> Optional[Number]:
+    """Érték-koerció: int/float változatlan, str a parse_number szerint, minden más None."""
+    if x.__class__ is str:
+        return (_PARSERS.get(mode) or _parser(mode))(x)
+    if isinstance(x, (int, float)):
+        return x
+    if isinstance(x, str):
+        return _parser(mode)(x)
+    return None
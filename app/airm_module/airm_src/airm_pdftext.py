@@ -0,0 +1,376 @@
+"""
+AIRM PDF-szöveg backendek – egy interfész, cserélhető kinyerőkkel.
+
+Minden backend ugyanazt adja (PdfText): az oldalak szövege "\\n"-nel fűzve, oldalszám, és ha tudja,
+oldalanként a szavak koordinátái (pdfplumber extract_words formátum: text, x0, x1, top, bottom),
+amiből az airm_columns oszlopokat bont. Az oldalak egyenként jönnek (iter_pages); az extract(stop=...)
+az első olyan oldal után megáll, amire a stop(oldal_szöveg) igazat ad (korai kilépés, a motor dönti el).
+
+  pdfium      pypdfium2 – gyors (natív), szavak a karakterdobozokból; alapértelmezett első lépés
+  pdfplumber  layout-elemzés (pdfminer) – lassú, de a legpontosabb; erre eszkalálunk
+  pypdf2      PyPDF2, ha telepítve van – csak szöveg, végső tartalék
+
+Memória: az oldalak egyenként jönnek és az oldal objektumai (pdfplumber layout / pdfium textpage) a
+feldolgozás után felszabadulnak; extract(on_words=...) esetén a szavakat is oldalanként adjuk tovább
+(pl. airm_columns.ColumnRows.feed) és nem tartjuk meg, így a csúcs ~ egy oldal + az eddigi szöveg.
+
+Az extract(check=...) minden oldal után meghívja a check()-et; ha az Cancelled-et dob (időkeret lejárt,
+a kliens bontott), a kinyerés azonnal leáll, a dokumentum lezárul, és nem eszkalálunk a következő backendre.
+
+Átadás (PdfSource): a feltöltött fájl útvonala + tartalom-hash-e (blake2b-128, mint a budget.content_digest). A
+backendek a fájl mmap-jéből olvasnak (PDFium: FPDF_LoadMemDocument64 közvetlenül a leképezett lapokon; pdfplumber /
+PyPDF2: a leképezés mint stream), a lánc egy leképezést használ (eszkaláláskor sem olvassuk újra), a lapok a
+page cache-ből jönnek, processzek között is közösen. Pickle-ben csak (útvonal, hash) utazik, a tartalom soha.
+AIRM_PDF_MMAP=0: a backendek az útvonalat nyitják meg (régi viselkedés).
+
+A sorrendet az AIRM_PDF_BACKENDS környezeti változó adja (vesszővel, pl. "pdfplumber" = régi
+viselkedés). Hogy mikor kell eszkalálni, azt a motor dönti el (hiányzó kimutatás-sorok, lásd
+main.read_and_parse); itt csak a kinyerés és a backendenkénti statisztika (kísérlet, siker, idő) van.
+"""
+from __future__ import annotations
+
+import contextlib
+import ctypes
+import hashlib
+import mmap
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_CHAIN = ("pdfium", "pdfplumber", "pypdf2")
+EARLY_EXIT_DEFAULT = os.environ.get("AIRM_PDF_EARLY_EXIT", "1") != "0"
+MMAP_DEFAULT = os.environ.get("AIRM_PDF_MMAP", "1") != "0"
+COPY_CHUNK = 1 << 20
+
+_WORD_RE = re.compile(r"\S+")
+
+
+class PdfReadError(RuntimeError):
+    """Egyik backend sem adott szöveget."""
+
+
+class Cancelled(Exception):
+    """A hívó check()-je dobja (időkeret, bontott kapcsolat) – nem backend-hiba, továbbdobjuk."""
+
+
+class PdfText:
+    __slots__ = ("text", "pages", "words", "backend", "pages_read")
+
+    def __init__(self, text: str, pages: int, words: Optional[List[List[dict]]], backend: str,
+                 pages_read: Optional[int] = None):
+        self.text = text
+        self.pages = pages
+        self.words = words      # oldalanként a szavak, vagy None (a backend nem ad koordinátát)
+        self.backend = backend
+        self.pages_read = pages if pages_read is None else pages_read  # korai kilépésnél < pages
+
+
+class PdfSource:
+    """Egy PDF a kinyeréshez: útvonal + tartalom-hash (lusta, ha nem adták meg). opened(): a fájl mmap-je a blokk
+    végéig (egymásba ágyazható – a backendek lánca egy leképezésen olvas); üres / nem leképezhető fájlnál, ill.
+    AIRM_PDF_MMAP=0 mellett None, és a backendek az útvonalat nyitják meg. Egy kéréshez (szálhoz) tartozik."""
+    __slots__ = ("path", "_digest", "_mm", "_cbuf", "_users")
+
+    def __init__(self, path, digest: Optional[str] = None):
+        self.path = Path(path)
+        self._digest = digest
+        self._mm: Optional[mmap.mmap] = None
+        self._cbuf = None
+        self._users = 0
+
+    def __fspath__(self) -> str:
+        return str(self.path)
+
+    def __repr__(self) -> str:
+        return f"PdfSource({str(self.path)!r}, digest={self._digest!r})"
+
+    def __reduce__(self):
+        return (PdfSource, (str(self.path), self._digest))   # a tartalom nem utazik, csak a hivatkozás
+
+    @property
+    def digest(self) -> str:
+        if self._digest is None:
+            h = hashlib.blake2b(digest_size=16)
+            with self.opened() as mm:
+                if mm is not None:
+                    h.update(mm)   # buffer-protokoll: a leképezett lapokat hash-eli, másolat nélkül
+                else:
+                    with open(self.path, "rb") as f:
+                        for chunk in iter(lambda: f.read(COPY_CHUNK), b""):
+                            h.update(chunk)
+            self._digest = h.hexdigest()
+        return self._digest
+
+    @contextlib.contextmanager
+    def opened(self):
+        if self._users == 0 and MMAP_DEFAULT:
+            try:
+                with open(self.path, "rb") as f:
+                    # ACCESS_COPY (privát leképezés): írható buffer kell a ctypes-nézethez; nem írunk bele,
+                    # így a lapok a page cache-éi maradnak
+                    self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+            except (OSError, ValueError):   # nincs fájl / üres fájl: a backend hibája marad a régi
+                self._mm = None
+        self._users += 1
+        try:
+            yield self._mm
+        finally:
+            self._users -= 1
+            if self._users == 0 and self._mm is not None:
+                mm, self._mm, self._cbuf = self._mm, None, None
+                try:
+                    mm.close()
+                except BufferError:
+                    # a (már lezárt) dokumentum még őrzi a ctypes-exportot: a leképezés az utolsó
+                    # hivatkozással együtt szűnik meg (a GC zárja), addig érvényes memória marad
+                    pass
+
+    def c_buffer(self):
+        """A leképezés ctypes-tömbként (PDFium memóriadokumentumhoz; másolat nélkül); csak opened() alatt, és a
+        dokumentumot a blokkon belül close()-olni kell. Valódi buffer-export (from_buffer): amíg bárki (pl. a
+        pypdfium2 lezárt dokumentuma) hivatkozik rá, az mmap nem zárható le, így a memória sosem tűnik el alóla."""
+        if self._cbuf is None and self._mm is not None:
+            self._cbuf = (ctypes.c_char * len(self._mm)).from_buffer(self._mm)
+        return self._cbuf
+
+    def stream(self):
+        """A leképezés file-szerű objektumként az elejéről (pdfminer / PyPDF2), vagy None; csak opened() alatt."""
+        if self._mm is None:
+            return None
+        self._mm.seek(0)
+        return self._mm
+
+
+def as_source(pdf) -> PdfSource:
+    return pdf if isinstance(pdf, PdfSource) else PdfSource(pdf)
+
+
+def save_stream(src, dst, path) -> PdfSource:
+    """Feltöltés mentése: src (file-szerű) -> dst (írásra nyitott fájl) egy menetben, közben a tartalom-hash;
+    egyetlen újrahasznált bufferrel (nincs darabonkénti bytes-foglalás). Az eredmény a kinyerésnek átadható."""
+    h = hashlib.blake2b(digest_size=16)
+    buf = bytearray(COPY_CHUNK)
+    view = memoryview(buf)
+    readinto = getattr(src, "readinto", None)
+    while True:
+        if readinto is not None:
+            n = readinto(buf)
+            chunk = view[:n] if n else b""
+        else:
+            chunk = src.read(COPY_CHUNK)
+            n = len(chunk)
+        if not n:
+            break
+        h.update(chunk)
+        dst.write(chunk)
+    view.release()
+    return PdfSource(path, h.hexdigest())
+
+
+class _Backend:
+    name = ""
+
+    def iter_pages(self, pdf_path: Path) -> Iterator[Tuple[str, Optional[List[dict]], int]]:
+        """(oldal szövege, oldal szavai vagy None, összes oldalszám) oldalanként. pdf_path: Path vagy PdfSource."""
+        raise NotImplementedError
+
+    def extract(self, pdf_path: Path, stop: Optional[Callable[[str], bool]] = None,
+                check: Optional[Callable[[], None]] = None,
+                on_words: Optional[Callable[[Optional[List[dict]]], None]] = None) -> PdfText:
+        """on_words: oldalanként megkapja a szavakat (vagy None-t); ilyenkor a PdfText.words None marad."""
+        parts: List[str] = []
+        words: List[Optional[List[dict]]] = []
+        total = 0
+        with contextlib.closing(self.iter_pages(pdf_path)) as pages:
+            for text, page_words, total in pages:
+                parts.append(text)
+                if on_words is not None:
+                    on_words(page_words)
+                else:
+                    words.append(page_words)
+                del page_words
+                if stop is not None and stop(text):
+                    break
+                if check is not None:
+                    check()
+        has_words = bool(words) and all(w is not None for w in words)
+        return PdfText("\n".join(parts), total, words if has_words else None, self.name, len(parts))
+
+
+_PDFIUM_LOCK = threading.Lock()
+
+
+class PdfiumBackend(_Backend):
+    name = "pdfium"
+
+    @staticmethod
+    def available() -> bool:
+        try:
+            import pypdfium2  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def iter_pages(self, pdf_path: Path):
+        import pypdfium2 as pdfium
+        source = as_source(pdf_path)
+        with _PDFIUM_LOCK, source.opened():  # a PDFium nem szálbiztos: processzenként egyszerre egy dokumentum
+            yield from self._iter_locked(pdfium, source.c_buffer() or str(source.path))
+
+    @staticmethod
+    def _iter_locked(pdfium, data):
+        pdf = pdfium.PdfDocument(data)
+        del data  # a bufferre ezután csak a dokumentum (és a PdfSource) hivatkozik
+        try:
+            total = len(pdf)
+            for i in range(total):
+                page = pdf[i]
+                tp = page.get_textpage()
+                try:
+                    text, page_words = _pdfium_page(tp, page.get_height())
+                finally:
+                    tp.close()
+                    page.close()
+                yield text, page_words, total
+        finally:
+            pdf.close()
+
+
+def _pdfium_page(tp, height: float):
+    """Oldalszöveg + szavak. A szó széle az első/utolsó karakter "laza" (betűtípus-magasságú, előtolás-
+    szélességű) dobozából jön, mint a pdfplumbernél; a sorvég \\r\\n -> \\n."""
+    n = tp.count_chars()
+    if n <= 0:
+        return "", []
+    raw = tp.get_text_range(0, n, force_this=True)
+    text = raw.replace("\r\n", "\n").replace("\r", "\n")
+    if len(raw) != n:  # helyettesítő/összevont karakterek: az indexek nem a dobozokéi
+        return text, None
+    box = tp.get_charbox
+    words = []
+    for m in _WORD_RE.finditer(raw):
+        left, bottom, right, top = box(m.start(), loose=True)
+        if m.end() - m.start() > 1:
+            right = box(m.end() - 1, loose=True)[2]
+        words.append({"text": m.group(), "x0": left, "x1": right, "top": height - top, "bottom": height - bottom})
+    return text, words
+
+
+def _slim(w: dict) -> dict:
+    """A pdfplumber szava csak az airm_columns-nak kellő kulcsokkal (mint a pdfium-é)."""
+    return {"text": w["text"], "x0": w["x0"], "x1": w["x1"], "top": w["top"], "bottom": w["bottom"]}
+
+
+class PdfplumberBackend(_Backend):
+    name = "pdfplumber"
+
+    @staticmethod
+    def available() -> bool:
+        try:
+            import pdfplumber  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def iter_pages(self, pdf_path: Path):
+        import pdfplumber
+        source = as_source(pdf_path)
+        with source.opened(), pdfplumber.open(source.stream() or str(source.path)) as pdf:
+            total = len(pdf.pages)
+            for page in pdf.pages:
+                try:
+                    text = page.extract_text() or ""
+                    try:
+                        words = page.extract_words(use_text_flow=False, keep_blank_chars=False)
+                    except TypeError:
+                        words = page.extract_words()
+                    yield text, [_slim(w) for w in words], total
+                    del words
+                finally:
+                    page.close()  # layout / karakter-cache: különben az egész dokumentumé a végéig él
+
+
+class PyPDF2Backend(_Backend):
+    name = "pypdf2"
+
+    @staticmethod
+    def available() -> bool:
+        try:
+            import PyPDF2  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def iter_pages(self, pdf_path: Path):
+        from PyPDF2 import PdfReader
+        source = as_source(pdf_path)
+        with source.opened():
+            reader = PdfReader(source.stream() or str(source.path))
+            total = len(reader.pages)
+            for page in reader.pages:
+                yield page.extract_text() or "", None, total
+
+
+BACKENDS = {b.name: b for b in (PdfiumBackend, PdfplumberBackend, PyPDF2Backend)}
+
+
+def register_backend(cls):
+    """Új backend felvétele (name, available(), iter_pages(path); az extract a _Backend-é)."""
+    BACKENDS[cls.name] = cls
+    return cls
+
+
+def backend_chain(names: Optional[Sequence[str]] = None) -> List[object]:
+    """A telepített backendek a kért sorrendben (alapból AIRM_PDF_BACKENDS, különben DEFAULT_CHAIN)."""
+    if names is None:
+        env = os.environ.get("AIRM_PDF_BACKENDS", "")
+        names = [n.strip() for n in env.split(",") if n.strip()] or DEFAULT_CHAIN
+    out = []
+    for n in names:
+        cls = BACKENDS.get(n)
+        if cls is not None and cls.available():
+            out.append(cls())
+    return out
+
+
+# ---- backendenkénti statisztika (processzen belül; a motor újratöltése nem nullázza) ----
+_lock = threading.Lock()
+_STATS: Dict[str, Dict[str, float]] = {}
+
+
+def record_attempt(backend: str, result: str, seconds: float):
+    """result: ok | missing (hiányos kimutatás, eszkalálva) | empty | error | cancelled"""
+    with _lock:
+        st = _STATS.setdefault(backend, {"attempts": 0, "ok": 0, "seconds": 0.0})
+        st["attempts"] += 1
+        st["seconds"] += seconds
+        st[result] = st.get(result, 0) + 1
+
+
+def backend_stats() -> Dict[str, Dict[str, float]]:
+    """{backend: {attempts, ok, missing, empty, error, seconds, success_ratio, avg_ms}}"""
+    with _lock:
+        out = {k: dict(v) for k, v in _STATS.items()}
+    for st in out.values():
+        st["success_ratio"] = st["ok"] / st["attempts"] if st["attempts"] else 0.0
+        st["avg_ms"] = st["seconds"] * 1000.0 / st["attempts"] if st["attempts"] else 0.0
+    return out
+
+
+def timed_extract(backend, pdf_path: Path, stop: Optional[Callable[[str], bool]] = None,
+                  check: Optional[Callable[[], None]] = None,
+                  on_words: Optional[Callable[[Optional[List[dict]]], None]] = None):
+    """(PdfText vagy None, hiba vagy None, másodperc); a Cancelled továbbmegy."""
+    t0 = time.perf_counter()
+    try:
+        doc = backend.extract(pdf_path, stop, check, on_words)
+        err = None
+    except Cancelled:
+        record_attempt(backend.name, "cancelled", time.perf_counter() - t0)
+        raise
+    except Exception as e:
+        doc, err = None, e
+    return doc, err, time.perf_counter() - t0
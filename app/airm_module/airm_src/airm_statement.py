@@ -0,0 +1,214 @@
+"""
+AIRM kimutatás-objektum – a mérleg (bs) és az eredménykimutatás (pl) tömör, típusos alakja.
+
+A mezők rögzített indexet kapnak (BS: a KEYS_BS címkéi + Szállítók; PL: a KEYS_PL címkéi + a KPI-gráf további
+bemenetei), az értékek egyetlen array('d')-ben vannak, három bitmaszk mellett (jelen van / None / egész). A
+számkoerció (airm_numparse.to_number, AMOUNT) egyszer, beíráskor fut; olvasáskor az érték már int/float/None.
+Ami nem szám és azzá sem alakítható (pl. tuple, szöveg), változatlanul az _extra dict-be kerül – nem vész el.
+
+Visszafelé kompatibilis: a Statement MutableMapping, dict-szemantikával (kulcs-jelenlét, beszúrási helyett
+séma-sorrend – a parser úgyis a séma sorrendjében tölt, iterálás, ==, dict(st), {**st}). A sémán kívüli kulcs
+(pl. egy kézi felülírás ismeretlen mezője) az _extra dict-be kerül. Alias (pl. "Equity" -> "Saját tőke") csak a
+first() / lookup() hívásokban érvényes – a Mapping-protokoll pontos kulcsokkal dolgozik, mint a dict.
+
+Pickle: (séma neve, az értékek bájtjai, maszkok, extra) – a címkék nem utaznak (a séma modulszintű konstans);
+JSON-hoz: to_dict().
+"""
+from __future__ import annotations
+
+from array import array
+from collections.abc import Mapping, MutableMapping
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+from airm_numparse import AMOUNT, Number, to_number
+
+_EXACT = float(2 ** 53)   # ennél nagyobb egész a double-ben nem pontos -> _extra
+
+
+class StatementSchema:
+    __slots__ = ("name", "fields", "index", "aliases")
+
+    def __init__(self, name: str, fields: Sequence[str], aliases: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.fields: Tuple[str, ...] = tuple(fields)
+        self.index: Dict[str, int] = {k: i for i, k in enumerate(self.fields)}
+        self.aliases: Dict[str, str] = dict(aliases or {})
+        SCHEMAS[name] = self
+
+    def __reduce__(self):
+        return (schema, (self.name,))
+
+    def statement(self, values: Optional[Mapping] = None) -> "Statement":
+        return Statement(self, values)
+
+
+SCHEMAS: Dict[str, StatementSchema] = {}
+
+
+def schema(name: str) -> StatementSchema:
+    return SCHEMAS[name]
+
+
+class Statement(MutableMapping):
+    __slots__ = ("_schema", "_values", "_present", "_null", "_int", "_extra")
+
+    def __init__(self, schema: StatementSchema, values: Optional[Mapping] = None):
+        self._schema = schema
+        self._values = array("d", bytes(8 * len(schema.fields)))
+        self._present = self._null = self._int = 0
+        self._extra: Optional[Dict[str, Any]] = None
+        if values:
+            for k, v in values.items():
+                self[k] = v
+
+    # ---- Mapping ----
+    def __getitem__(self, key: str) -> Any:
+        i = self._schema.index.get(key)
+        if i is None or not (self._present >> i) & 1:
+            if self._extra is not None and key in self._extra:
+                return self._extra[key]
+            raise KeyError(key)
+        bit = 1 << i
+        if self._null & bit:
+            return None
+        v = self._values[i]
+        return int(v) if self._int & bit else v
+
+    def __setitem__(self, key: str, value) -> None:
+        v = to_number(value, AMOUNT)
+        raw = v is None and value is not None  # nem szám (pl. tuple, szöveg): változatlanul megőrizzük
+        i = self._schema.index.get(key)
+        if i is None or raw or (isinstance(v, int) and abs(v) >= _EXACT):
+            if i is not None:  # nem szám / pontatlan lenne: a sémamező is az extra-ba kerül
+                self._drop(i)
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value if raw else v
+            return
+        if self._extra is not None:
+            self._extra.pop(key, None)
+        bit = 1 << i
+        self._present |= bit
+        if v is None:
+            self._null |= bit
+            self._int &= ~bit
+            self._values[i] = 0.0
+        else:
+            self._null &= ~bit
+            self._int = self._int | bit if isinstance(v, int) else self._int & ~bit
+            self._values[i] = v
+
+    def _drop(self, i: int) -> None:
+        mask = ~(1 << i)
+        self._present &= mask
+        self._null &= mask
+        self._int &= mask
+
+    def __delitem__(self, key: str) -> None:
+        if self._extra is not None and key in self._extra:
+            del self._extra[key]
+            return
+        i = self._schema.index.get(key)
+        if i is None or not (self._present >> i) & 1:
+            raise KeyError(key)
+        self._drop(i)
+
+    def __iter__(self) -> Iterator[str]:
+        present = self._present
+        for i, k in enumerate(self._schema.fields):
+            if (present >> i) & 1:
+                yield k
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return bin(self._present).count("1") + (len(self._extra) if self._extra else 0)
+
+    def __contains__(self, key) -> bool:
+        i = self._schema.index.get(key)
+        if i is not None and (self._present >> i) & 1:
+            return True
+        return self._extra is not None and key in self._extra
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __repr__(self) -> str:
+        return f"Statement({self._schema.name}, {self.to_dict()!r})"
+
+    # ---- dict-kompatibilis kiegészítők ----
+    def copy(self) -> "Statement":
+        out = Statement.__new__(Statement)
+        out._schema = self._schema
+        out._values = array("d", self._values)
+        out._present, out._null, out._int = self._present, self._null, self._int
+        out._extra = dict(self._extra) if self._extra else None
+        return out
+
+    def to_dict(self) -> Dict[str, Optional[Number]]:
+        return dict(self.items())
+
+    # ---- alias-feloldás ----
+    def lookup(self, key: str) -> Any:
+        """Az érték pontos kulccsal, különben a séma aliasán át (pl. "Equity" -> "Saját tőke"); nincs: None."""
+        if key in self:
+            return self[key]
+        canonical = self._schema.aliases.get(key)
+        return self.get(canonical) if canonical is not None else None
+
+    def first(self, keys: Iterable[str]) -> Optional[float]:
+        """Az első számérték float-ként a kulcsok (és aliasaik) sorrendjében – a régi _first_present."""
+        for k in keys:
+            v = self.lookup(k)
+            if isinstance(v, (int, float)):  # None és a nem szám (extra-ban őrzött) érték kimarad
+                return float(v)
+        return None
+
+    # ---- pickle ----
+    def __reduce__(self):
+        return (_rebuild, (self._schema.name, self._values.tobytes(), self._present, self._null, self._int,
+                           self._extra))
+
+
+def _rebuild(name, data, present, null, is_int, extra):
+    st = Statement.__new__(Statement)
+    st._schema = SCHEMAS[name]
+    st._values = array("d")
+    st._values.frombytes(data)
+    st._present, st._null, st._int, st._extra = present, null, is_int, extra
+    return st
+
+
+def as_statement(schema: StatementSchema, values) -> Statement:
+    """Statement változatlanul (ha ugyanilyen sémájú), dict / egyéb Mapping / None -> új Statement."""
+    if isinstance(values, Statement) and values._schema is schema:
+        return values
+    return Statement(schema, values if isinstance(values, Mapping) else None)
+
+
+BS = StatementSchema("bs", (
+    "Forgóeszközök", "Készletek", "Követelések", "Pénzeszközök", "Eszközök összesen", "Saját tőke",
+    "Hosszú lejáratú kötelezettségek", "Rövid lejáratú kötelezettségek", "Kötelezettségek összesen", "Szállítók",
+), aliases={
+    "Equity": "Saját tőke", "Készlet": "Készletek", "Inventory": "Készletek", "Inventories": "Készletek",
+    "Receivables": "Követelések", "Trade receivables": "Követelések",
+    "Kötelezettségek - Szállítók": "Szállítók", "Payables": "Szállítók", "Trade payables": "Szállítók",
+    "Cash and cash equivalents": "Pénzeszközök", "Short-term liabilities": "Rövid lejáratú kötelezettségek",
+    "Long-term liabilities": "Hosszú lejáratú kötelezettségek", "Current assets": "Forgóeszközök",
+    "Total assets": "Eszközök összesen", "Total liabilities": "Kötelezettségek összesen",
+})
+
+PL = StatementSchema("pl", (
+    "Üzemi (üzleti) tevékenység eredménye", "Értékesítés nettó árbevétele", "Anyagjellegű ráfordítások",
+    "Személyi jellegű ráfordítások", "Értékcsökkenési leírás", "Egyéb bevételek", "Egyéb ráfordítások",
+    "Adózott eredmény", "Revenue", "Fizetett kamat", "Pénzügyi műveletek ráfordításai",
+), aliases={
+    "Profit after tax": "Adózott eredmény", "Net income": "Adózott eredmény", "Net profit": "Adózott eredmény",
+    "ÉCS": "Értékcsökkenési leírás", "Depreciation and amortization": "Értékcsökkenési leírás",
+    "Depreciation": "Értékcsökkenési leírás", "Amortization": "Értékcsökkenési leírás",
+    "Net sales": "Értékesítés nettó árbevétele", "Operating profit": "Üzemi (üzleti) tevékenység eredménye",
+    "Interest paid": "Fizetett kamat",
+})
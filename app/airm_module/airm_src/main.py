@@ -19,57 +19,20 @@ def pick_year_columns(headers):
 # --- Robust number extraction for space-grouped thousands (handles negatives and parentheses) ---
 def _extract_grouped_numbers(line: str):
     """
-    Extract a list of integers from a line.
+    Extract a list of integers from a line (memoized per analysis, see line_memo()).
     Handles both plain numbers (e.g., 3815087) and thousands‑grouped with spaces/dots/nbsp
     (e.g., "510 432", "155 474", "1.234.567").
     Crucially: it DOES NOT merge two adjacent amounts like "510 432 155 474".
     """
     if not line:
         return []
+    return list(_memo("grouped", line, _grouped_numbers_of))
 
-    import re
-    s = line.replace('\u00A0', ' ')
-    # Pattern: either grouped by thousands with separator, or a plain integer
-    pat = re.compile(r'[-+−]?(?:\d{1,3}(?:[ .]\d{3})+|\d+)', re.UNICODE)
-    nums = []
-    for m in pat.finditer(s):
-        token = m.group(0).replace('−', '-').replace(' ', '').replace('.', '')
-        try:
-            val = int(token)
-        except Exception:
-            continue
-        nums.append(val)
-    return nums
-
-def prev_curr_from_line(s: str):
-    nums = _extract_grouped_numbers(s)
-    if not nums:
-        return None, None
-    if len(nums) == 1:
-        return None, nums[0]
-    return nums[0], nums[-1]
-
-# --- Universal extractor for "previous / (modifications) / current" rows ---
-def _nums_from_text(s: str):
-    if not s: return []
-    s = s.replace('\u2212','-')  # unicode minus
-    out = []
-    for m in re.finditer(r'\(?-?\d[\d\s]*\)?', s):
-        token = m.group(0).strip()
-        if not re.search(r'\d', token):
-            continue
-        neg = token.startswith('(') and token.endswith(')')
-        token = token.strip('()').replace(' ','')
-        try:
-            val = int(token)
-            if neg: val = -val
-            out.append(val)
-        except:
-            pass
-    return out
+def _grouped_numbers_of(line: str):
+    return tuple(_scan_line_numbers(line))
 
 def prev_curr_from_line(s: str):
-    nums = _nums_from_text(s)
+    nums = scan_numbers(s, AMOUNT)
     if not nums:
         return None, None
     if len(nums) == 1:
@@ -99,70 +62,222 @@ label_en = {
 
 
 import airm_hotfix_universal  # UNIVERSAL HOTFIX – do not remove
-import re, sys, json, unicodedata
+import contextlib, contextvars, io, re, sys, json, unicodedata
 from pathlib import Path
+from airm_numparse import AMOUNT, GROUPED, UNICODE_MINUS, number_parser, number_scanner, scan_numbers, to_number
+from airm_columns import ColumnRows
+from airm_kpigraph import KpiGraph
+from airm_pdftext import EARLY_EXIT_DEFAULT, PdfReadError, as_source, backend_chain, record_attempt, timed_extract
+from airm_statement import BS, PL, Statement
 
 
-# --- Minimal negative handling (safe, localized) ---
-MINUS_CHARS = "\u2212\u2012\u2013\u2014"
-SPACE_CHARS = (" ", "\xa0", "\u202f")
-def parse_int_signed(token: str):
-    if token is None:
-        return None
-    s = str(token).strip()
-    neg = False
-    if s.startswith("(") and s.endswith(")"):
-        neg = True
-        s = s[1:-1].strip()
-    if s and (s[0] in "+-" or s[0] in MINUS_CHARS):
-        if s[0] in "-" or s[0] in MINUS_CHARS:
-            neg = not neg
-        s = s[1:].strip()
-    for ch in SPACE_CHARS:
-        s = s.replace(ch, "")
-    s = s.replace(".", "")
-    if not s.isdigit():
-        return None
-    v = int(s)
-    return -v if neg else v
+# --- Számértelmezés: minden hely az airm_numparse magot használja ---
+parse_int_signed = number_parser(AMOUNT)  # '(1 234)', '−1 234', '1.234' -> int; szemét -> None
+_scan_line_numbers = number_scanner(GROUPED | UNICODE_MINUS)  # szomszédos tagolt összegeket nem von össze
 SIGNED_NUM = r"\(?[+\-\u2212\u2012\u2013\u2014]?\s*(?:\d{1,3}(?:[\s\xa0]\d{3})+|\d+)\)?"
 SIGNED_PAIR_AT_END_RE = re.compile(rf"({SIGNED_NUM})[\s\xa0]+({SIGNED_NUM})[\s\xa0]*$")
 
 SIGNED_GROUPED_PAIR_AT_END_RE = re.compile(r"([()\+\-\u2212\u2012\u2013\u2014]?\s*\d{1,3}(?:[\s\xa0]\d{3})+)\s+([()\+\-\u2212\u2012\u2013\u2014]?\s*\d{1,3}(?:[\s\xa0]\d{3})+)\s*$")
 # --- /Minimal negative handling ---
 
+# --- Shared line tokenizer: one regex pass per line, the number heuristics work on the tokens ---
+# Every token starts with a digit (so re can skip text quickly). Alternatives after the first digit:
+#   grp  – space-grouped amount ('1 234 567'); same tokens as the old
+#          [+\-\u2212...]?\s*\d{1,3}(?:[ \xa0]\d{3})+ findall, the sign is looked up right before it
+#   (unnamed) – head of a long digit run whose last 1-3 digits start a group ('12' of '12345 678')
+#   run  – plain digit run
+_LINE_TOKEN_RE = re.compile(r"\d(?:(?P<grp>\d{0,2}(?: \d{3})+)|\d*?(?=\d{1,3} \d{3})|(?P<run>\d*))")
+_SIGN_CHARS = frozenset("+-\u2212\u2012\u2013\u2014")
+# whitespace other than ' ': the simple number view does not apply (numbers_on_line groups over any \s)
+_ODD_WS_RE = re.compile(r"[^\S ]")
+# the trailing numeric part of a line, matched on the reversed string (all end-anchored rules live in it)
+_NUMERIC_TAIL_REV_RE = re.compile(r"[()+\-\u2212\u2012\u2013\u2014\s\d]*")
+
+
+class LineTokens:
+    """A statement line tokenized once.
+
+    grouped: [(start, end, value, digits)] signed grouped amounts, digits like '510 432'
+    runs:    [(start, end)] plain digit runs
+    """
+    __slots__ = ("line", "grouped", "runs", "has_digits", "_tail")
+
+    def __init__(self, line: str):
+        line = line.replace("\xa0", " ")
+        self.line = line
+        self.grouped = grouped = []
+        self.runs = runs = []
+        self.has_digits = False
+        self._tail = None
+        for m in _LINE_TOKEN_RE.finditer(line):
+            self.has_digits = True
+            kind = m.lastgroup
+            if kind == "grp":
+                start, end = m.span()
+                digits = line[start:end]
+                v = int(digits.replace(" ", ""))
+                j = start - 1
+                while j >= 0 and line[j].isspace():
+                    j -= 1
+                if j >= 0 and line[j] in _SIGN_CHARS and line[j] != "+":
+                    v = -v
+                grouped.append((start, end, v, digits))
+            elif kind == "run":
+                runs.append(m.span())
+
+    @property
+    def tail(self) -> str:
+        """Trailing run of digits/signs/parens/whitespace ('' if the line ends in text)."""
+        if self._tail is None:
+            n = _NUMERIC_TAIL_REV_RE.match(self.line[::-1]).end()
+            self._tail = self.line[len(self.line) - n:] if n else ""
+        return self._tail
+
+    def numbers(self):
+        """Same list as numbers_on_line(line)."""
+        if self.grouped or _ODD_WS_RE.search(self.line):
+            return numbers_on_line(self.line)
+        runs = self.runs
+        if runs:
+            s, e = runs[0]
+            if self.line[e:e + 1] == "." and not self.line[:s].strip(" "):
+                runs = runs[1:]  # leading row code '12.'
+        return [self.line[s:e] for s, e in runs]
+
+
+def tokenize_line(line: str) -> LineTokens:
+    return _memo("tokens", line, LineTokens)
+
+
+# --- Per-analysis line memo: the same lines are resolved by find_line, the supplier detectors and make_docx ---
+LINE_MEMO_MAX = 20000  # entries (all kinds together); the oldest entry is dropped when full
+
+class LineMemo:
+    """(kind, line) -> resolved value for one analysis, with hit/miss counts per kind."""
+    __slots__ = ("max_entries", "data", "hits", "misses")
+
+    def __init__(self, max_entries: int = LINE_MEMO_MAX):
+        self.max_entries = max_entries
+        self.data = {}
+        self.hits = {}
+        self.misses = {}
+
+    def get(self, kind: str, line: str, fn):
+        key = (kind, line)
+        try:
+            v = self.data[key]
+        except KeyError:
+            self.misses[kind] = self.misses.get(kind, 0) + 1
+            v = fn(line)
+            if len(self.data) >= self.max_entries:
+                del self.data[next(iter(self.data))]
+            self.data[key] = v
+            return v
+        self.hits[kind] = self.hits.get(kind, 0) + 1
+        return v
+
+    def stats(self):
+        kinds = sorted(set(self.hits) | set(self.misses))
+        return {
+            "hits": sum(self.hits.values()),
+            "misses": sum(self.misses.values()),
+            "size": len(self.data),
+            "by_kind": {k: {"hits": self.hits.get(k, 0), "misses": self.misses.get(k, 0)} for k in kinds},
+        }
+
+_LINE_MEMO = contextvars.ContextVar("airm_line_memo", default=None)
+
+@contextlib.contextmanager
+def line_memo(max_entries: int = LINE_MEMO_MAX):
+    """Scope of one analysis. Nested scopes share the outer memo; on exit the memo is
+    cleared and its stats are left in _AIRM_LAST_LINE_MEMO."""
+    memo = _LINE_MEMO.get()
+    if memo is not None:
+        yield memo
+        return
+    memo = LineMemo(max_entries)
+    token = _LINE_MEMO.set(memo)
+    try:
+        yield memo
+    finally:
+        _LINE_MEMO.reset(token)
+        globals()['_AIRM_LAST_LINE_MEMO'] = memo.stats()
+        memo.data.clear()
+
+def _memo(kind: str, line: str, fn):
+    memo = _LINE_MEMO.get()
+    if memo is None:
+        return fn(line)
+    return memo.get(kind, line, fn)
+
+# Koordinátákból feloldott táblasorok ({sor: (tárgyév, előző év)}, lásd airm_columns); egy elemzésre.
+_COLUMNS = contextvars.ContextVar("airm_columns", default=None)
+
+def column_value(line: str):
+    """(current, previous) for a statement line resolved from word coordinates, or None:
+    then the text heuristics decide."""
+    cols = _COLUMNS.get()
+    if not cols:
+        return None
+    return cols.get(line)
+
+def last_column_rows():
+    """Column rows of the last read_pdf_text() (resolved page by page during extraction)."""
+    return dict(globals().get('_AIRM_LAST_COLUMNS') or {})
+
+def deburr_line(s: str) -> str:
+    """Lower-case, accent-free label form used by the supplier detectors (memoized)."""
+    return _memo("deburr", s, _deburr)
+
+def _deburr(s: str) -> str:
+    s = s.replace("\u00A0", " ")
+    if s.isascii():
+        return s.lower()
+    out = s.translate(_DEBURR_TABLE)
+    if _DEBURR_REORDER and not _DEBURR_REORDER.isdisjoint(s):
+        nf = unicodedata.normalize("NFD", s)
+        return "".join(ch for ch in nf if unicodedata.category(ch) != "Mn").lower()
+    return out.lower()
+
+class _DeburrTable(dict):
+    """ord(ch) -> NFD(ch) without Mn marks, filled on first use. Same as deburring the whole line,
+    except for the few spacing combining marks that NFD may reorder: those lines take the slow path."""
+    def __missing__(self, code):
+        nf = unicodedata.normalize("NFD", chr(code))
+        if any(unicodedata.combining(c) and unicodedata.category(c) != "Mn" for c in nf):
+            _DEBURR_REORDER.add(chr(code))
+        out = "".join(c for c in nf if unicodedata.category(c) != "Mn")
+        self[code] = out
+        return out
+
+_DEBURR_TABLE = _DeburrTable()
+_DEBURR_REORDER = set()
+
 def strip_accents(s: str) -> str:
     return ''.join(ch for ch in unicodedata.normalize('NFKD', s) if not unicodedata.combining(ch))
 
 NUM_RE = re.compile(r'(?:\d{1,3}(?:[\s\xa0]\d{3})+|\d+)')
 PAIR_AT_END_RE = re.compile(r'((?:\d{1,3}(?:[\s\xa0]\d{3})+?|\d+))[\s\xa0]+((?:\d{1,3}(?:[\s\xa0]\d{3})+|\d+))[\s\xa0]*$')
 
-def read_pdf_text(pdf_path: Path) -> str:
-    text = ""
-    try:
-        import pdfplumber
-        with pdfplumber.open(str(pdf_path)) as pdf:
-            parts = []
-            globals()['_AIRM_LAST_WORDS'] = []
-            for page in pdf.pages:
-                parts.append(page.extract_text() or "")
-                try:
-                    words = page.extract_words(use_text_flow=False, keep_blank_chars=False)
-                except TypeError:
-                    words = page.extract_words()
-                globals()['_AIRM_LAST_WORDS'].append(words)
-            text = "\n".join(parts)
-    except Exception:
-        try:
-            from PyPDF2 import PdfReader
-            reader = PdfReader(str(pdf_path))
-            parts = []
-            for page in reader.pages:
-                parts.append(page.extract_text() or "")
-            text = "\n".join(parts)
-        except Exception as e2:
-            raise RuntimeError(f"Nem sikerült beolvasni a PDF-et: {e2}")
-    return text
+def read_pdf_text(pdf_path: Path, backends=None) -> str:
+    """Text of the first backend in the chain (airm_pdftext) that yields any; the column rows resolved
+    from its per-page words are kept in _AIRM_LAST_COLUMNS (empty if it has no coordinates)."""
+    last_err = None
+    for backend in backend_chain(backends):
+        acc = ColumnRows()
+        doc, err, secs = timed_extract(backend, pdf_path, on_words=acc.feed)
+        if doc is not None and doc.text.strip():
+            record_attempt(backend.name, "ok", secs)
+            _remember_pdf(doc, acc.rows())
+            return doc.text
+        record_attempt(backend.name, "error" if err else "empty", secs)
+        last_err = err or last_err
+    raise PdfReadError(f"Nem sikerült beolvasni a PDF-et: {last_err}")
+
+def _remember_pdf(doc, columns):
+    globals()['_AIRM_LAST_COLUMNS'] = columns
+    globals()['_AIRM_LAST_PAGES'] = doc.pages
+    globals()['_AIRM_LAST_BACKEND'] = doc.backend
 
 
 
@@ -198,6 +313,9 @@ def get_suppliers_from_pdf101(text: str):
     if i101 is None:
         return None, None, None
     line = lines[i101]
+    hit = column_value(line)
+    if hit is not None:
+        return hit[0], hit[1], line
 
     # Strip leading '101.' or '101 ' so grouping won't include it
     line_wo_code = re.sub(r'^\s*101[.)]?\s*', '', line)
@@ -243,16 +361,12 @@ def get_suppliers_by_label(text: str):
     """
     if not text:
         return None, None, None
-    import re, unicodedata
-    def deburr(s: str):
-        s = s.replace("\u00A0", " ")
-        nf = unicodedata.normalize("NFD", s)
-        return "".join(ch for ch in nf if unicodedata.category(ch) != "Mn").lower()
+    import re
     aliases = ["szallitok", "szallito", "aruszallitasbol", "trade payables", "accounts payable"]
     lines = text.splitlines()
     best_i = None
     for i, ln in enumerate(lines):
-        s = deburr(ln)
+        s = deburr_line(ln)
         if any(a in s for a in aliases):
             if "(szallitok)" in s or "trade payables" in s:
                 best_i = i
@@ -267,17 +381,20 @@ def get_suppliers_by_label(text: str):
         if 0 <= j < len(lines):
             candidates.append(lines[j])
     for cand in candidates:
+        hit = column_value(cand)
+        if hit is not None:
+            return hit[0], hit[1], cand
         # Strip leading codes like '111.' before parsing
         s = re.sub(r'^\s*\d+[.)]?\s*', '', cand)
         # Use the general parser: handles concatenated chains and 3+ group cases
         cur, prev = current_year_value_from_line(s)
         if cur is not None or prev is not None:
             # Final guard: if 3+ grouped numbers present, force (prev=first, curr=last)
-            grp = re.findall(r'[+\-\u2212\u2012\u2013\u2014]?\s*\d{1,3}(?:[ \xa0]\d{3})+', cand)
+            grp = tokenize_line(cand).grouped
             if len(grp) >= 3:
-                cur = parse_int_signed(grp[-1]); prev = parse_int_signed(grp[0])
+                cur = grp[-1][2]; prev = grp[0][2]
             return cur, prev, cand
-    return None, None, Nones[best_i]
+    return None, None, lines[best_i]
 
 
 def get_trade_payables_dual_universal(text: str):
@@ -328,6 +445,9 @@ def get_trade_payables_dual_universal(text: str):
         return None, None
 
     for idx in window:
+        hit = column_value(lines[idx])
+        if hit is not None:
+            return hit[0], hit[1], lines[idx]
         cur, prev = extract_two_numbers(lines[idx])
         if cur is not None or prev is not None:
             return cur, prev, lines[idx]
@@ -337,15 +457,11 @@ def get_trade_payables_universal(text: str):
     Universal 'Szállítók' (trade payables) extraction based on label aliases; not tied to line numbers.
     v12: +neighbor-line join window; magnitude filter (>=1,000); glued-token split; diacritic-insensitive.
     """
-    def deburr(s: str):
-        s = s.replace("\u00A0"," ")
-        nf = unicodedata.normalize("NFD", s)
-        return "".join(ch for ch in nf if unicodedata.category(ch) != "Mn").lower()
-
+    deburr = _deburr
     aliases = ["szallito", "szallitok", "aruszallitasbol", "accounts payable", "trade payables"]
     lines = text.splitlines()
     # Precompute deburred lines
-    dlines = [deburr(ln) for ln in lines]
+    dlines = [deburr_line(ln) for ln in lines]
     cand_idx = [i for i, dl in enumerate(dlines) if any(a in dl for a in aliases)]
     if not cand_idx:
         return None
@@ -553,9 +669,12 @@ def get_trade_payables_universal(text: str):
 
 
 
+BAL_START_RE = re.compile(r'MÉRLEGE', re.IGNORECASE)
+PL_START_RE = re.compile(r'EREDMÉNYKIMUTATÁS', re.IGNORECASE)
+
 def segment_sections(text: str):
-    bal_start = re.search(r'MÉRLEGE', text, re.IGNORECASE)
-    pl_start = re.search(r'EREDMÉNYKIMUTATÁS', text, re.IGNORECASE)
+    bal_start = BAL_START_RE.search(text)
+    pl_start = PL_START_RE.search(text)
     if not (bal_start and pl_start):
         return text, text
     if bal_start.start() < pl_start.start():
@@ -571,47 +690,54 @@ def numbers_on_line(line: str):
 
 
 def current_year_value_from_line(line: str):
-    line = line.replace("\xa0", " ")
+    hit = column_value(line)
+    if hit is not None:
+        return hit
+    return _memo("cyv", line, _current_year_value_of)
+
+def _current_year_value_of(line: str):
+    return current_year_value_from_tokens(tokenize_line(line))
+
+def current_year_value_from_tokens(tok: LineTokens):
     # 0) UNIVERSAL grouped-number rule (ignore small codes like '020')
-    _grp = re.findall(r'[+\-\u2212\u2012\u2013\u2014]?\s*\d{1,3}(?:[ \xa0]\d{3})+', line)
+    _grp = tok.grouped
     if len(_grp) >= 3:
-        return parse_int_signed(_grp[-1]), parse_int_signed(_grp[0])
+        return _grp[-1][2], _grp[0][2]
     if len(_grp) == 1:
         # single long chain like '2 064 948 959 928' -> try split into two numbers
-        parts = re.findall(r'\d{1,3}', _grp[0])
+        parts = _grp[0][3].split(' ')
         for cut in range(len(parts)-2, 1, -1):
-            left = ' '.join(parts[:cut]); right = ' '.join(parts[cut:])
-            lv = parse_int_signed(left); rv = parse_int_signed(right)
-            if lv is not None and rv is not None and abs(lv) >= 1000 and abs(rv) >= 1000:
+            lv = int(''.join(parts[:cut])); rv = int(''.join(parts[cut:]))
+            if abs(lv) >= 1000 and abs(rv) >= 1000:
                 return rv, lv
     if len(_grp) == 2:
         # Case A: FIRST token contains prev+mod concatenated, second token is current (e.g., '510 432 155 474' & '-84 928')
-        g0 = re.findall(r'\d{1,3}', _grp[0])
+        g0 = _grp[0][3].split(' ')
         if len(g0) >= 4:
             for pg in (3, 2):  # prefer 3-group prev, else 2-group
                 if len(g0) - pg in (2, 3) and pg <= len(g0)-2:
-                    prev = parse_int_signed(' '.join(g0[:pg]))
-                    cur = parse_int_signed(_grp[1])
+                    prev = int(''.join(g0[:pg]))
+                    cur = _grp[1][2]
                     return cur, prev
         # Case B: SECOND token contains mod+current glued; split half
-        g2 = re.findall(r'\d{1,3}', _grp[1])
+        g2 = _grp[1][3].split(' ')
         if len(g2) >= 4 and len(g2) % 2 == 0:
-            cur = parse_int_signed(' '.join(g2[len(g2)//2:]))
-            prev = parse_int_signed(_grp[0])
+            cur = int(''.join(g2[len(g2)//2:]))
+            prev = _grp[0][2]
             return cur, prev
-        return parse_int_signed(_grp[1]), parse_int_signed(_grp[0])
-    # 1) Two grouped numbers at end (each has at least one thousand separator)
-    m0 = SIGNED_GROUPED_PAIR_AT_END_RE.search(line)
-    if m0:
-        return parse_int_signed(m0.group(2)), parse_int_signed(m0.group(1))
-    # 2) Generic signed pair at end
-    m = SIGNED_PAIR_AT_END_RE.search(line)
-    if m:
-        return parse_int_signed(m.group(2)), parse_int_signed(m.group(1))
-    # 3) Tail group pairing (fallback for uneven groups like '2 972 773 995 413')
-    tail_m = re.search(r'([()\+\-\u2212\u2012\u2013\u2014\s\d]+)$', line)
-    if tail_m:
-        tail = tail_m.group(1)
+        return _grp[1][2], _grp[0][2]
+    # 1-3) end-anchored rules: every match lies inside the numeric tail of the line
+    tail = tok.tail
+    if tail:
+        # 1) Two grouped numbers at end (each has at least one thousand separator)
+        m0 = SIGNED_GROUPED_PAIR_AT_END_RE.search(tail)
+        if m0:
+            return parse_int_signed(m0.group(2)), parse_int_signed(m0.group(1))
+        # 2) Generic signed pair at end
+        m = SIGNED_PAIR_AT_END_RE.search(tail)
+        if m:
+            return parse_int_signed(m.group(2)), parse_int_signed(m.group(1))
+        # 3) Tail group pairing (fallback for uneven groups like '2 972 773 995 413')
         groups = re.findall(r'\d{1,3}', tail)
         if len(groups) >= 4:
             cur_g = groups[-2:]
@@ -632,7 +758,7 @@ def current_year_value_from_line(line: str):
                     cur = -abs(cur)
                 return cur, prev
     # 4) Tokens fallback
-    nums = numbers_on_line(line)
+    nums = tok.numbers()
     if not nums:
         return None, None
     cur = parse_int_signed(nums[-1])
@@ -646,14 +772,17 @@ def find_line(section_text: str, label_regex: str):
     best_score = -1
     for line in section_text.splitlines():
         if pat.search(line):
-            g = re.findall(r'[+\-\u2212\u2012\u2013\u2014]?\s*\d{1,3}(?:[ \xa0]\d{3})+', line)
-            n = re.findall(r'\d+', line)
-            score = len(g)*2 + (1 if n else 0)
+            hit = column_value(line)
+            if hit is not None:
+                return {"line": line, "current": hit[0], "previous": hit[1]}
+            tok = tokenize_line(line)
+            g = tok.grouped
+            score = len(g)*2 + (1 if tok.has_digits else 0)
             if score > 0:
                 cur, prev = current_year_value_from_line(line)
                 if len(g) >= 3:
-                    cur = parse_int_signed(g[-1])
-                    prev = parse_int_signed(g[0])
+                    cur = g[-1][2]
+                    prev = g[0][2]
                 return {"line": line, "current": cur, "previous": prev}
             if score > best_score:
                 best = line; best_score = score
@@ -663,10 +792,13 @@ def find_line(section_text: str, label_regex: str):
     return {"line": None, "current": None, "previous": None}
 
 
+def is_revenue_total_line(line: str) -> bool:
+    s = strip_accents(line).lower()
+    return 'ertekesites' in s and 'netto' in s and 'arbev' in s and 'belfoldi' not in s and 'export' not in s and (' i.' in s or s.strip().startswith('i.'))
+
 def find_revenue_line(section_text: str):
     for line in section_text.splitlines():
-        s = strip_accents(line).lower()
-        if 'ertekesites' in s and 'netto' in s and 'arbev' in s and 'belfoldi' not in s and 'export' not in s and (' i.' in s or s.strip().startswith('i.')):
+        if is_revenue_total_line(line):
             cur, prev = current_year_value_from_line(line)
             if cur is not None:
                 return {"line": line, "current": cur, "previous": prev}
@@ -695,15 +827,202 @@ KEYS_PL = [
     ("Adózott eredmény", r'^\s*\d+\.\s*D\.\s*Adózott eredmény|\bAdózott eredmény\b'),
 ]
 
-def parse_financials_with_raw(text: str):
+def parse_financials_with_raw(text: str, columns=None):
+    """columns: koordinátákból feloldott sorok (last_column_rows()); ezekre nem fut a szöveges heurisztika."""
+    token = _COLUMNS.set(columns)
+    try:
+        with line_memo():
+            return _parse_financials_with_raw(text)
+    finally:
+        _COLUMNS.reset(token)
+
+def missing_statement_keys(raw):
+    """KEYS_BS / KEYS_PL keys whose statement line was not found at all (a found line with '-' is fine)."""
+    out = []
+    for sec, keys in (("balance", KEYS_BS), ("pl", KEYS_PL)):
+        for key, _ in keys:
+            if not (raw.get(sec, {}).get(key) or {}).get("line"):
+                out.append(key)
+    return out
+
+_SUPPLIER_LABELS = ("(szallitok)", "trade payables")
+_REVENUE_KEY = "Értékesítés nettó árbevétele"
+
+class StatementProgress:
+    """Early-exit check for streamed pages: feed(page_text) -> True once every KEYS_BS / KEYS_PL line
+    and the Szállítók label line are resolved in the pages read so far, so the rest (notes) can be skipped.
+
+    Same first-match rules as the parser, applied incrementally: a key is resolved by the first line of
+    its section (segment_sections) that matches its regex and has digits (find_line returns that line
+    whatever comes later). Revenue: a matching line with a current value, or else the first total line
+    find_revenue_line would take.
+    Szállítók: the first '(szállítók)' / 'trade payables' line plus its next line (get_suppliers_by_label).
+    Only after both section markers were seen in order: before that the sections are the whole text."""
+    __slots__ = ("text", "pending_bs", "pending_pl", "suppliers", "_supplier_line", "_pl_from", "_disabled")
+
+    def __init__(self):
+        self.text = ""
+        self.pending_bs = {key: re.compile(rgx, re.IGNORECASE) for key, rgx in KEYS_BS}
+        self.pending_pl = {key: re.compile(rgx, re.IGNORECASE) for key, rgx in KEYS_PL}
+        self.suppliers = False
+        self._supplier_line = False
+        self._pl_from = None     # innen olvassuk még az eredménykimutatás sorait (offset a szövegben)
+        self._disabled = False   # fordított szakaszjelölők: segment_sections az egész szövegre esik vissza
+
+    @property
+    def done(self) -> bool:
+        return (self._pl_from is not None and not self._disabled and self.suppliers
+                and not self.pending_bs and not self.pending_pl)
+
+    def feed(self, page_text: str) -> bool:
+        self.text = page_text if not self.text else self.text + "\n" + page_text
+        if not self.suppliers:
+            for ln in page_text.splitlines():
+                if self._supplier_line:
+                    self.suppliers = True
+                    break
+                s = deburr_line(ln)
+                self._supplier_line = any(a in s for a in _SUPPLIER_LABELS)
+        if self._disabled:
+            return False
+        if self._pl_from is None:
+            bal = BAL_START_RE.search(self.text)
+            pl = PL_START_RE.search(self.text)
+            if not (bal and pl):
+                return False
+            if pl.start() < bal.start():
+                self._disabled = True
+                return False
+            self._resolve(self.text[bal.start():pl.start()], self.pending_bs)
+            self._pl_from = pl.start()
+        self._resolve(self.text[self._pl_from:], self.pending_pl)
+        self._pl_from = len(self.text)
+        return self.done
+
+    @staticmethod
+    def _resolve(section_text: str, pending):
+        if not pending:
+            return
+        for line in section_text.splitlines():
+            for key, pat in list(pending.items()):
+                if key == _REVENUE_KEY:
+                    if (pat.search(line) or is_revenue_total_line(line)) \
+                            and current_year_value_from_line(line)[0] is not None:
+                        del pending[key]
+                    continue
+                if not pat.search(line):
+                    continue
+                tok = tokenize_line(line)
+                if tok.grouped or tok.has_digits:
+                    del pending[key]
+
+def read_and_parse(pdf_path: Path, stage=None, backends=None, early_exit=None, check=None):
+    """Read + parse with the cheapest backend first; escalate to the next one (pdfplumber layout
+    analysis) only if statement lines are missing. Returns (text, bs, pl, raw) of the most complete
+    attempt (ties: the cheaper one); the attempts are left in _AIRM_LAST_PDF.
+    early_exit: pages are streamed and extraction stops once StatementProgress is done (the notes after
+    the statements are not read); default: AIRM_PDF_EARLY_EXIT (on unless "0").
+    check: called after every page; if it raises airm_pdftext.Cancelled, extraction stops and it propagates.
+    pdf_path: Path or airm_pdftext.PdfSource; every backend of the chain reads the same mmap of the file."""
+    if early_exit is None:
+        early_exit = EARLY_EXIT_DEFAULT
+    source = as_source(pdf_path)
+    with line_memo(), source.opened():
+        return _read_and_parse(source, stage or _no_stage, backends, early_exit, check)
+
+def _read_and_parse(pdf_path: Path, stage, backends, early_exit, check=None):
+    attempts = []
+    best = None
+    last_err = None
+    chain = backend_chain(backends)
+    for i, backend in enumerate(chain):
+        stop = StatementProgress().feed if early_exit else None
+        acc = ColumnRows()  # oldalanként a kinyerés közben; a szavakat nem tartjuk meg
+        with stage("read_pdf"):
+            doc, err, secs = timed_extract(backend, pdf_path, stop, check, acc.feed)
+        if doc is None or not doc.text.strip():
+            result = "error" if err else "empty"
+            last_err = err or last_err
+        else:
+            with stage("columns"):
+                columns = acc.rows()
+            with stage("parse"):
+                bs, pl, raw = parse_financials_with_raw(doc.text, columns=columns)
+            missing = missing_statement_keys(raw)
+            result = "missing" if missing else "ok"
+            if best is None or len(missing) < len(best[1]):
+                best = (doc, missing, columns, (doc.text, bs, pl, raw))
+        record_attempt(backend.name, result, secs)
+        attempts.append({"backend": backend.name, "result": result, "ms": round(secs * 1000.0, 1),
+                         "pages_read": doc.pages_read if doc is not None else 0})
+        if result == "ok":
+            break
+    globals()['_AIRM_LAST_PDF'] = {"attempts": attempts,
+                                   "backend": best[0].backend if best else None,
+                                   "missing": best[1] if best else None,
+                                   "column_rows": len(best[2]) if best else 0,
+                                   "pages_read": best[0].pages_read if best else 0}
+    if best is None:
+        raise PdfReadError(f"Nem sikerült beolvasni a PDF-et: {last_err}")
+    _remember_pdf(best[0], best[2])
+    return best[3]
+
+# ---- cégazonosítás (a beszámoló fejlécéből) – elemzések összekapcsolása cégenként / évenként ----
+IDENTITY_HEAD_LINES = 80
+TAX_NUMBER_RE = re.compile(r'Adószám\D{0,20}?(\d{8})-?(\d)-?(\d{2})\b', re.I)
+ANY_TAX_NUMBER_RE = re.compile(r'\b(\d{8})-(\d)-(\d{2})\b')
+STAT_NUMBER_RE = re.compile(r'\b(\d{8})-\d{4}-\d{3}-\d{2}\b')  # statisztikai számjel: törzsszám-TEÁOR-forma-megye
+NAME_LABEL_RE = re.compile(r'(?:megnevezése|cégnév|cég neve)\s*:\s*(.+)', re.I)
+NAME_LEGAL_FORM_RE = re.compile(r'^\s*(\S.{1,100}?\b(?:Kft|Zrt|Nyrt|Bt|Kkt|Rt|Kht)\.?)\s*$', re.I)
+YEAR_RES = (
+    re.compile(r'\b(20\d{2})\.?\s*évi\b', re.I),
+    re.compile(r'fordulónap\w*\D{0,10}(20\d{2})', re.I),
+    re.compile(r'\b(20\d{2})\.?\s*(?:12\.?\s*31|december\s*31)', re.I),
+    re.compile(r'tárgyév\D{0,5}(20\d{2})', re.I),
+)
+
+def company_identity(text: str):
+    """{"tax_number", "reg_id" (8 jegyű törzsszám), "name", "year"} a beszámoló első soraiból; ami nincs meg, None."""
+    head = "\n".join((text or "").splitlines()[:IDENTITY_HEAD_LINES])
+    tax = reg = name = year = None
+    m = TAX_NUMBER_RE.search(head) or ANY_TAX_NUMBER_RE.search(head)
+    if m:
+        tax = f"{m.group(1)}-{m.group(2)}-{m.group(3)}"
+        reg = m.group(1)
+    else:
+        m = STAT_NUMBER_RE.search(head)
+        reg = m.group(1) if m else None
+    for line in head.splitlines():
+        m = NAME_LABEL_RE.search(line) or NAME_LEGAL_FORM_RE.match(line)
+        if m:
+            name = m.group(1).strip()
+            break
+    for rgx in YEAR_RES:
+        m = rgx.search(head)
+        if m:
+            year = int(m.group(1))
+            break
+    return {"tax_number": tax, "reg_id": reg, "name": name, "year": year}
+
+def company_key(identity):
+    """Fájlnév-biztos cégkulcs: "t<törzsszám>" (adószámból / stat. számjelből), különben "n-<cégnév slug>"; ha egyik sincs, None."""
+    if identity.get("reg_id"):
+        return "t" + identity["reg_id"]
+    name = identity.get("name")
+    if not name:
+        return None
+    slug = re.sub(r'[^a-z0-9]+', '-', strip_accents(name).lower()).strip('-')
+    return ("n-" + slug[:80]) if slug else None
+
+def _parse_financials_with_raw(text: str):
     bal, pl = segment_sections(text)
     raw = {"balance": {}, "pl": {}}
-    bs = {}
+    bs = Statement(BS)
     for key, rgx in KEYS_BS:
         info = find_line(bal, rgx)
         raw["balance"][key] = info
         bs[key] = info["current"]
-    plv = {}
+    plv = Statement(PL)
     for key, rgx in KEYS_PL:
         info = find_line(pl, rgx)
         if key == "Értékesítés nettó árbevétele" and (info["current"] is None):
@@ -717,7 +1036,7 @@ def parse_financials_with_raw(text: str):
         cur_sup2, prev_sup2, sup_line2 = get_suppliers_by_label(text)
         if (cur_sup2 is not None) or (prev_sup2 is not None):
             raw['balance']['Szállítók'] = {'line': sup_line2, 'current': cur_sup2, 'previous': prev_sup2}
-            bs['Szállítók'] = cur_sup2 if isinstance(cur_sup2,(int,float)) else (int(str(cur_sup2).replace(' ', '')) if cur_sup2 not in (None,'') else None)
+            bs['Szállítók'] = to_number(cur_sup2, AMOUNT)
     except Exception:
         pass
 
@@ -726,7 +1045,7 @@ def parse_financials_with_raw(text: str):
         cur_sup, prev_sup, sup_line = get_suppliers_from_pdf101(text)
         if (cur_sup is not None) or (prev_sup is not None):
             raw["balance"]["Szállítók"] = {"line": sup_line, "current": cur_sup, "previous": prev_sup}
-            bs["Szállítók"] = cur_sup if isinstance(cur_sup,(int,float)) else (int(str(cur_sup).replace(" ", "")) if cur_sup not in (None,"") else None)
+            bs["Szállítók"] = to_number(cur_sup, AMOUNT)
     except Exception:
         # leave as-is if not found
         pass
@@ -746,7 +1065,7 @@ def parse_financials_with_raw(text: str):
             du_cur, du_prev, du_line = get_trade_payables_dual_universal(text)
             if (du_cur is not None) or (du_prev is not None):
                 raw['balance']['Szállítók'] = {'line': du_line, 'current': du_cur, 'previous': du_prev}
-                bs['Szállítók'] = du_cur if isinstance(du_cur,(int,float)) else (int(str(du_cur).replace(' ', '')) if du_cur not in (None,'') else None)
+                bs['Szállítók'] = to_number(du_cur, AMOUNT)
     except Exception:
         pass
     # --- /Final normalization ---
@@ -764,119 +1083,7 @@ def use_pick_year_columns_marker(headers):
 
 def compute_ratios(bs, pl):
     """Return core KPIs computed from current-year values. Robust to None/tuples/strings."""
-    def to_num(x):
-        if isinstance(x, (int, float)):
-            return x
-        if isinstance(x, str):
-            import re as _re
-            s = _re.sub(r'[^0-9\-]', '', x)
-            try:
-                return int(s) if s not in ('', '-') else None
-            except Exception:
-                return None
-        return None
-
-    def safe_div(a, b):
-        a = to_num(a); b = to_num(b)
-        if a in (None, 0) or b in (None, 0):
-            return None
-        try:
-            return a / b
-        except Exception:
-            return None
-
-    # Normalize inputs
-    CA  = to_num(bs.get('Forgóeszközök'))
-    CL  = to_num(bs.get('Rövid lejáratú kötelezettségek'))
-    INV = to_num(bs.get('Készletek'))
-    TL  = to_num(bs.get('Kötelezettségek összesen'))
-    EQ  = to_num(bs.get('Saját tőke'))
-    REC = to_num(bs.get('Követelések'))
-    NS  = to_num(pl.get('Értékesítés nettó árbevétele'))
-    MAT = to_num(pl.get('Anyagjellegű ráfordítások'))
-    AP  = to_num(bs.get('Szállítók'))
-
-    # KPIs
-    cr = safe_div(CA, CL)
-
-    qr = None
-    if CA is not None and INV is not None and CL not in (None, 0):
-        qr = safe_div(CA - INV, CL)
-
-    dte = safe_div(TL, EQ)
-
-    nwc = None
-    if CA is not None and CL is not None:
-        nwc = CA - CL
-
-    rcv_days = None
-    if NS not in (None, 0) and REC is not None:
-        rcv_days = safe_div(REC, NS)
-        if rcv_days is not None:
-            rcv_days *= 365
-
-    inv_days = None
-    if MAT not in (None, 0) and INV is not None:
-        inv_days = safe_div(INV, MAT)
-        if inv_days is not None:
-            inv_days *= 365
-
-    ap_days = None
-    if MAT not in (None, 0) and AP is not None:
-        ap_days = safe_div(AP, MAT)
-        if ap_days is not None:
-            ap_days *= 365
-
-    # Simple scoring (kept close to previous thresholds)
-    score = 0
-    if cr is not None:
-        if cr >= 1.5: score += 20
-        elif cr >= 1.2: score += 12
-        elif cr >= 1.0: score += 8
-        elif cr >= 0.8: score += 5
-
-    if qr is not None:
-        if qr >= 1.0: score += 20
-        elif qr >= 0.7: score += 12
-        elif qr >= 0.5: score += 6
-
-    if dte is not None:
-        if dte < 0.5: score += 20
-        elif dte < 1.0: score += 14
-        elif dte < 2.0: score += 8
-        elif dte < 3.0: score += 4
-
-    if rcv_days is not None:
-        if rcv_days <= 45: score += 20
-        elif rcv_days <= 60: score += 14
-        elif rcv_days <= 90: score += 8
-        elif rcv_days <= 120: score += 4
-
-    if inv_days is not None:
-        if inv_days <= 60: score += 20
-        elif inv_days <= 90: score += 14
-        elif inv_days <= 120: score += 8
-        elif inv_days <= 150: score += 4
-
-    if ap_days is not None:
-        if ap_days >= 45: score += 20
-        elif ap_days >= 30: score += 14
-        elif ap_days >= 20: score += 8
-        elif ap_days >= 10: score += 4
-
-    rating = "Excellent" if score >= 85 else "Good" if score >= 70 else "Moderate" if score >= 55 else "Weak"
-
-    return {
-        "Current ratio": cr,
-        "Quick ratio": qr,
-        "Debt/Equity": dte,
-        "Nettó forgótőke (eFt)": nwc,
-        "Vevőállomány forgási ideje (nap)": rcv_days,
-        "Készlet forgási ideje (nap)": inv_days,
-        "Szállítói napok (DPO)": ap_days,
-        "Kockázati pontszám (0-100)": score,
-        "Kockázati besorolás": rating
-    }
+    return kpi_ratios(KPI_GRAPH.evaluate(kpi_inputs(bs, pl), RATIO_KEYS))
 # ==== Configurable scoring helpers (no UI change) ====
 import json, os
 
@@ -903,11 +1110,19 @@ def _default_scoring_config():
         }
     }
 
+_SCORING_CONFIG = {"key": None, "cfg": None}
+
 def load_scoring_config():
+    # a fájlt csak változáskor (mtime/méret) olvassuk újra; a visszaadott dict közös, nem módosítandó
     cfg_path = os.path.join(os.path.dirname(__file__), "scoring_config.json")
     try:
-        with open(cfg_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        st = os.stat(cfg_path)
+        key = (st.st_mtime_ns, st.st_size)
+        if _SCORING_CONFIG["key"] != key:
+            with open(cfg_path, "r", encoding="utf-8") as f:
+                _SCORING_CONFIG["cfg"] = json.load(f)
+            _SCORING_CONFIG["key"] = key
+        return _SCORING_CONFIG["cfg"]
     except Exception:
         return _default_scoring_config()
 
@@ -939,103 +1154,292 @@ def safe_div(a,b):
     except Exception:
         return None
 
-def score_from_rules(ratios, bs, pl, derived, sector_text):
-    cfg = load_scoring_config()
-    base = 50.0
-    # Pull key PL/BS
-    revenue = pl.get("Értékesítés nettó árbevétele") or pl.get("Revenue") or 0
-    ebit = pl.get("Üzemi (üzleti) tevékenység eredménye")
-    netp = pl.get("Adózott eredmény")
-    da = pl.get("Értékcsökkenési leírás")
-    ebitda = (ebit + da) if (isinstance(ebit,(int,float)) and isinstance(da,(int,float))) else None
-    interest = pl.get("Fizetett kamat") or pl.get("Pénzügyi műveletek ráfordításai")
-    ic = safe_div(ebit, interest) if (interest and interest>0) else None
-    # Net debt
-    cash = bs.get("Pénzeszközök"); st = bs.get("Rövid lejáratú kötelezettségek"); lt = bs.get("Hosszú lejáratú kötelezettségek")
-    nd = None
-    if isinstance(st,(int,float)) or isinstance(lt,(int,float)) or isinstance(cash,(int,float)):
-        nd = (st or 0) + (lt or 0) - (cash or 0)
-    nd_eb = safe_div(nd, ebitda) if (nd is not None and ebitda and ebitda>0) else None
-    ebit_m = safe_div(ebit, revenue); net_m = safe_div(netp, revenue)
-
-    # Points from bands
-    pts = 0.0; bands = cfg["bands"]
-    if ebit_m is not None: pts += _band_points(bands["ebit_margin"], ebit_m*100.0)
-    if net_m  is not None: pts += _band_points(bands["net_margin"],  net_m*100.0)
-    if derived.get("de")  is not None: pts += _band_points(bands["de"], float(derived["de"]))
-    if nd_eb is not None: pts += _band_points(bands["nd_ebitda"], nd_eb)
-    if ic    is not None: pts += _band_points(bands["ic"], ic)
-
-    # Liquidity nudges (compatible with UI)
-    cr = derived.get("cr"); qr = derived.get("qr")
-    if cr is not None: pts += (4 if cr < (ratios.get("CR_MIN") or 1.2) else (-2 if cr > (ratios.get("CR_GOOD") or 1.5) else 0))
-    if qr is not None: pts += (4 if qr < (ratios.get("QR_MIN") or 1.0) else (-2 if qr > (ratios.get("QR_GOOD") or 1.2) else 0))
-
-    # Working capital cycle vs sector
-    sec_key = sector_key_from_text(sector_text)
-    sb = cfg["sector_benchmarks"].get(sec_key, {"dso":60,"dio":90,"dpo":40,"ccc":60})
-    dso = derived.get("dso"); dio = derived.get("dio"); dpo = derived.get("dpo"); ccc = derived.get("ccc")
-    if dso is not None: pts += (3 if dso > sb["dso"] else 0)
-    if dio is not None: pts += (3 if dio > sb["dio"] else 0)
-    if dpo is not None: pts += (3 if dpo < sb["dpo"] else 0)
+# ==== KPI-függőségi gráf: bemeneti mezők -> mutatók -> sávpontok -> pontszám ====
+# A compute_ratios és a score_from_rules ugyanennek a gráfnak két nézete; egy felülírás (override)
+# után az update_kpis csak az érintett csomópontokat számolja újra (airm_kpigraph.KpiGraph.update).
+KPI_BS_FIELDS = ("Forgóeszközök", "Rövid lejáratú kötelezettségek", "Készletek", "Kötelezettségek összesen",
+                 "Saját tőke", "Követelések", "Szállítók", "Pénzeszközök", "Hosszú lejáratú kötelezettségek")
+KPI_PL_FIELDS = ("Értékesítés nettó árbevétele", "Revenue", "Anyagjellegű ráfordítások",
+                 "Üzemi (üzleti) tevékenység eredménye", "Adózott eredmény", "Értékcsökkenési leírás",
+                 "Fizetett kamat", "Pénzügyi műveletek ráfordításai")
+KPI_LIMITS = ("CR_MIN", "CR_GOOD", "QR_MIN", "QR_GOOD")
+# a Statement-sémák (airm_statement) rögzített mezőindexe ezeket a kulcsokat fedi le
+assert [k for k, _ in KEYS_BS] + ["Szállítók"] == list(BS.fields) and set(KPI_BS_FIELDS) <= set(BS.fields)
+assert [k for k, _ in KEYS_PL] == list(PL.fields[:len(KEYS_PL)]) and set(KPI_PL_FIELDS) <= set(PL.fields)
+RATIO_KEYS = ("Current ratio", "Quick ratio", "Debt/Equity", "Nettó forgótőke (eFt)",
+              "Vevőállomány forgási ideje (nap)", "Készlet forgási ideje (nap)", "Szállítói napok (DPO)",
+              "Kockázati pontszám (0-100)", "Kockázati besorolás")
+
+KPI_GRAPH = KpiGraph()
+KPI_GRAPH.input(*("bs." + k for k in KPI_BS_FIELDS), *("pl." + k for k in KPI_PL_FIELDS),
+                *("limits." + k for k in KPI_LIMITS), "sector", "scoring_config")
+_kpi = KPI_GRAPH.node
+
+def _ratio_num(x):
+    return to_number(x, AMOUNT)
+
+def _ratio_div(a, b):
+    a = _ratio_num(a); b = _ratio_num(b)
+    if a in (None, 0) or b in (None, 0):
+        return None
+    try:
+        return a / b
+    except Exception:
+        return None
+
+def _days(a, b):
+    if b in (None, 0) or a is None:
+        return None
+    d = _ratio_div(a, b)
+    return d * 365 if d is not None else None
+
+# -- normalizált bemenetek (compute_ratios) --
+for _alias, _field in (("CA", "bs.Forgóeszközök"), ("CL", "bs.Rövid lejáratú kötelezettségek"),
+                       ("INV", "bs.Készletek"), ("TL", "bs.Kötelezettségek összesen"), ("EQ", "bs.Saját tőke"),
+                       ("REC", "bs.Követelések"), ("NS", "pl.Értékesítés nettó árbevétele"),
+                       ("MAT", "pl.Anyagjellegű ráfordítások"), ("AP", "bs.Szállítók")):
+    _kpi(_alias, _field)(_ratio_num)
+
+# -- mutatók --
+_kpi("Current ratio", "CA", "CL")(_ratio_div)
+
+@_kpi("Quick ratio", "CA", "INV", "CL")
+def _kpi_quick(ca, inv, cl):
+    if ca is not None and inv is not None and cl not in (None, 0):
+        return _ratio_div(ca - inv, cl)
+    return None
+
+_kpi("Debt/Equity", "TL", "EQ")(_ratio_div)
+
+@_kpi("Nettó forgótőke (eFt)", "CA", "CL")
+def _kpi_nwc(ca, cl):
+    return ca - cl if ca is not None and cl is not None else None
+
+_kpi("Vevőállomány forgási ideje (nap)", "REC", "NS")(_days)
+_kpi("Készlet forgási ideje (nap)", "INV", "MAT")(_days)
+_kpi("Szállítói napok (DPO)", "AP", "MAT")(_days)
+
+@_kpi("Kockázati pontszám (0-100)", "Current ratio", "Quick ratio", "Debt/Equity",
+      "Vevőállomány forgási ideje (nap)", "Készlet forgási ideje (nap)", "Szállítói napok (DPO)")
+def _kpi_legacy_score(cr, qr, dte, rcv_days, inv_days, ap_days):
+    # Simple scoring (kept close to previous thresholds)
+    score = 0
+    if cr is not None:
+        if cr >= 1.5: score += 20
+        elif cr >= 1.2: score += 12
+        elif cr >= 1.0: score += 8
+        elif cr >= 0.8: score += 5
+
+    if qr is not None:
+        if qr >= 1.0: score += 20
+        elif qr >= 0.7: score += 12
+        elif qr >= 0.5: score += 6
+
+    if dte is not None:
+        if dte < 0.5: score += 20
+        elif dte < 1.0: score += 14
+        elif dte < 2.0: score += 8
+        elif dte < 3.0: score += 4
+
+    if rcv_days is not None:
+        if rcv_days <= 45: score += 20
+        elif rcv_days <= 60: score += 14
+        elif rcv_days <= 90: score += 8
+        elif rcv_days <= 120: score += 4
+
+    if inv_days is not None:
+        if inv_days <= 60: score += 20
+        elif inv_days <= 90: score += 14
+        elif inv_days <= 120: score += 8
+        elif inv_days <= 150: score += 4
+
+    if ap_days is not None:
+        if ap_days >= 45: score += 20
+        elif ap_days >= 30: score += 14
+        elif ap_days >= 20: score += 8
+        elif ap_days >= 10: score += 4
+    return score
+
+@_kpi("Kockázati besorolás", "Kockázati pontszám (0-100)")
+def _kpi_rating(score):
+    return "Excellent" if score >= 85 else "Good" if score >= 70 else "Moderate" if score >= 55 else "Weak"
+
+# -- score_from_rules: származtatott értékek (a make_docx ugyanígy képzi őket a mutatókból) --
+for _d, _src in (("cr", "Current ratio"), ("qr", "Quick ratio"), ("de", "Debt/Equity"),
+                 ("dso", "Vevőállomány forgási ideje (nap)"), ("dio", "Készlet forgási ideje (nap)"),
+                 ("dpo", "Szállítói napok (DPO)")):
+    _kpi("derived." + _d, _src)(lambda v: v)
+
+@_kpi("derived.ccc", "derived.dso", "derived.dio", "derived.dpo")
+def _kpi_ccc(dso, dio, dpo):
+    return (dso + dio - dpo) if all(isinstance(x, (int, float)) for x in (dso, dio, dpo)) else None
+
+@_kpi("revenue", "pl.Értékesítés nettó árbevétele", "pl.Revenue")
+def _kpi_revenue(ns, rev):
+    return ns or rev or 0
+
+@_kpi("ebitda", "pl.Üzemi (üzleti) tevékenység eredménye", "pl.Értékcsökkenési leírás")
+def _kpi_ebitda(ebit, da):
+    return (ebit + da) if (isinstance(ebit, (int, float)) and isinstance(da, (int, float))) else None
+
+@_kpi("interest", "pl.Fizetett kamat", "pl.Pénzügyi műveletek ráfordításai")
+def _kpi_interest(paid, fin):
+    return paid or fin
+
+@_kpi("ic", "pl.Üzemi (üzleti) tevékenység eredménye", "interest")
+def _kpi_ic(ebit, interest):
+    return safe_div(ebit, interest) if (interest and interest > 0) else None
+
+@_kpi("net_debt", "bs.Pénzeszközök", "bs.Rövid lejáratú kötelezettségek", "bs.Hosszú lejáratú kötelezettségek")
+def _kpi_net_debt(cash, st, lt):
+    if isinstance(st, (int, float)) or isinstance(lt, (int, float)) or isinstance(cash, (int, float)):
+        return (st or 0) + (lt or 0) - (cash or 0)
+    return None
+
+@_kpi("nd_ebitda", "net_debt", "ebitda")
+def _kpi_nd_ebitda(nd, ebitda):
+    return safe_div(nd, ebitda) if (nd is not None and ebitda and ebitda > 0) else None
+
+_kpi("ebit_margin", "pl.Üzemi (üzleti) tevékenység eredménye", "revenue")(safe_div)
+_kpi("net_margin", "pl.Adózott eredmény", "revenue")(safe_div)
+
+# -- sávpontok --
+def _band_node(band, scale=1.0):
+    def pts(cfg, v):
+        return _band_points(cfg["bands"][band], float(v) * scale) if v is not None else 0
+    return pts
+
+_kpi("pts.ebit_margin", "scoring_config", "ebit_margin")(_band_node("ebit_margin", 100.0))
+_kpi("pts.net_margin", "scoring_config", "net_margin")(_band_node("net_margin", 100.0))
+_kpi("pts.de", "scoring_config", "derived.de")(_band_node("de"))
+_kpi("pts.nd_ebitda", "scoring_config", "nd_ebitda")(_band_node("nd_ebitda"))
+_kpi("pts.ic", "scoring_config", "ic")(_band_node("ic"))
+
+# Liquidity nudges (compatible with UI)
+@_kpi("pts.cr", "derived.cr", "limits.CR_MIN", "limits.CR_GOOD")
+def _kpi_pts_cr(cr, lo, good):
+    return 0 if cr is None else (4 if cr < (lo or 1.2) else (-2 if cr > (good or 1.5) else 0))
+
+@_kpi("pts.qr", "derived.qr", "limits.QR_MIN", "limits.QR_GOOD")
+def _kpi_pts_qr(qr, lo, good):
+    return 0 if qr is None else (4 if qr < (lo or 1.0) else (-2 if qr > (good or 1.2) else 0))
+
+# Working capital cycle vs sector
+@_kpi("sector_benchmark", "scoring_config", "sector")
+def _kpi_sector_benchmark(cfg, sector_text):
+    return cfg["sector_benchmarks"].get(sector_key_from_text(sector_text), {"dso":60,"dio":90,"dpo":40,"ccc":60})
+
+@_kpi("pts.dso", "derived.dso", "sector_benchmark")
+def _kpi_pts_dso(dso, sb):
+    return 3 if dso is not None and dso > sb["dso"] else 0
+
+@_kpi("pts.dio", "derived.dio", "sector_benchmark")
+def _kpi_pts_dio(dio, sb):
+    return 3 if dio is not None and dio > sb["dio"] else 0
+
+@_kpi("pts.dpo", "derived.dpo", "sector_benchmark")
+def _kpi_pts_dpo(dpo, sb):
+    return 3 if dpo is not None and dpo < sb["dpo"] else 0
+
+@_kpi("pts.ccc", "scoring_config", "derived.ccc")
+def _kpi_pts_ccc(cfg, ccc):
     if ccc is not None:
         for thr, add in cfg["guards"]["ccc_bonus"]:
-            if ccc <= thr: pts += add; break
+            if ccc <= thr: return add
+    return 0
 
-    # Guards
+# Guards
+@_kpi("pts.loss", "scoring_config", "pl.Üzemi (üzleti) tevékenység eredménye", "pl.Adózott eredmény")
+def _kpi_pts_loss(cfg, ebit, netp):
     if isinstance(ebit,(int,float)) and ebit < 0 and isinstance(netp,(int,float)) and netp < 0:
-        pts += cfg["guards"]["loss_both"]
-    elif (isinstance(ebit,(int,float)) and ebit < 0) or (isinstance(netp,(int,float)) and netp < 0):
-        pts += cfg["guards"]["loss_one"]
-
-    # Size bonus (revenue in eFt)
+        return cfg["guards"]["loss_both"]
+    if (isinstance(ebit,(int,float)) and ebit < 0) or (isinstance(netp,(int,float)) and netp < 0):
+        return cfg["guards"]["loss_one"]
+    return 0
+
+# Size bonus (revenue in eFt) – levonás
+@_kpi("pts.size", "scoring_config", "revenue")
+def _kpi_pts_size(cfg, revenue):
     rev_eFt = revenue if isinstance(revenue,(int,float)) else 0
     last_bonus = 0
     for thr, bonus in cfg["guards"]["size_bonus_eFt"]:
-        if rev_eFt <= thr: pts -= bonus; break
+        if rev_eFt <= thr: return bonus
         last_bonus = bonus
-    else:
-        pts -= last_bonus
-
-    score = base + pts
+    return last_bonus
+
+SCORE_POINTS = ("pts.ebit_margin", "pts.net_margin", "pts.de", "pts.nd_ebitda", "pts.ic", "pts.cr", "pts.qr",
+                "pts.dso", "pts.dio", "pts.dpo", "pts.ccc", "pts.loss")
+
+@_kpi("score", *SCORE_POINTS, "pts.size")
+def _kpi_score(*pts_and_size):
+    pts = 0.0
+    for p in pts_and_size[:-1]:  # a sorrend a régi összegzésé (lebegőpontos egyezés)
+        pts += p
+    pts -= pts_and_size[-1]
+    score = 50.0 + pts
     if score < 0: score = 0.0
     if score > 100: score = 100.0
     return round(score,1)
-# ==== End scoring helpers ====
-def _safe_to_num(x):
-    try:
-        if x is None: return None
-        if isinstance(x,(int,float)): return float(x)
-        # strip spaces and non-breaking spaces, thousands separators
-        s = str(x).replace("\xa0"," ").replace(" "," ").replace(" "," ").strip()
-        s = s.replace(".", " ").replace(",", " ").replace("\u2212","-").replace("\u2012","-").replace("\u2013","-").replace("\u2014","-")
-        s = " ".join(s.split())
-        toks = [t for t in s.split(" ") if any(ch.isdigit() for ch in t) or t in ("-","+")]
-        if not toks: return None
-        s2 = "".join(toks)
-        return float(int(s2))
-    except Exception:
-        return None
 
+def kpi_inputs(bs, pl, sector=None, ratios=None):
+    """A gráf bemenetei egy elemzésből (a limits.* a ratios CR_MIN/CR_GOOD/QR_MIN/QR_GOOD kulcsai, ha vannak)."""
+    values = {"bs." + k: bs.get(k) for k in KPI_BS_FIELDS}
+    values.update(("pl." + k, pl.get(k)) for k in KPI_PL_FIELDS)
+    ratios = ratios or {}
+    values.update(("limits." + k, ratios.get(k)) for k in KPI_LIMITS)
+    values["sector"] = sector
+    values["scoring_config"] = load_scoring_config()
+    return values
+
+def evaluate_kpis(bs, pl, sector=None):
+    """Minden csomópont értéke (mutatók, sávpontok, score) – ezt érdemes egy elemzéshez eltenni."""
+    return KPI_GRAPH.evaluate(kpi_inputs(bs, pl, sector))
+
+def update_kpis(values, bs, pl, sector=None):
+    """Növekményes újraszámolás az evaluate_kpis eredményéből: (új értékek, megváltozott nevek, újraszámolt db)."""
+    return KPI_GRAPH.update(values, kpi_inputs(bs, pl, sector))
+
+def kpi_ratios(values):
+    """A compute_ratios-szal azonos dict a gráf értékeiből."""
+    return {k: values[k] for k in RATIO_KEYS}
+
+def evaluate_scenarios(values, scenarios, outputs=RATIO_KEYS + ("score",)):
+    """What-if: forgatókönyvenként ({"bs.Készletek": 120, ...}) az outputs értékei, egy batch-hívásban."""
+    return KPI_GRAPH.batch(values, scenarios, outputs)
+
+def evaluate_grid(values, axes, outputs=RATIO_KEYS + ("score",)):
+    """What-if rács: axes = [("pl.Értékesítés nettó árbevétele", [értékek]), ...] -> soronként az outputs
+    (itertools.product sorrendben)."""
+    return KPI_GRAPH.grid(values, axes, outputs)
+
+def score_from_rules(ratios, bs, pl, derived, sector_text):
+    values = kpi_inputs(bs, pl, sector_text, ratios)
+    values.update(("derived." + k, derived.get(k)) for k in ("cr", "qr", "de", "dso", "dio", "dpo", "ccc"))
+    return KPI_GRAPH.evaluate(values, ("score",))["score"]
+# ==== End scoring helpers ====
 def _first_present(dct, keys):
+    if isinstance(dct, Statement): return dct.first(keys)
     if not isinstance(dct, dict): return None
     for k in keys:
-        if k in dct and _safe_to_num(dct.get(k)) is not None:
-            return _safe_to_num(dct.get(k))
+        v = to_number(dct.get(k), AMOUNT) if k in dct else None
+        if v is not None:
+            return float(v)
     return None
 
 def build_cf_section(doc, lang_code: str, bs_curr, bs_prev, pl_curr):
     from docx.enum.table import WD_TABLE_ALIGNMENT
     try:
         def _num(x):
-            try:
-                if x is None: return None
-                if isinstance(x,(int,float)): return float(x)
-                s = str(x).replace("\xa0","").replace(" ","").replace(",","").replace(".","")
-                if s in ("", "-", "—"): return None
-                return float(int(s))
-            except: return None
+            if x.__class__ is str:  # gyors út: tagolt egész ('-1 234 567', '1.234'), a mag hívása nélkül
+                s = x.replace(" ", "").replace(".", "")
+                if s.isdecimal() or (x[:1] == "-" and s[1:].isdecimal()):
+                    return float(s)
+            elif isinstance(x, (int, float)):
+                return float(x)
+            v = to_number(x, AMOUNT)
+            return None if v is None else float(v)
         def _first(dct, keys):
+            if isinstance(dct, Statement): return dct.first(keys)
             if not isinstance(dct, dict): return None
             for k in keys:
                 if k in dct:
@@ -1280,8 +1684,13 @@ def build_cf_section(doc, lang_code: str, bs_curr, bs_prev, pl_curr):
         except: pass
         return False
 
-def make_docx(company_name, bs, pl, ratios, out_path: Path, sector='default', lang='hu', prev=None, raw=None):
+def _no_stage(name):
+    return contextlib.nullcontext()
+
+def make_docx(company_name, bs, pl, ratios, out_path: Path, sector='default', lang='hu', prev=None, raw=None, timer=None):
     # Final design as agreed (HU/EN mirror, merged 2/a+3/b table, per-KPI method rows)
+    # out_path: fájl útvonal vagy írható bináris stream (pl. io.BytesIO – lemez nélkül); a kész Document-et adja vissza
+    stage = timer.stage if timer is not None else _no_stage
     from pathlib import Path as _Path
     from docx import Document
     from docx.shared import RGBColor, Pt
@@ -1294,15 +1703,6 @@ def make_docx(company_name, bs, pl, ratios, out_path: Path, sector='default', la
             # fallback simple: numbers in line -> first is prev, last is current
             import re
             nums = _extract_grouped_numbers(line or '')
-            def _to_int(tok):
-                if not tok: return None
-                neg = tok.strip().startswith('(') and tok.strip().endswith(')')
-                tok = tok.strip().strip('()').replace(' ', '')
-                try:
-                    v = int(tok)
-                    return -v if neg else v
-                except:
-                    return None
             if not nums:
                 return None, None
             pv = nums[0] if isinstance(nums[0], int) else None; cv = nums[-1] if isinstance(nums[-1], int) else None
@@ -1392,7 +1792,8 @@ def make_docx(company_name, bs, pl, ratios, out_path: Path, sector='default', la
 
     derived = {"cr":cr,"qr":qr,"de":dte,"dso":dso,"dio":dio,"dpo":dpo,"ccc":ccc}
     try:
-        score = score_from_rules(ratios, bs, pl, derived, sector)
+        with stage("score"):
+            score = score_from_rules(ratios, bs, pl, derived, sector)
     except Exception:
         score = ratios.get("Kockázati pontszám (0-100)")
 
@@ -1666,17 +2067,23 @@ def make_docx(company_name, bs, pl, ratios, out_path: Path, sector='default', la
                     doc.add_heading("5) Appendices / Notes", level=1)
                     doc.add_paragraph("—")
     # ---- assemble document according to language ----
-    doc = Document()
-    to_build = ["hu","en"] if (lang in ("both","Both","HU+EN","hu+en")) else ([lang] if lang in ("hu","en") else ["hu"])
-    first=True
-    for L in to_build:
-        if not first: doc.add_page_break()
-        build_section(doc, L, wcn, nwc)
-        first=False
-
-    out_path = _Path(out_path)
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    doc.save(str(out_path))
+    with stage("docx_build"):
+        doc = Document()
+        to_build = ["hu","en"] if (lang in ("both","Both","HU+EN","hu+en")) else ([lang] if lang in ("hu","en") else ["hu"])
+        first=True
+        for L in to_build:
+            if not first: doc.add_page_break()
+            build_section(doc, L, wcn, nwc)
+            first=False
+
+    with stage("docx_save"):
+        if hasattr(out_path, "write"):
+            doc.save(out_path)
+        else:
+            out_path = _Path(out_path)
+            out_path.parent.mkdir(parents=True, exist_ok=True)
+            doc.save(str(out_path))
+    return doc
 
 def _rating_color(val, metric, sector_cfg):
     t = sector_cfg["targets"]
@@ -1703,35 +2110,64 @@ def _rating_color(val, metric, sector_cfg):
         return ("OK" if ok else "FIGYELEM", "00AA00" if strong else ("55AA55" if ok else "CC0000"), target)
     return ("OK", "000000", "")
 
-def process_file(pdf_path: Path, out_dir: Path, overrides=None, sector='default', lang='hu'):
-    text = read_pdf_text(pdf_path)
-    bs, pl, raw = parse_financials_with_raw(text)
+def apply_overrides(bs, pl, prev_bs, prev_pl, overrides):
+    """Kézi felülírások ({"bs"|"pl"|"bs_prev"|"pl_prev": {mező: érték}}) helyben; a nem szám értékek kimaradnak."""
+    if not overrides:
+        return
+    for sec, target in (("bs", bs), ("pl", pl), ("bs_prev", prev_bs), ("pl_prev", prev_pl)):
+        for k,v in overrides.get(sec, {}).items():
+            n = to_number(v, AMOUNT)
+            if n is not None:
+                target[k] = int(n)
+
+def previous_year(raw):
+    """Előző évi bs/pl (Statement) a raw-ból (KEYS_BS / KEYS_PL kulcsokkal)."""
+    prev_bs = Statement(BS, {k: raw.get('balance',{}).get(k,{}).get('previous') for k,_ in KEYS_BS})
+    prev_pl = Statement(PL, {k: (raw.get("pl",{}).get(k,{}).get("previous")) for k,_ in KEYS_PL})
+    return prev_bs, prev_pl
+
+def process_file(pdf_path: Path, out_dir: Path, overrides=None, sector='default', lang='hu', timer=None, parsed=None,
+                 persist=True):
+    # timer: opcionális lépésidő-mérő (.stage(name) context manager, .meta dict, ha van: .check() oldalanként)
+    #        – lásd airm_module/timing.py
+    # parsed: egy korábbi read_and_parse eredménye (text, bs, pl, raw) – ilyenkor a PDF-et nem olvassuk újra
+    # persist=False: a DOCX memóriába renderelődik ("docx_bytes", "document"; "docx" None), out_dir-be nem ír
+    # a parse és a DOCX ugyanazt a sor-memót használja (statisztika: _AIRM_LAST_LINE_MEMO)
+    with line_memo():
+        return _process_file(pdf_path, out_dir, overrides, sector, lang, timer, parsed, persist)
+
+def _process_file(pdf_path: Path, out_dir: Path, overrides=None, sector='default', lang='hu', timer=None, parsed=None,
+                  persist=True):
+    stage = timer.stage if timer is not None else _no_stage
+    if parsed is None:
+        text, bs, pl, raw = read_and_parse(pdf_path, stage, check=getattr(timer, "check", None))
+        if timer is not None:
+            timer.meta["pdf_pages"] = globals().get('_AIRM_LAST_PAGES')
+    else:
+        text, bs, pl, raw = parsed
+        bs, pl = bs.copy(), pl.copy()  # a felülírás nem írhatja a hívó (cache) példányát
+    if timer is not None:
+        timer.meta["pdf_bytes"] = Path(pdf_path).stat().st_size
     # Build previous-year dicts from raw
-    prev_bs = {k: raw.get('balance',{}).get(k,{}).get('previous') for k,_ in KEYS_BS}
-    prev_pl = {k: (raw.get("pl",{}).get(k,{}).get("previous")) for k,_ in KEYS_PL}
-    if overrides:
-        for k,v in overrides.get("bs", {}).items():
-            if v not in ("", None):
-                try: bs[k] = int(v)
-                except: pass
-        for k,v in overrides.get("pl", {}).items():
-            if v not in ("", None):
-                try: pl[k] = int(v)
-                except: pass
-        for k,v in overrides.get("bs_prev", {}).items():
-            if v not in ("", None):
-                try: prev_bs[k] = int(v)
-                except: pass
-        for k,v in overrides.get("pl_prev", {}).items():
-            if v not in ("", None):
-                try: prev_pl[k] = int(v)
-                except: pass
-    ratios = compute_ratios(bs, pl)
+    prev_bs, prev_pl = previous_year(raw)
+    apply_overrides(bs, pl, prev_bs, prev_pl, overrides)
+    with stage("ratios"):
+        ratios = compute_ratios(bs, pl)
     company_name = pdf_path.stem
+    docx_name = f"AIRM_{pdf_path.stem}_riport.docx"
+    res = {"company": company_name, "bs": bs, "pl": pl, "ratios": ratios, "raw": raw, "docx_name": docx_name}
+    if not persist:
+        buf = io.BytesIO()
+        res["document"] = make_docx(company_name, bs, pl, ratios, buf, sector=sector, lang=lang,
+                                    prev={'bs': prev_bs, 'pl': prev_pl}, raw=raw, timer=timer)
+        res["docx_bytes"] = buf.getvalue()
+        res["docx"] = None
+        return res
     out_dir.mkdir(parents=True, exist_ok=True)
-    out_docx = out_dir / f"AIRM_{pdf_path.stem}_riport.docx"
-    make_docx(company_name, bs, pl, ratios, out_docx, sector=sector, lang=lang, prev={'bs': prev_bs, 'pl': prev_pl}, raw=raw)
-    return {"company": company_name, "bs": bs, "pl": pl, "ratios": ratios, "raw": raw, "docx": str(out_docx)}
+    out_docx = out_dir / docx_name
+    make_docx(company_name, bs, pl, ratios, out_docx, sector=sector, lang=lang, prev={'bs': prev_bs, 'pl': prev_pl}, raw=raw, timer=timer)
+    res["docx"] = str(out_docx)
+    return res
 
 def cli():
     import argparse
@@ -1751,7 +2187,7 @@ def cli():
         ov = overrides_map.get(Path(p).name) if overrides_map else None
         res = process_file(Path(p), out_dir, overrides=ov, sector=args.sector)
         results.append(res)
-    print(json.dumps(results, ensure_ascii=False, indent=2))
+    print(json.dumps(results, ensure_ascii=False, indent=2, default=dict))  # bs/pl: Statement
 
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] != "--gui":
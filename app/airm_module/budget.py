@@ -0,0 +1,172 @@
+# app/airm_module/budget.py — kérésenkénti és lépésenkénti időkeret, kooperatív megszakítás
+"""
+A nehéz végpontok (limits.heavy_slot) kérésenként egy Budget-et kapnak a StageTimer-en:
+- kérés-keret: AIRM_REQUEST_BUDGET_S (alapból 60 mp a kérés kezdetétől, a feltöltést és a sorban állást is
+  beleértve; 0 = nincs),
+- lépés-keretek: AIRM_STAGE_BUDGETS="read_pdf=30,parse=15,docx_build=20" (lépésenként, egy futásra),
+- bontott kapcsolat: a limits.heavy_slot figyeli (http.disconnect), és beállítja a disconnected jelzőt.
+
+Ellenőrzés kooperatívan: minden lépés elején és végén (StageTimer.stage), a PDF-kinyerésben oldalanként
+(StageTimer.check -> airm_pdftext). Túllépéskor BudgetExceeded (airm_pdftext.Cancelled): a kinyerés leáll,
+a PDF lezárul, a végpont eldobja a részeredményt (a /preview a feltöltött fájlt is), a válasz 504
+(időkeret) vagy 499 (a kliens bontott). Egyszer túllépve minden további ellenőrzés is dob (a motor néhány
+`except:` ága ne nyelhesse el végleg).
+
+Metrikák: airm_budget_exceeded_total{route_class, stage, reason} és időtúllépésnél a PDF tartalom-hash-ével
+airm_budget_exceeded_pdf_total{pdf, reason} (processzenként legfeljebb PDF_LABELS_MAX különböző hash, a
+többi pdf="other"); a timing logsorban budget_exceeded = {reason, stage, elapsed_ms, pdf}.
+"""
+import hashlib
+import math
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+try:
+    from . import metrics
+    from .timing import current_timer
+except ImportError:  # közvetlen futtatás az airm_module mappából
+    import metrics
+    from timing import current_timer
+
+AIRM_DIR = Path(__file__).parent.resolve() / "airm_src"
+if str(AIRM_DIR) not in sys.path:
+    sys.path.insert(0, str(AIRM_DIR))
+from airm_pdftext import Cancelled  # noqa: E402
+
+REQUEST_BUDGET_S = float(os.environ.get("AIRM_REQUEST_BUDGET_S", "60"))
+DEFAULT_STAGE_BUDGETS = "read_pdf=30,parse=15,docx_build=20"
+PDF_LABELS_MAX = 200
+
+EXCEEDED = metrics.REGISTRY.counter("airm_budget_exceeded_total",
+                                    "Heavy requests cancelled by stage and reason (request_timeout/stage_timeout/disconnect)")
+EXCEEDED_PDF = metrics.REGISTRY.counter("airm_budget_exceeded_pdf_total",
+                                        "Timed-out heavy requests by PDF content hash (bounded per worker)")
+_pdf_labels: set = set()
+
+
+def parse_stage_budgets(spec: str) -> Dict[str, float]:
+    """"read_pdf=30,parse=15" -> {"read_pdf": 30.0, "parse": 15.0}; a 0 / hibás értékű lépésnek nincs kerete."""
+    out = {}
+    for part in (spec or "").split(","):
+        name, _, secs = part.partition("=")
+        try:
+            value = float(secs)
+        except ValueError:
+            continue
+        if name.strip() and value > 0:
+            out[name.strip()] = value
+    return out
+
+
+STAGE_BUDGETS = parse_stage_budgets(os.environ.get("AIRM_STAGE_BUDGETS", DEFAULT_STAGE_BUDGETS))
+
+
+class BudgetExceeded(Cancelled):
+    """reason: request_timeout | stage_timeout | disconnect; stage: ahol észrevettük (ill. ami túlfutott)."""
+
+    def __init__(self, reason: str, stage: str, elapsed_s: float):
+        super().__init__(f"{reason} ({stage}, {elapsed_s:.1f} s)")
+        self.reason = reason
+        self.stage = stage
+        self.elapsed_s = elapsed_s
+
+
+class Budget:
+    __slots__ = ("t0", "deadline", "stage_budgets", "stack", "disconnected", "exceeded", "route_class")
+
+    def __init__(self, t0: float, request_s: float = REQUEST_BUDGET_S,
+                 stage_budgets: Optional[Dict[str, float]] = None, route_class: str = ""):
+        self.t0 = t0
+        self.deadline = t0 + request_s if request_s > 0 else math.inf
+        self.stage_budgets = STAGE_BUDGETS if stage_budgets is None else stage_budgets
+        self.stack: List[Tuple[str, float]] = []   # (lépés, határidő) – a lépések egymásba ágyazódhatnak
+        self.disconnected = False                   # az event loop szálából állítja a limits.heavy_slot
+        self.exceeded: Optional[Tuple[str, str]] = None
+        self.route_class = route_class
+
+    def remaining(self) -> float:
+        return self.deadline - time.perf_counter()
+
+    def enter(self, name: str):
+        self.check(name)
+        limit = self.stage_budgets.get(name)
+        self.stack.append((name, time.perf_counter() + limit if limit else math.inf))
+
+    def leave(self, name: str):
+        if not self.stack:
+            return
+        stage, deadline = self.stack.pop()
+        if self.exceeded is None and time.perf_counter() > deadline:
+            self.exceeded = ("stage_timeout", stage)
+
+    def check(self, next_stage: Optional[str] = None):
+        now = time.perf_counter()
+        if self.exceeded is None:
+            current = self.stack[-1][0] if self.stack else (next_stage or "")
+            if self.disconnected:
+                self.exceeded = ("disconnect", current)
+            elif now > self.deadline:
+                self.exceeded = ("request_timeout", current)
+            else:
+                for stage, deadline in reversed(self.stack):
+                    if now > deadline:
+                        self.exceeded = ("stage_timeout", stage)
+                        break
+        if self.exceeded is not None:
+            raise BudgetExceeded(self.exceeded[0], self.exceeded[1], now - self.t0)
+
+
+def content_digest(path) -> str:
+    """A fájl tartalmának hash-e (a feltöltési név nélkül: ugyanaz a PDF mindig ugyanazt adja)."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def pdf_digest(state: Dict[str, object]) -> Optional[str]:
+    """A kérés PDF-jének tartalom-hash-e: timer.state["pdf_digest"] (ha a végpont már eltette, pl. a fájl
+    törlése előtt), különben timer.state["pdf_path"]-ból."""
+    digest = state.get("pdf_digest")
+    if digest is None and state.get("pdf_path") is not None:
+        try:
+            digest = state["pdf_digest"] = content_digest(state["pdf_path"])
+        except OSError:
+            return None
+    return digest
+
+
+def _pdf_label(digest: str) -> str:
+    if digest not in _pdf_labels and len(_pdf_labels) >= PDF_LABELS_MAX:
+        return "other"
+    _pdf_labels.add(digest)
+    return digest
+
+
+def record(exc: BudgetExceeded, route_class: str, digest: Optional[str] = None) -> Dict[str, object]:
+    """Metrika + a timing logsor budget_exceeded mezője; időtúllépésnél a PDF tartalom-hash-ével."""
+    EXCEEDED.inc(route_class=route_class, stage=exc.stage, reason=exc.reason)
+    info: Dict[str, object] = {"reason": exc.reason, "stage": exc.stage, "elapsed_ms": round(exc.elapsed_s * 1000.0, 1)}
+    if digest and exc.reason != "disconnect":
+        EXCEEDED_PDF.inc(pdf=_pdf_label(digest), reason=exc.reason)
+        info["pdf"] = digest
+    current_timer().meta["budget_exceeded"] = info
+    return info
+
+
+async def exceeded_handler(request: Request, exc: BudgetExceeded):
+    """FastAPI exception handler: 504 (időkeret) / 499 (a kliens bontott – a választ már senki nem olvassa)."""
+    timer = current_timer()
+    budget = timer.state.get("budget")
+    digest = pdf_digest(timer.state) if exc.reason != "disconnect" else None
+    info = record(exc, budget.route_class if budget is not None else "", digest)
+    if exc.reason == "disconnect":
+        return JSONResponse({"detail": "A kliens bontotta a kapcsolatot."}, status_code=499)
+    return JSONResponse({"detail": "Az elemzés túllépte az időkeretet.", **info}, status_code=504)
@@ -0,0 +1,181 @@
+# app/airm_module/export.py — portfólió-export: minden tárolt elemzés értékekkel, mutatókkal, pontszámmal, döntéssel
+"""
+A store.py elemzéseiből soronként egy elemzés, CSV-ként vagy JSONL-ként, generátorral (a válasz / fájl darabonként
+készül, a memória nem nő az elemzések számával): a (felülírt) tárgyévi és előző évi bs/pl, a mutatók és a
+pontszám a motor KPI-gráfjából (CHUNK elemzésenként egy batch-hívás), risk_score + döntés a /recalc_kpis
+szabályával, és a scoring_config / motor verziója.
+
+Szűrők: since / until (az elemzés utolsó frissítése, ISO dátum vagy időpont, UTC), sector, min_score / max_score.
+Folytatás: minden sor `cursor` mezője ("<cégkulcs>/<fájltő>"); after=<az utolsó átvett cursor> az utána
+következőktől folytat (a sorrend cégkulcs, majd fájlnév szerinti, így a megszakadt export ott folytatható).
+"""
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from . import store
+except ImportError:  # közvetlen futtatás az airm_module mappából
+    import store
+
+CHUNK = 256
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "jsonl": "application/x-ndjson"}
+META_COLUMNS = ("cursor", "company_key", "company_name", "tax_number", "saved_pdf", "year", "sector",
+                "parsed_at", "updated_at")
+TAIL_COLUMNS = ("score", "risk_score", "decision", "decision_code", "overrides", "config_version", "engine_version")
+SECTIONS = ("bs", "pl", "bs_prev", "pl_prev")
+
+
+class ExportError(ValueError):
+    pass
+
+
+def parse_time(value: Optional[str], end: bool = False) -> Optional[float]:
+    """ISO dátum / időpont -> unix idő (időzóna nélkül UTC); end=True és puszta dátum: a nap vége (until)."""
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        raise ExportError(f"Hibás dátum: {value!r} (ISO formátum kell, pl. 2025-01-31)")
+    if end and len(value.strip()) == 10:
+        dt += timedelta(days=1)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _iso(ts) -> Optional[str]:
+    if not isinstance(ts, (int, float)):
+        return None
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+
+
+class Filters:
+    __slots__ = ("since", "until", "sector", "min_score", "max_score")
+
+    def __init__(self, since: Optional[str] = None, until: Optional[str] = None, sector: Optional[str] = None,
+                 min_score: Optional[float] = None, max_score: Optional[float] = None):
+        self.since = parse_time(since)
+        self.until = parse_time(until, end=True)
+        self.sector = sector or None
+        self.min_score = min_score
+        self.max_score = max_score
+
+    def record(self, record: Dict[str, Any]) -> bool:
+        ts = record.get("updated_at") or 0
+        if self.since is not None and ts < self.since:
+            return False
+        if self.until is not None and ts >= self.until:
+            return False
+        return self.sector is None or (record.get("sector") or "default") == self.sector
+
+    def score(self, score) -> bool:
+        if self.min_score is None and self.max_score is None:
+            return True
+        if not isinstance(score, (int, float)):
+            return False
+        return (self.min_score is None or score >= self.min_score) and (self.max_score is None or score <= self.max_score)
+
+
+def kpi_names(engine) -> Tuple[str, ...]:
+    return tuple(k for k in engine.RATIO_KEYS if k != "Kockázati besorolás")
+
+
+def field_names(engine) -> Dict[str, List[str]]:
+    """A CSV oszlopai szekciónként: a motor kulcssorai + a KPI-bemenetek (a JSONL minden tárolt mezőt visz)."""
+    bs = list(dict.fromkeys([k for k, _ in engine.KEYS_BS] + list(engine.KPI_BS_FIELDS)))
+    pl = list(dict.fromkeys([k for k, _ in engine.KEYS_PL] + list(engine.KPI_PL_FIELDS)))
+    return {"bs": bs, "pl": pl, "bs_prev": bs, "pl_prev": pl}
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def rows(engine, decide: Callable[[Any, Any], Tuple[Optional[float], str, str]], filters: Filters,
+         after: Optional[str] = None, versions: Optional[Dict[str, str]] = None) -> Iterator[Dict[str, Any]]:
+    """Exportsorok (dict) a tárból. decide(saját tőke, pontszám) -> (risk_score, döntés, döntéskód)."""
+    names = kpi_names(engine)
+    outputs = names + ("score", "bs.Saját tőke")
+    versions = versions or {}
+    selected = ((cursor, r) for cursor, r in store.iter_records(after) if filters.record(r))
+    for chunk in _chunks(selected, CHUNK):
+        items = []
+        for cursor, r in chunk:
+            sections = {sec: dict(r.get(sec) or {}) for sec in SECTIONS}
+            engine.apply_overrides(sections["bs"], sections["pl"], sections["bs_prev"], sections["pl_prev"],
+                                   r.get("overrides") or None)
+            items.append((cursor, r, sections, r.get("sector") or "default"))
+        scenarios = [engine.kpi_inputs(s["bs"], s["pl"], sector) for _, _, s, sector in items]
+        base = engine.evaluate_kpis(items[0][2]["bs"], items[0][2]["pl"], items[0][3])
+        for (cursor, r, sections, sector), res in zip(items, engine.evaluate_scenarios(base, scenarios, outputs)):
+            score = res[-2]
+            if not filters.score(score):
+                continue
+            risk, decision, code = decide(res[-1], score)
+            ident = r.get("identity") or {}
+            yield {
+                "cursor": cursor, "company_key": r.get("company_key"), "company_name": ident.get("name"),
+                "tax_number": ident.get("tax_number"), "saved_pdf": r.get("saved_pdf"), "year": r.get("year"),
+                "sector": sector, "parsed_at": _iso(r.get("parsed_at")), "updated_at": _iso(r.get("updated_at")),
+                **sections,
+                "ratios": dict(zip(names, res)),
+                "score": score, "risk_score": risk, "decision": decision, "decision_code": code,
+                "overrides": r.get("overrides") or {},
+                "config_version": versions.get("config"), "engine_version": versions.get("engine"),
+            }
+
+
+def csv_header(engine) -> List[str]:
+    fields = field_names(engine)
+    return (list(META_COLUMNS) + [f"{sec}.{k}" for sec in SECTIONS for k in fields[sec]]
+            + list(kpi_names(engine)) + list(TAIL_COLUMNS))
+
+
+def _csv_row(row: Dict[str, Any], fields: Dict[str, List[str]]) -> List[Any]:
+    out = [row[c] for c in META_COLUMNS]
+    for sec in SECTIONS:
+        values = row[sec]
+        out.extend(values.get(k) for k in fields[sec])
+    out.extend(row["ratios"].values())
+    out.extend(json.dumps(row[c], ensure_ascii=False) if c == "overrides" else row[c] for c in TAIL_COLUMNS)
+    return out
+
+
+def stream(engine, decide, fmt: str, filters: Filters, after: Optional[str] = None,
+           versions: Optional[Dict[str, str]] = None, header: bool = True) -> Iterator[bytes]:
+    """A kész kimenet darabokban (CHUNK soronként egy darab); CSV fejléc csak az elején (folytatáskor header=False).
+    A formátumot azonnal ellenőrzi (nem az első darabnál)."""
+    if fmt not in MEDIA_TYPES:
+        raise ExportError(f"Ismeretlen formátum: {fmt!r} (csv / jsonl)")
+    return _stream(engine, decide, fmt, filters, after, versions, header)
+
+
+def _stream(engine, decide, fmt, filters, after, versions, header) -> Iterator[bytes]:
+    fields = field_names(engine)
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n") if fmt == "csv" else None
+    if writer is not None and header:
+        writer.writerow(csv_header(engine))
+    for chunk in _chunks(rows(engine, decide, filters, after, versions), CHUNK):
+        for row in chunk:
+            if writer is not None:
+                writer.writerow(_csv_row(row, fields))
+            else:
+                buf.write(json.dumps(row, ensure_ascii=False))
+                buf.write("\n")
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():  # csak fejléc (nincs találat)
+        yield buf.getvalue().encode("utf-8")
@@ -0,0 +1,422 @@
+# app/airm_module/limits.py — kliensenkénti token-bucket korlát + igazságos (round-robin) sor a nehéz végpontokra
+"""
+Workerenként, processzen belül (nincs külső tár):
+
+1) Token bucket kliensenként és végpont-osztályonként. Konfiguráció: AIRM_RATE_<OSZTÁLY>="<keret>/<mp>",
+   pl. "30/60" = legfeljebb 30 kérés egyszerre, percenként 30 token töltődik vissza; "off" = nincs korlát.
+   Túllépéskor 429 + Retry-After (mp-ben, amikor a következő token meglesz).
+2) Igazságos ütemezés: egyszerre legfeljebb AIRM_HEAVY_SLOTS nehéz kérés fut; a várakozók kliensenként
+   külön FIFO-ban állnak, a felszabaduló helyet a kliensek körbeforgó sorrendben kapják (egy kliens hosszú
+   sorozata / batch-e nem éheztetheti ki a többieket). Kliensenként legfeljebb AIRM_QUEUE_PER_CLIENT vár,
+   a többi 429-et kap (Retry-After a becsült várakozásból).
+
+3) Adaptív terheléscsökkentés (CoDel-szerű): ha a sorban töltött idő legalább AIRM_SHED_INTERVAL_S-ig
+   folyamatosan az AIRM_QUEUE_TARGET_MS cél fölött van, a túlterhelt állapotban az új, sorba kerülő nehéz
+   kérések azonnal 503 + Retry-After választ kapnak (a szabad helyre érkezők továbbra is futnak). Az állapot
+   akkor szűnik meg, ha a várakozás egy teljes intervallumig a cél alatt marad (vagy nincs sor és van szabad
+   hely). Ha a túlterhelés AIRM_READY_AFTER_S-nél tovább tart, a /readyz 503-at ad.
+
+Kliens: az AIRM_CLIENT_HEADER fejléc (alapból X-Client-Key), különben az IP (AIRM_TRUST_PROXY=1 esetén az
+X-Forwarded-For első eleme). A token bucket (RateLimitMiddleware) még a törzs beolvasása előtt dönt; a sorban
+állás (heavy_slot függőség) a feltöltés után, így a lassú feltöltés nem foglal helyet.
+"""
+import asyncio
+import json
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request
+
+try:
+    from . import metrics
+    from .budget import Budget, BudgetExceeded
+    from .recycle import RECYCLER
+    from .timing import current_timer
+except ImportError:  # közvetlen futtatás az airm_module mappából
+    import metrics
+    from budget import Budget, BudgetExceeded
+    from recycle import RECYCLER
+    from timing import current_timer
+
+# végpont -> osztály (csak POST); batch: sok forgatókönyv egy kérésben
+ROUTE_CLASSES = {"/preview": "preview", "/recalc": "recalc", "/recalc_kpis": "recalc", "/whatif": "batch"}
+metrics.register_heavy_routes(ROUTE_CLASSES)  # a sor-mélység metrika ugyanezekre a végpontokra
+DEFAULT_RATES = {"preview": "30/60", "recalc": "120/60", "batch": "20/60"}
+MAX_BUCKETS = 10000
+
+CLIENT_HEADER = os.environ.get("AIRM_CLIENT_HEADER", "X-Client-Key").lower().encode("latin-1")
+TRUST_PROXY = os.environ.get("AIRM_TRUST_PROXY", "0") == "1"
+HEAVY_SLOTS = max(1, int(os.environ.get("AIRM_HEAVY_SLOTS", "2")))
+QUEUE_PER_CLIENT = max(0, int(os.environ.get("AIRM_QUEUE_PER_CLIENT", "4")))
+QUEUE_TARGET_S = float(os.environ.get("AIRM_QUEUE_TARGET_MS", "1000")) / 1000.0   # 0 = nincs terheléscsökkentés
+SHED_INTERVAL_S = float(os.environ.get("AIRM_SHED_INTERVAL_S", "2"))
+READY_AFTER_S = float(os.environ.get("AIRM_READY_AFTER_S", "10"))
+
+RATE_LIMIT = metrics.REGISTRY.counter("airm_rate_limit_total",
+                                      "Heavy requests by class and limiter outcome (allowed/throttled/queue_full/shed)")
+QUEUE_WAIT = metrics.REGISTRY.histogram("airm_fair_queue_wait_seconds", "Time spent waiting for a heavy slot",
+                                        buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+QUEUE_WAITING = metrics.REGISTRY.gauge("airm_fair_queue_waiting", "Heavy requests waiting for a slot")
+OVERLOADED = metrics.REGISTRY.gauge("airm_overloaded", "Workers currently shedding heavy requests (queue wait over target)")
+
+
+def parse_rate(spec: str) -> Optional[Tuple[float, float]]:
+    """"30/60" -> (keret 30, 0.5 token/mp); "off" / "0" -> None (nincs korlát)."""
+    spec = (spec or "").strip().lower()
+    if spec in ("", "off", "0", "none"):
+        return None
+    burst, _, period = spec.partition("/")
+    burst_f, period_f = float(burst), float(period or 1)
+    if burst_f <= 0 or period_f <= 0:
+        return None
+    return burst_f, burst_f / period_f
+
+
+RATES: Dict[str, Optional[Tuple[float, float]]] = {
+    cls: parse_rate(os.environ.get(f"AIRM_RATE_{cls.upper()}", default)) for cls, default in DEFAULT_RATES.items()
+}
+
+
+class TokenBuckets:
+    """(osztály, kliens) -> [tokenek, utolsó frissítés]; a teli (régóta tétlen) bucketeket időnként eldobjuk."""
+
+    def __init__(self, rates: Dict[str, Optional[Tuple[float, float]]]):
+        self.rates = rates
+        self._b: Dict[Tuple[str, str], list] = {}
+
+    def take(self, cls: str, client: str, now: Optional[float] = None) -> float:
+        """0.0, ha mehet (egy token levonva); különben a következő tokenig hátralévő mp."""
+        rate = self.rates.get(cls)
+        if rate is None:
+            return 0.0
+        burst, per_s = rate
+        now = time.monotonic() if now is None else now
+        b = self._b.get((cls, client))
+        if b is None:
+            if len(self._b) >= MAX_BUCKETS:
+                self._prune(now)
+            b = self._b[(cls, client)] = [burst, now]
+        tokens = min(burst, b[0] + (now - b[1]) * per_s)
+        b[1] = now
+        if tokens >= 1.0:
+            b[0] = tokens - 1.0
+            return 0.0
+        b[0] = tokens
+        return (1.0 - tokens) / per_s
+
+    def _prune(self, now: float):
+        for key, (tokens, ts) in list(self._b.items()):
+            burst, per_s = self.rates[key[0]] or (0.0, 1.0)
+            if tokens + (now - ts) * per_s >= burst:
+                del self._b[key]
+
+    def __len__(self):
+        return len(self._b)
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Overloaded(Exception):
+    pass
+
+
+class LoadShedder:
+    """A sorban töltött idő a cél fölött / alatt: belépés a túlterhelt állapotba, ha `interval`-ig folyamatosan
+    fölötte van, kilépés, ha `interval`-ig folyamatosan alatta (hiszterézis, hogy ne billegjen).
+    Az egymást READY_AFTER_S-en belül követő túlterhelt szakaszok egy epizódnak számítanak (a /readyz-hez)."""
+
+    def __init__(self, target_s: float, interval_s: float):
+        self.target_s = target_s
+        self.interval_s = interval_s
+        self.above_since: Optional[float] = None
+        self.below_since: Optional[float] = None
+        self.overloaded_since: Optional[float] = None
+        self.episode_since: Optional[float] = None
+        self.calm_since: Optional[float] = None
+        self.wait_s = 0.0   # a várakozás EWMA-ja (csak tájékoztató)
+
+    def observe(self, wait_s: float, now: float, sample: bool = True):
+        if self.target_s <= 0:
+            return
+        if sample:
+            self.wait_s = 0.8 * self.wait_s + 0.2 * wait_s
+        if wait_s >= self.target_s:
+            self.below_since = None
+            if self.above_since is None:
+                self.above_since = now
+            if self.overloaded_since is None and now - self.above_since >= self.interval_s:
+                self.overloaded_since = now
+                if self.episode_since is None or self.calm_since is None or now - self.calm_since > READY_AFTER_S:
+                    self.episode_since = now
+                OVERLOADED.set(1)
+        else:
+            self.above_since = None
+            if self.below_since is None:
+                self.below_since = now
+            if self.overloaded_since is not None and now - self.below_since >= self.interval_s:
+                self.overloaded_since = None
+                self.calm_since = now
+                OVERLOADED.set(0)
+
+    @property
+    def overloaded(self) -> bool:
+        return self.overloaded_since is not None
+
+    def pressure_for(self, now: float) -> float:
+        """Az aktuális túlterhelési epizód hossza (a kilépés utáni egy intervallumig még tart), különben 0."""
+        if self.episode_since is None:
+            return 0.0
+        if self.overloaded or (self.calm_since is not None and now - self.calm_since < self.interval_s):
+            return now - self.episode_since
+        return 0.0
+
+
+class FairScheduler:
+    """Legfeljebb `slots` egyidejű nehéz kérés; a várakozók kliensenkénti FIFO-kban, körbeforgó kiszolgálással."""
+
+    def __init__(self, slots: int, per_client: int, shedder: Optional[LoadShedder] = None):
+        self.slots = slots
+        self.per_client = per_client
+        self.shedder = shedder or LoadShedder(0.0, 0.0)
+        self.busy = 0
+        # kliens -> (future, sorba állás ideje) FIFO; a dict sorrendje = a körforgás
+        self.waiting: "OrderedDict[str, Deque[Tuple[asyncio.Future, float]]]" = OrderedDict()
+        self.n_waiting = 0
+        self.hold_s = 0.5   # egy hely átlagos foglalási ideje (EWMA) – a Retry-After becsléséhez
+
+    def oldest_wait(self, now: float) -> float:
+        return max((now - q[0][1] for q in self.waiting.values()), default=0.0)
+
+    def check(self, now: Optional[float] = None) -> bool:
+        """Túlterhelt-e most; üresjáratban (nincs sor, van szabad hely) a várakozás 0-nak számít."""
+        now = time.monotonic() if now is None else now
+        if not self.waiting and self.busy < self.slots:
+            self.shedder.observe(0.0, now, sample=False)
+        elif self.waiting:
+            head = self.oldest_wait(now)
+            if head >= self.shedder.target_s:  # a beragadt sor is jel, nem csak a kiszolgált várakozás
+                self.shedder.observe(head, now, sample=False)
+        return self.shedder.overloaded
+
+    async def acquire(self, client: str):
+        now = time.monotonic()
+        if self.busy < self.slots and not self.waiting:
+            self.shedder.observe(0.0, now)
+            self.busy += 1
+            return
+        if self.check(now):
+            raise Overloaded()
+        q = self.waiting.get(client)
+        if len(q or ()) >= self.per_client:
+            raise QueueFull()
+        if q is None:
+            q = self.waiting[client] = deque()
+        fut = asyncio.get_running_loop().create_future()
+        q.append((fut, now))
+        self.n_waiting += 1
+        QUEUE_WAITING.inc()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():  # közben megkapta a helyet
+                self.release()
+            else:
+                self._drop(client, fut)
+            raise
+
+    def _drop(self, client: str, fut):
+        q = self.waiting.get(client)
+        item = next((it for it in q or () if it[0] is fut), None)
+        if item is not None:
+            q.remove(item)
+            self.n_waiting -= 1
+            QUEUE_WAITING.dec()
+            if not q:
+                del self.waiting[client]
+
+    def release(self, held_s: Optional[float] = None):
+        if held_s is not None:
+            self.hold_s = 0.8 * self.hold_s + 0.2 * held_s
+        self.busy -= 1
+        while self.waiting and self.busy < self.slots:
+            client, q = next(iter(self.waiting.items()))
+            fut, enqueued = q.popleft()
+            self.n_waiting -= 1
+            QUEUE_WAITING.dec()
+            if q:
+                self.waiting.move_to_end(client)  # a kliens a kör végére kerül
+            else:
+                del self.waiting[client]
+            if fut.cancelled():
+                continue
+            now = time.monotonic()
+            self.shedder.observe(now - enqueued, now)
+            self.busy += 1
+            fut.set_result(None)
+        if not self.waiting and self.busy < self.slots:
+            self.shedder.observe(0.0, time.monotonic(), sample=False)  # a sor kiürült: innen számít a nyugalom
+
+    def retry_after(self) -> float:
+        return self.hold_s * (self.n_waiting + 1) / self.slots
+
+
+def _route_path(scope) -> str:
+    """Az útvonal a mount-pont (root_path) nélkül, ahogy a mountolt alkalmazás látja ('/airm/preview' -> '/preview')."""
+    path = scope["path"]
+    root = scope.get("root_path", "")
+    if root and path.startswith(root) and path[len(root):len(root) + 1] in ("", "/"):
+        return path[len(root):]
+    return path
+
+
+def route_class(scope) -> Optional[str]:
+    if scope["type"] != "http" or scope["method"] != "POST":
+        return None
+    return ROUTE_CLASSES.get(_route_path(scope))
+
+
+def client_key(scope) -> str:
+    forwarded = None
+    for k, v in scope.get("headers") or ():
+        if k == CLIENT_HEADER and v:
+            return "key:" + v.decode("latin-1")[:128]
+        if TRUST_PROXY and k == b"x-forwarded-for" and v:
+            forwarded = v.decode("latin-1").split(",")[0].strip()
+    if forwarded:
+        return "ip:" + forwarded
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+async def _too_many(send, retry_after: float, detail: str):
+    body = json.dumps({"detail": detail}, ensure_ascii=False).encode("utf-8")
+    await send({"type": "http.response.start", "status": 429, "headers": [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode("latin-1")),
+        (b"retry-after", str(max(1, math.ceil(retry_after))).encode("latin-1")),
+    ]})
+    await send({"type": "http.response.body", "body": body})
+
+
+class RateLimitMiddleware:
+    """Tiszta ASGI middleware a nehéz POST végpontok elé: token bucket, még a kérés törzsének beolvasása előtt."""
+
+    def __init__(self, app, rates=None):
+        self.app = app
+        self.buckets = TokenBuckets(RATES if rates is None else rates)
+
+    async def __call__(self, scope, receive, send):
+        cls = route_class(scope)
+        if cls is not None:
+            timer = current_timer()
+            wait = self.buckets.take(cls, client_key(scope))
+            if wait > 0:
+                RATE_LIMIT.inc(route_class=cls, result="throttled")
+                timer.meta["rate_limited"] = "throttled"
+                await _too_many(send, wait, "Túl sok kérés ettől a klienstől, próbáld újra később.")
+                return
+        await self.app(scope, receive, send)
+
+
+SCHEDULER = FairScheduler(HEAVY_SLOTS, QUEUE_PER_CLIENT, LoadShedder(QUEUE_TARGET_S, SHED_INTERVAL_S))
+
+
+async def _watch_disconnect(receive, budget: Budget):
+    """A törzs beolvasása után a következő ASGI üzenet a http.disconnect (bontás vagy a válasz vége)."""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            budget.disconnected = True
+            return
+
+
+async def _acquire(client: str, budget: Budget, watcher: "asyncio.Task"):
+    """Helyfoglalás, amíg a kliens kapcsolatban van és a kérés-keret tart; különben a várakozó kilép a sorból."""
+    acquire = asyncio.ensure_future(SCHEDULER.acquire(client))
+    timeout = budget.remaining()
+    await asyncio.wait({acquire, watcher}, timeout=timeout if timeout != math.inf else None,
+                       return_when=asyncio.FIRST_COMPLETED)
+    if acquire.done():
+        acquire.result()  # QueueFull / Overloaded továbbmegy
+        return
+    acquire.cancel()
+    await asyncio.gather(acquire, return_exceptions=True)
+    budget.check("queue")
+
+
+async def heavy_slot(request: Request):
+    """FastAPI függőség a nehéz végpontokon: a feltöltött törzs után, a munka előtt foglal helyet
+    (igazságos sorból); a végpont szinkron (threadpoolban fut), így várakozás közben az event loop szabad.
+    A kérés időkeretet kap (budget.Budget a timeren), a bontott kapcsolatot a sorban és a munka közben is figyeljük."""
+    timer = current_timer()
+    cls = route_class(request.scope) or "other"
+    timer.mark_since_start("upload")  # a törzs már beolvasva; a sorban állás külön lépés
+    budget = timer.state["budget"] = Budget(getattr(timer, "t0", time.perf_counter()), route_class=cls)
+    watcher = asyncio.ensure_future(_watch_disconnect(request.receive, budget))
+    t0 = time.perf_counter()
+    try:
+        try:
+            with timer.stage("queue"):
+                await _acquire(client_key(request.scope), budget, watcher)
+        except QueueFull:
+            RATE_LIMIT.inc(route_class=cls, result="queue_full")
+            timer.meta["rate_limited"] = "queue_full"
+            raise HTTPException(status_code=429, detail="Túl sok várakozó kérés ettől a klienstől.",
+                                headers={"Retry-After": str(max(1, math.ceil(SCHEDULER.retry_after())))})
+        except Overloaded:
+            RATE_LIMIT.inc(route_class=cls, result="shed")
+            timer.meta["rate_limited"] = "shed"
+            raise HTTPException(status_code=503, detail="A szolgáltatás túlterhelt, próbáld újra később.",
+                                headers={"Retry-After": str(max(1, math.ceil(SCHEDULER.retry_after())))})
+        RATE_LIMIT.inc(route_class=cls, result="allowed")
+        QUEUE_WAIT.observe(time.perf_counter() - t0, route_class=cls)
+        if hasattr(timer, "budget"):  # a lépés-ellenőrzések csak a hely megszerzése után (a release-t a finally adja)
+            timer.budget = budget
+        t1 = time.perf_counter()
+        try:
+            yield
+        finally:
+            SCHEDULER.release(time.perf_counter() - t1)
+            RECYCLER.task_done()  # feladatszám / RSS-határ -> worker-csere (recycle.py)
+    finally:
+        watcher.cancel()
+
+
+def readiness() -> Dict[str, object]:
+    """A /readyz állapota: nem kész, ha a túlterhelési epizód READY_AFTER_S-nél régebb óta tart."""
+    now = time.monotonic()
+    SCHEDULER.check(now)
+    shedder = SCHEDULER.shedder
+    pressure = shedder.pressure_for(now)
+    return {
+        "ready": pressure < READY_AFTER_S,
+        "overloaded": shedder.overloaded,
+        "overloaded_for_s": round(pressure, 3),
+        "queue_wait_s": round(shedder.wait_s, 3),
+        "oldest_wait_s": round(SCHEDULER.oldest_wait(now), 3),
+        "queue_target_s": shedder.target_s,
+        "waiting": SCHEDULER.n_waiting,
+        "busy": SCHEDULER.busy,
+        "slots": SCHEDULER.slots,
+        "retry_after": max(1, math.ceil(SCHEDULER.retry_after())),
+    }
+
+
+def _config_collector(counters, gauges):
+    cfg = []
+    for cls, rate in sorted(RATES.items()):
+        burst, per_s = rate if rate is not None else (0.0, 0.0)
+        cfg.append(({"route_class": cls, "param": "burst"}, burst))
+        cfg.append(({"route_class": cls, "param": "per_second"}, per_s))
+    cfg.append(({"route_class": "", "param": "heavy_slots"}, HEAVY_SLOTS))
+    cfg.append(({"route_class": "", "param": "queue_per_client"}, QUEUE_PER_CLIENT))
+    cfg.append(({"route_class": "", "param": "queue_target_seconds"}, QUEUE_TARGET_S))
+    return [("airm_rate_limit_config", "gauge", "Configured limits per worker (burst/per_second 0 = unlimited)", cfg)]
+
+
+metrics.REGISTRY.add_collector(_config_collector)
@@ -1,21 +1,53 @@
 # app/airm_module/main.py — CLEAN HEADER
---- a/app/airm_module/main.py
-+++ b/app/airm_module/main.py
- from fastapi import FastAPI, UploadFile, File, HTTPException
- from fastapi.middleware.cors import CORSMiddleware
- from fastapi.staticfiles import StaticFiles
-+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, FileResponse
-from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, FileResponse
+from fastapi import Depends, FastAPI, UploadFile, File, Form, HTTPException, Query, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, FileResponse, RedirectResponse, Response, StreamingResponse
 
+from contextlib import asynccontextmanager
 from pathlib import Path
+import importlib.util
 import json
 import math
+import os
 import re
+import shutil
+import sys
+import threading
+import time
+import traceback
+from collections import OrderedDict
 from typing import Any, Dict, List, Optional, Tuple, Set, Iterable, Union, Callable
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from docx import Document
+
+try:
+    from .timing import TimingMiddleware, current_timer
+    from . import export, metrics, results, store, timeline, whatif
+    from .static_assets import StaticAssets
+    from .limits import RateLimitMiddleware, heavy_slot
+    from . import budget
+    from .budget import BudgetExceeded, exceeded_handler
+    from . import recycle
+except ImportError:  # közvetlen futtatás az airm_module mappából (uvicorn main:app)
+    from timing import TimingMiddleware, current_timer
+    import export
+    import metrics
+    import results
+    import store
+    import timeline
+    import whatif
+    from static_assets import StaticAssets
+    from limits import RateLimitMiddleware, heavy_slot
+    import budget
+    from budget import BudgetExceeded, exceeded_handler
+    import recycle
+
+@asynccontextmanager
+async def lifespan(app):
+    # előmelegítés, mielőtt a worker kapcsolatot fogad (a lecserélt worker utódja is így indul, recycle.py)
+    recycle.started(warm_up)
+    yield
+    recycle.stopped()
 
 app = FastAPI(
     title="AIRM backend",
@@ -23,39 +55,41 @@ app = FastAPI(
     docs_url="/docs",
     openapi_url="/openapi.json",
     redoc_url=None,
+    lifespan=lifespan,
 )
 
+# sorrend (kívülről befelé): Timing -> CORS (a 429 is kap CORS fejlécet) -> token bucket -> végpontok;
+# a nehéz végpontok (szinkron, threadpoolban) a limits.heavy_slot igazságos sorában várnak
+app.add_middleware(RateLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=[o.strip() for o in os.environ.get("AIRM_CORS_ORIGINS", "*").split(",") if o.strip()],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "ETag", "Retry-After"],
 )
+app.add_middleware(TimingMiddleware, observer=metrics.RequestObserver(app))
+# időkeret-túllépés / bontott kapcsolat a nehéz végpontokon -> 504 / 499 (budget.py)
+app.add_exception_handler(BudgetExceeded, exceeded_handler)
 
 STATIC_DIR = (Path(__file__).parent / "static").resolve()
 if STATIC_DIR.exists():
-    app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="airm_static")
+    app.mount("/static", StaticAssets(STATIC_DIR), name="airm_static")
 
 # ----- innen folytatódhat a meglévő AIRM kódod (endpointok, utilok, stb.) -----
 
-app = FastAPI(
-    title="AIRM backend",
-    version="2025.09.29",
-    openapi_url="/openapi.json",
-    docs_url="/docs",      # fontos az iframe-hez
-    redoc_url=None
-)
-
-app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True,
-                   allow_methods=["*"], allow_headers=["*"])
-
-# ha van saját static-ja (pl. /airm/static/…):
-STATIC_DIR = Path(__file__).parent / "static"
-if STATIC_DIR.exists():
-    app.mount("/static", StaticFiles(directory=STATIC_DIR), name="airm_static")
-
-# ... (meglevő végpontjaid változatlanul) ...
+BASE_DIR = Path(__file__).parent.resolve()
+AIRM_DIR = BASE_DIR / "airm_src"
+UPLOADS_DIR = BASE_DIR / "uploads"
+REPORTS_DIR = BASE_DIR / "reports"
+# riport-megőrzés: "cache" – a DOCX memóriában renderelődik, és csak az eredmény-cache (results.py) tartja
+# meg (a /download innen szolgál); "reports" – ezen felül a reports/ mappába is kiírjuk (régi viselkedés)
+REPORT_RETENTION = os.environ.get("AIRM_REPORT_RETENTION", "cache").strip().lower()
+metrics.register_disk_dir("uploads", UPLOADS_DIR)
+metrics.register_disk_dir("reports", REPORTS_DIR)
+metrics.register_disk_dir("analyses", store.ANALYSES_DIR)
+metrics.register_disk_dir("results", results.RESULTS_DIR)
 
 def ensure_dirs():
     UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
@@ -77,25 +111,26 @@ def import_airm_main():
         tb = traceback.format_exc()
         raise HTTPException(status_code=500, detail=f"AIRM import hiba: {e}\n{tb}")
 
-_num_pattern = re.compile(r"-?\d{1,3}(?:[ .]\d{3})*(?:[.,]\d+)?")
-def parse_first_number(s: str):
-    m = _num_pattern.search(s or "")
-    if not m:
-        return None
-    raw = m.group(0)
-    neg = raw.startswith("-")
-    raw = raw.replace(" ", "").replace(".", "")
-    if "," in raw: raw = raw.replace(",", ".")
+if str(AIRM_DIR) not in sys.path:
+    sys.path.insert(0, str(AIRM_DIR))
+from airm_numparse import AMOUNT, DECIMAL, number_finder, number_parser  # noqa: E402
+from airm_pdftext import PdfReadError  # noqa: E402
+import airm_pdftext as pdftext  # noqa: E402
+
+_parse_amount = number_parser(AMOUNT)
+
+# az első szám float-ként (vagy None) – közvetlenül a mag előre épített keresője, burkoló hívás nélkül
+parse_first_number = number_finder(DECIMAL, as_float=True)
+
+def all_docx_text(docx_path: Path) -> str:
     try:
-        val = float(raw)
-        if neg: val = -abs(val)
-        return val
+        return document_text(Document(str(docx_path)))
     except Exception:
-        return None
+        return ""
 
-def all_docx_text(docx_path: Path) -> str:
+def document_text(doc) -> str:
+    """A riport teljes szövege (bekezdések, táblák, fejléc/lábléc) – egy python-docx Document-ből, mentés nélkül."""
     try:
-        doc = Document(str(docx_path))
         parts = []
         for p in doc.paragraphs: parts.append(p.text)
         for table in doc.tables:
@@ -181,40 +216,195 @@ def sanitize_reports_dir():
             shutil.move(str(p), str(dest))
         except Exception: pass
 
-def pdf_to_text(path: Path) -> str:
+def report_line_memo(mod, timer):
+    """A motor sor-memójának találatai (egy elemzés) -> timing log + /metrics."""
+    st = getattr(mod, "_AIRM_LAST_LINE_MEMO", None)
+    if not st:
+        return
+    timer.meta["line_memo_hits"] = st["hits"]
+    timer.meta["line_memo_misses"] = st["misses"]
+    metrics.cache_event("line_memo", True, st["hits"])
+    metrics.cache_event("line_memo", False, st["misses"])
+
+def report_pdf_backend(mod, timer):
+    """A motor PDF-kinyerési kísérletei (backend, eredmény, idő) -> timing log + /metrics."""
+    st = getattr(mod, "_AIRM_LAST_PDF", None)
+    if not st:
+        return
+    timer.meta["pdf_backend"] = st["backend"]
+    timer.meta["pdf_attempts"] = [f'{a["backend"]}:{a["result"]}' for a in st["attempts"]]
+    timer.meta["column_rows"] = st["column_rows"]
+    timer.meta["pdf_pages_read"] = st["pages_read"]
+    if st["missing"]:
+        timer.meta["missing_keys"] = st["missing"]
+    for a in st["attempts"]:
+        metrics.pdf_backend_attempt(a["backend"], a["result"], a["ms"] / 1000.0)
+
+# ---- elemzés-cache (workerenként): a /preview parse-eredménye + a KPI-gráf értékei ----
+# A /recalc ebből dolgozik (nincs újraolvasás), a /recalc_kpis csak a felülírt mezőktől függő KPI-kat
+# számolja újra (airm_src/airm_kpigraph.py). Motorváltozáskor (main.py mtime) a bejegyzések érvénytelenek.
+ANALYSIS_CACHE_SIZE = int(os.environ.get("AIRM_ANALYSIS_CACHE", "32"))
+_ANALYSES: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_ANALYSES_LOCK = threading.Lock()  # a nehéz végpontok threadpoolban futnak
+_KPI_ENGINE: Dict[str, Any] = {"mtime": None, "mod": None}
+
+def engine_mtime() -> int:
+    return (AIRM_DIR / "main.py").stat().st_mtime_ns
+
+def remember_analysis(saved_name: str, parsed) -> Dict[str, Any]:
+    entry = {"parsed": parsed, "engine": engine_mtime(), "kpis": None}
+    with _ANALYSES_LOCK:
+        _ANALYSES[saved_name] = entry
+        _ANALYSES.move_to_end(saved_name)
+        while len(_ANALYSES) > ANALYSIS_CACHE_SIZE:
+            _ANALYSES.popitem(last=False)
+    return entry
+
+def cached_analysis(saved_name: str):
+    mtime = engine_mtime()
+    with _ANALYSES_LOCK:
+        entry = _ANALYSES.get(saved_name)
+        if entry is not None and entry["engine"] != mtime:
+            del _ANALYSES[saved_name]
+            entry = None
+        if entry is not None:
+            _ANALYSES.move_to_end(saved_name)
+    metrics.cache_event("analysis", entry is not None)
+    return entry
+
+def kpi_engine():
+    """A KPI-gráfhoz elég egy betöltött motor (tiszta függvények); csak a main.py változásakor töltjük újra.
+    A riport (make_docx) továbbra is kérésenként friss modult kap."""
+    mtime = engine_mtime()
+    if _KPI_ENGINE["mod"] is None or _KPI_ENGINE["mtime"] != mtime:
+        _KPI_ENGINE["mod"] = import_airm_main()
+        _KPI_ENGINE["mtime"] = mtime
+    return _KPI_ENGINE["mod"]
+
+def warm_up() -> Dict[str, float]:
+    """A worker első kérése se fizesse a betöltést: motor (és vele a függőségei), PDF-backendek, python-docx."""
+    steps = {}
+    for name, fn in (("engine", kpi_engine), ("pdf_backends", pdftext.backend_chain), ("docx", Document)):
+        t0 = time.perf_counter()
+        fn()
+        steps[name] = round((time.perf_counter() - t0) * 1000.0, 1)
+    return steps
+
+def store_analysis(mod, saved_name: str, parsed, timer, sector: Optional[str] = None) -> Tuple[Dict[str, Any], Optional[str]]:
+    """Cégazonosítás a kinyert szövegből + az elemzés eltárolása a cég idősorához: (azonosító, cégkulcs)."""
+    text, bs, pl, raw = parsed
+    identity = mod.company_identity(text)
+    key = mod.company_key(identity)
+    if key is not None:
+        bs_prev = {k: info.get("previous") for k, info in (raw.get("balance") or {}).items() if isinstance(info, dict)}
+        pl_prev = {k: info.get("previous") for k, info in (raw.get("pl") or {}).items() if isinstance(info, dict)}
+        with timer.stage("store"):
+            store.save(key, saved_name, identity, bs, pl, bs_prev, pl_prev, sector)
+    timer.meta["company_key"] = key
+    return identity, key
+
+def analysis_for(saved_pdf: str, timer):
+    """A saved_pdf elemzése a cache-ből; ha nincs benne (másik worker / lejárt), egyszeri parse és eltesszük."""
+    entry = cached_analysis(saved_pdf)
+    timer.meta["analysis_cache"] = "hit" if entry is not None else "miss"
+    if entry is not None:
+        return entry
+    saved_path = UPLOADS_DIR / saved_pdf
+    if not saved_path.exists():
+        raise HTTPException(status_code=404, detail="Előnézet fájl nem található (saved_pdf).")
+    timer.state["pdf_path"] = saved_path
+    with timer.stage("engine_import"):
+        mod = import_airm_main()
     try:
-        with pdfplumber.open(str(path)) as pdf:
-            return "\n".join([(pg.extract_text() or "") for pg in pdf.pages])
-    except Exception:
-        return ""
+        parsed = mod.read_and_parse(saved_path, timer.stage, check=timer.check)
+        report_line_memo(mod, timer)
+    except BudgetExceeded:
+        raise
+    except PdfReadError:
+        raise HTTPException(status_code=400, detail="Nem sikerült szöveget kinyerni a PDF-ből.")
+    except Exception as e:
+        tb = traceback.format_exc()
+        raise HTTPException(status_code=500, detail=f"AIRM parser hiba: {e}\n{tb}")
+    finally:
+        report_pdf_backend(mod, timer)
+    entry = remember_analysis(saved_pdf, parsed)
+    if store.find(saved_pdf) is None:
+        store_analysis(mod, saved_pdf, parsed, timer)
+    return entry
+
+def overridden_statements(mod, entry, overrides):
+    """Az elemzés tárgyévi bs/pl másolata a kézi felülírásokkal (a cache-elt példány változatlan marad)."""
+    _, bs, pl, raw = entry["parsed"]
+    bs, pl = bs.copy(), pl.copy()
+    prev_bs, prev_pl = mod.previous_year(raw)
+    mod.apply_overrides(bs, pl, prev_bs, prev_pl, overrides)
+    return bs, pl
+
+def update_analysis_kpis(entry, bs, pl, sector):
+    """Az elemzés KPI-állapotának frissítése a (felülírt) bs/pl-lel: (értékek, megváltozott nevek, újraszámolt db).
+    A változás az elemzés előző állapotához képest értendő (első alkalommal a /preview alapállapotához)."""
+    mod = kpi_engine()
+    if entry.get("kpis") is None:  # alapállapot: a kinyert értékek felülírás nélkül
+        _, bs0, pl0, _ = entry["parsed"]
+        entry["kpis"] = mod.evaluate_kpis(bs0, pl0, sector)
+    values, changed, recomputed = mod.update_kpis(entry["kpis"], bs, pl, sector)
+    entry["kpis"] = values
+    return values, changed, recomputed
+
+def new_upload_file(stem: str):
+    """uploads/<stem>_<unix ts>.pdf kizárólagos létrehozással; ütközéskor (párhuzamos feltöltés ugyanabban a
+    másodpercben) _1, _2, ... utótag. (útvonal, írásra nyitott fájl)"""
+    ts = int(time.time())
+    for n in range(1000):
+        path = UPLOADS_DIR / (f"{stem}_{ts}.pdf" if n == 0 else f"{stem}_{ts}_{n}.pdf")
+        try:
+            return path, path.open("xb")
+        except FileExistsError:
+            continue
+    raise HTTPException(status_code=503, detail="Nem sikerült egyedi feltöltési nevet foglalni.")
 
 @app.get("/", response_class=HTMLResponse)
 def root():
     return RedirectResponse(url="/static/index.html")
 
 @app.post("/preview")
-async def preview_pdf(file: UploadFile = File(...), sector: str = Form(default="default"), lang: str = Form(default="hu")):
+def preview_pdf(file: UploadFile = File(...), sector: str = Form(default="default"), lang: str = Form(default="hu"),
+                _slot=Depends(heavy_slot)):
+    timer = current_timer()
+    timer.mark_since_start("upload")
+    metrics.processing_started(timer)
     ensure_dirs()
     if file.content_type not in ("application/pdf", "application/octet-stream"):
         raise HTTPException(status_code=400, detail="Kérlek e-beszámoló PDF-et tölts fel.")
     orig_name = Path(file.filename).name
     stem = "".join(ch for ch in Path(orig_name).stem if ch.isalnum() or ch in ("-","_")).strip() or "file"
-    ts = int(time.time())
-    saved_name = f"{stem}_{ts}.pdf"
-    saved_path = UPLOADS_DIR / saved_name
-    with saved_path.open("wb") as out:
-        shutil.copyfileobj(file.file, out)
-
-    mod = import_airm_main()
-    text = pdf_to_text(saved_path)
-    if not text:
-        raise HTTPException(status_code=400, detail="Nem sikerült szöveget kinyerni a PDF-ből.")
-
+    with timer.stage("save_upload"):
+        saved_path, out = new_upload_file(stem)
+        with out:  # mentés és tartalom-hash egy menetben; a kinyerés ugyanezt a fájlt mmap-pel olvassa
+            source = pdftext.save_stream(file.file, out, saved_path)
+    saved_name = saved_path.name
+    timer.state["pdf_path"] = saved_path
+    timer.state["pdf_digest"] = source.digest
+    timer.meta["pdf_bytes"] = saved_path.stat().st_size
+    metrics.UPLOAD_BYTES.inc(timer.meta["pdf_bytes"])
+
+    with timer.stage("engine_import"):
+        mod = import_airm_main()
     try:
-        bs_cur, pl_cur, raw = mod.parse_financials_with_raw(text)
+        text, bs_cur, pl_cur, raw = mod.read_and_parse(source, timer.stage, check=timer.check)
+        timer.meta["pdf_pages"] = getattr(mod, "_AIRM_LAST_PAGES", None)
+        report_line_memo(mod, timer)
+    except BudgetExceeded:
+        # megszakítva: a félkész elemzést nem tesszük el, a feltöltést sem tartjuk meg (a hash a mentéskor készült)
+        saved_path.unlink(missing_ok=True)
+        raise
+    except PdfReadError:
+        raise HTTPException(status_code=400, detail="Nem sikerült szöveget kinyerni a PDF-ből.")
     except Exception as e:
         tb = traceback.format_exc()
         raise HTTPException(status_code=500, detail=f"AIRM parser hiba: {e}\n{tb}")
+    finally:
+        report_pdf_backend(mod, timer)
 
     bs_prev = {}
     for k, info in (raw.get("balance") or {}).items():
@@ -230,6 +420,9 @@ async def preview_pdf(file: UploadFile = File(...), sector: str = Form(default="
     if ("Szállítók" in bs_cur or "Szállítók" in bs_prev) and "Szállítók" not in bs_labels:
         bs_labels.append("Szállítók")
 
+    remember_analysis(saved_name, (text, bs_cur, pl_cur, raw))
+    identity, company_key = store_analysis(mod, saved_name, (text, bs_cur, pl_cur, raw), timer, sector)
+
     return JSONResponse({
         "ok": True,
         "saved_pdf": saved_name,
@@ -237,28 +430,23 @@ async def preview_pdf(file: UploadFile = File(...), sector: str = Form(default="
         "lang": lang,
         "bs_labels": bs_labels,
         "pl_labels": pl_labels,
-        "bs": bs_cur, "bs_prev": bs_prev,
-        "pl": pl_cur, "pl_prev": pl_prev
+        "bs": dict(bs_cur), "bs_prev": bs_prev,
+        "pl": dict(pl_cur), "pl_prev": pl_prev,
+        "company": identity,
+        "company_key": company_key
     })
 
 def _coerce_num(val: Any) -> Any:
-    if isinstance(val, (int, float)): return val
-    if isinstance(val, str):
-        v = val.strip()
-        if not v: return v
-        v2 = v.replace(" ", "").replace(".", "").replace(",", "")
-        if v2.lstrip("-").isdigit():
-            try: return int(v2)
-            except: return v
-        return v
-    return val
-
-@app.post("/recalc")
-async def recalc(saved_pdf: str = Form(...), sector: str = Form(default="default"), lang: str = Form(default="hu"), overrides_json: str = Form(default="{}")):
-    ensure_dirs()
-    saved_path = UPLOADS_DIR / saved_pdf
-    if not saved_path.exists():
-        raise HTTPException(status_code=404, detail="Előnézet fájl nem található (saved_pdf).")
+    if not isinstance(val, str): return val  # szám (és minden más) változatlan
+    v = val.strip()
+    if not v: return v
+    d = v.replace(" ", "").replace(".", "")  # gyors út: tagolt egész, a mag hívása nélkül
+    if d.isdecimal() or (v[:1] == "-" and d[1:].isdecimal()): return int(d)
+    n = _parse_amount(v)
+    return v if n is None else n
+
+def parse_overrides(overrides_json: str) -> Dict[str, Any]:
+    """A /recalc* végpontok overrides_json mezője -> {"bs"|"bs_prev"|"pl"|"pl_prev": {mező: szám}} (üresek nélkül)."""
     try:
         overrides: Dict[str, Any] = json.loads(overrides_json or "{}")
     except Exception as e:
@@ -268,29 +456,268 @@ async def recalc(saved_pdf: str = Form(...), sector: str = Form(default="default
         sec_dict = overrides.get(sec, {})
         if isinstance(sec_dict, dict):
             filtered = { k: _coerce_num(v) for k,v in sec_dict.items() if str(v).strip() != "" }
+            for k, v in filtered.items():
+                if isinstance(v, float) and not math.isfinite(v):  # a json.loads elfogadja (Infinity, NaN)
+                    raise HTTPException(status_code=400, detail=f"Nem véges felülírás: {sec}.{k} = {v}")
             if filtered: clean[sec] = filtered
+    return clean
+
+def recalc_result_key(saved_path: Path, overrides: Dict[str, Any], sector: str, lang: str) -> str:
+    """A /recalc eredmény-cache kulcsa: PDF-tartalom, kanonikus felülírások, sector, lang, konfig- és motorverzió."""
+    return results.result_key(
+        results.files_digest([saved_path]), overrides, sector, lang,
+        config_version=results.files_digest([AIRM_DIR / "scoring_config.json"]),
+        engine_version=results.files_digest(AIRM_DIR.glob("*.py")),
+    )
+
+def retain_report(docx_name: str, docx: bytes, timer):
+    """A megőrzési szabály szerint a riport másolata a reports/ mappába (alapból nem kell: a cache tartja)."""
+    if REPORT_RETENTION != "reports":
+        return
+    with timer.stage("docx_write"):
+        out_docx = REPORTS_DIR / docx_name
+        tmp = out_docx.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(docx)
+        os.replace(tmp, out_docx)
+    with timer.stage("sanitize"):
+        sanitize_reports_dir()
+
+def recalc_kpi_changes(entry, overrides, sector) -> List[str]:
+    """Cache-találatnál is frissítjük az elemzés KPI-állapotát (a "changed" az előző állapothoz képest értendő)."""
+    if entry is None:
+        return []
+    bs, pl = overridden_statements(kpi_engine(), entry, overrides)
+    return update_analysis_kpis(entry, bs, pl, sector)[1]
 
-    mod = import_airm_main()
+@app.post("/recalc")
+def recalc(request: Request, saved_pdf: str = Form(...), sector: str = Form(default="default"), lang: str = Form(default="hu"), overrides_json: str = Form(default="{}"),
+           _slot=Depends(heavy_slot)):
+    timer = current_timer()
+    timer.mark_since_start("upload")
+    metrics.processing_started(timer)
+    ensure_dirs()
+    saved_path = UPLOADS_DIR / saved_pdf
+    if not saved_path.exists():
+        raise HTTPException(status_code=404, detail="Előnézet fájl nem található (saved_pdf).")
+    timer.state["pdf_path"] = saved_path
+    clean = parse_overrides(overrides_json)
+    with timer.stage("result_key"):
+        rkey = recalc_result_key(saved_path, clean, sector, lang)
+    headers = {"ETag": results.etag(rkey)}
+    if results.etag_matches(request.headers.get("if-none-match"), rkey):  # a kliensnél már megvan
+        timer.meta["result_cache"] = "not_modified"
+        metrics.cache_event("result", True)
+        store.set_overrides(saved_pdf, clean, sector)
+        return Response(status_code=304, headers=headers)
+    entry = cached_analysis(saved_pdf)
+    timer.meta["analysis_cache"] = "hit" if entry is not None else "miss"
+    hit = results.get(rkey)
+    metrics.cache_event("result", hit is not None)
+    timer.meta["result_cache"] = hit[2] if hit is not None else "miss"
+    if hit is not None:
+        result, docx, _ = hit
+        retain_report(result["docx_file"], docx, timer)
+        store.set_overrides(saved_pdf, clean, sector)
+        with timer.stage("kpis"):
+            changed = recalc_kpi_changes(entry, clean, sector)
+        return JSONResponse({**result, **download_fields(request, rkey, saved_pdf), "changed": changed,
+                             "cached": True}, headers=headers)
+
+    with timer.stage("engine_import"):
+        mod = import_airm_main()
     try:
-        res = mod.process_file(saved_path, REPORTS_DIR, overrides=clean if clean else None, sector=sector, lang=lang)
+        res = mod.process_file(saved_path, REPORTS_DIR, overrides=clean if clean else None, sector=sector, lang=lang, timer=timer,
+                               parsed=entry["parsed"] if entry is not None else None, persist=False)
+        report_line_memo(mod, timer)
+    except BudgetExceeded:
+        raise  # a félkész riport (memóriában) eldobva; a cache-be csak kész eredmény kerül
     except Exception as e:
         tb = traceback.format_exc()
         raise HTTPException(status_code=500, detail=f"AIRM riport-generálás hiba: {e}\n{tb}")
+    finally:
+        report_pdf_backend(mod, timer)
 
-    sanitize_reports_dir()
-    out_docx = Path(res.get("docx",""))
-    if not out_docx.exists():
+    docx = res.get("docx_bytes")
+    if not docx:
         raise HTTPException(status_code=500, detail="AIRM nem hozott létre DOCX kimenetet.")
-    text = all_docx_text(out_docx)
-    risk = find_score(text) or _find_score_fallback_any_100(text)
-    bs2 = res.get("bs", {}) or {}
-    eq = find_equity_from_text_or_res(text, bs2)
-    decision = decide_from_metrics(eq, risk)
+    timer.meta["docx_bytes"] = len(docx)
+    with timer.stage("docx_text"):
+        text = document_text(res["document"])
+    with timer.stage("decide"):
+        risk = find_score(text) or _find_score_fallback_any_100(text)
+        bs2 = res.get("bs", {}) or {}
+        eq = find_equity_from_text_or_res(text, bs2)
+        decision = decide_from_metrics(eq, risk)
+    store.set_overrides(saved_pdf, clean, sector)
+    changed: List[str] = []
+    if entry is not None:
+        with timer.stage("kpis"):
+            _, changed, timer.meta["kpi_recomputed"] = update_analysis_kpis(entry, res["bs"], res["pl"], sector)
+    result = {
+        "ok": True,
+        "decision": decision,
+        "decision_code": _decision_code(decision),
+        "risk_score": risk,
+        "equity_value": eq,
+        "docx_file": res["docx_name"],
+    }
+    with timer.stage("result_store"):
+        results.put(rkey, result, docx)
+    retain_report(res["docx_name"], docx, timer)
+    return JSONResponse({**result, **download_fields(request, rkey, saved_pdf), "changed": changed,
+                         "cached": False}, headers=headers)
+
+ANALYSIS_ID_RE = re.compile(r"^[A-Za-z0-9_-]+\.[0-9a-f]{32}$")
+DOCX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+def download_fields(request: Request, rkey: str, saved_pdf: str) -> Dict[str, str]:
+    """A letöltési azonosító a cache-kulcs és a feltöltő saved_pdf-jének aláírt tokenje (a kulcs nem megy ki)."""
+    analysis_id = results.download_token(rkey, saved_pdf)
+    return {"analysis_id": analysis_id, "download_url": f'{request.scope.get("root_path", "")}/download/{analysis_id}'}
+
+@app.api_route("/download/{analysis_id}", methods=["GET", "HEAD"])
+def download_report(analysis_id: str, request: Request):
+    """A /recalc riportja az analysis_id alapján, az eredmény-cache lemez-szintjéről. Az azonosító a /recalc által
+    kiadott, a szerver titkos kulcsával aláírt token (cache-kulcs + a feltöltő saved_pdf-je): a tartalom-hash
+    ismerete nem elég, hamis vagy módosított token 404 – kliens fájlnevet nem fogadunk.
+    Streamelve (a szerver támogatásával pathsend / zero-copy), Content-Length, ETag / If-None-Match -> 304,
+    Range / If-Range -> 206."""
+    timer = current_timer()
+    rkey = results.token_key(analysis_id) if ANALYSIS_ID_RE.match(analysis_id) else None
+    if rkey is None:
+        raise HTTPException(status_code=404, detail="Ismeretlen elemzés.")
+    with timer.stage("lookup"):
+        found = results.report_file(rkey)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Ismeretlen vagy lejárt elemzés (futtasd újra a /recalc-ot).")
+    path, result, st = found
+    tag = f'"{results.public_id(rkey)}-{st.st_size:x}-{st.st_mtime_ns:x}"'  # regenerálás után (más bájtok) új ETag
+    headers = {"ETag": tag, "Cache-Control": "private, no-cache", "Accept-Ranges": "bytes"}
+    inm = request.headers.get("if-none-match")
+    if inm and (inm.strip() == "*" or tag in [t.strip().removeprefix("W/") for t in inm.split(",")]):
+        return Response(status_code=304, headers=headers)
+    timer.meta["download_bytes"] = st.st_size
+    return FileResponse(path, headers=headers, media_type=DOCX_MEDIA_TYPE, stat_result=st,
+                        filename=result.get("docx_file") or f"AIRM_{results.public_id(rkey)}.docx")
+
+@app.post("/recalc_kpis")
+def recalc_kpis(saved_pdf: str = Form(...), sector: str = Form(default="default"), overrides_json: str = Form(default="{}"),
+                _slot=Depends(heavy_slot)):
+    """Gyors újraszámolás DOCX nélkül: csak a felülírt mezőktől függő mutatók / sávpontok / pontszám.
+    A risk_score és a döntés ugyanaz, amit a /recalc a riportból olvasna ki. Cache-hiánynál (másik worker,
+    kiszorult elemzés) újraolvassa a PDF-et, ezért nehéz végpont (sor, rate limit, időkeret)."""
+    timer = current_timer()
+    metrics.processing_started(timer)
+    clean = parse_overrides(overrides_json)
+    entry = analysis_for(saved_pdf, timer)
+    with timer.stage("kpis"):
+        mod = kpi_engine()
+        bs, pl = overridden_statements(mod, entry, clean)
+        values, changed, recomputed = update_analysis_kpis(entry, bs, pl, sector)
+    timer.meta["kpi_recomputed"] = recomputed
+    with timer.stage("decide"):
+        score = values["score"]
+        risk = float(int(round(score))) if isinstance(score, (int, float)) else None  # a riport "Pontszám: N/100" sora
+        eq = find_equity_from_text_or_res("", bs)
+        decision = decide_from_metrics(eq, risk)
     return JSONResponse({
         "ok": True,
         "decision": decision,
         "decision_code": _decision_code(decision),
         "risk_score": risk,
+        "score": score,
         "equity_value": eq,
-        "docx_file": out_docx.name
+        "ratios": mod.kpi_ratios(values),
+        "changed": changed,
+        "recomputed": recomputed
     })
+
+@app.post("/whatif")
+def whatif_grid(saved_pdf: str = Form(...), sector: str = Form(default="default"), overrides_json: str = Form(default="{}"),
+                grid_json: str = Form(...), _slot=Depends(heavy_slot)):
+    """Érzékenységvizsgálat: a (felülírt) elemzésből kiinduló bs/pl perturbációs rács minden forgatókönyve
+    egy batch-hívásban -> forgatókönyv × mutató/pontszám/döntés mátrix + a döntés fordulópontjai."""
+    timer = current_timer()
+    metrics.processing_started(timer)
+    clean = parse_overrides(overrides_json)
+    try:
+        grid = json.loads(grid_json or "{}")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Hibás grid JSON: {e}")
+    entry = analysis_for(saved_pdf, timer)
+    mod = kpi_engine()
+    bs, pl = overridden_statements(mod, entry, clean)
+    try:
+        axes, mode = whatif.parse_grid(grid, bs, pl, {"bs": mod.KPI_BS_FIELDS, "pl": mod.KPI_PL_FIELDS})
+    except whatif.GridError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def decide(eq, score):
+        risk = float(int(round(score))) if isinstance(score, (int, float)) else None
+        return risk, _decision_code(decide_from_metrics(None if eq is None else float(eq), risk))
+
+    with timer.stage("whatif"):
+        base = mod.evaluate_kpis(bs, pl, sector)
+        out = whatif.run_grid(mod, base, axes, mode, decide)
+    timer.meta["whatif_scenarios"] = out["scenarios"]
+    base_risk, base_code = decide(base["bs.Saját tőke"], base["score"])
+    return JSONResponse({"ok": True, "base": {"score": base["score"], "risk_score": base_risk, "decision_code": base_code},
+                         **out})
+
+COMPANY_KEY_RE = re.compile(r"^[a-z0-9][a-z0-9-]{0,90}$")
+
+@app.get("/companies")
+def list_companies():
+    """A tárolt elemzések cégei (cégkulcs, név, adószám, évek)."""
+    return JSONResponse({"ok": True, "companies": store.companies()})
+
+@app.get("/timeline/{company_key}")
+def company_timeline(company_key: str, sector: str = "default"):
+    """Többéves idősor a tárolt elemzésekből (PDF-kinyerés nélkül): évenkénti értékek, mutatók, pontszám, trendek."""
+    timer = current_timer()
+    if not COMPANY_KEY_RE.match(company_key):
+        raise HTTPException(status_code=400, detail="Hibás cégkulcs.")
+    with timer.stage("store"):
+        records = store.company_records(company_key)
+    if not records:
+        raise HTTPException(status_code=404, detail="Nincs tárolt elemzés ehhez a céghez.")
+    with timer.stage("timeline"):
+        out = timeline.build(kpi_engine(), records, sector)
+    timer.meta["timeline_years"] = len(out["years"])
+    latest = max(records, key=lambda r: r.get("updated_at") or 0)
+    return JSONResponse({"ok": True, "company_key": company_key, "company": latest.get("identity"),
+                         "analyses": len(records), **out})
+
+# ---- portfólió-export (export.py): minden tárolt elemzés CSV / JSONL-ként, streamelve ----
+CURSOR_RE = re.compile(r"^[a-z0-9][a-z0-9-]{0,90}/[A-Za-z0-9_.-]{1,200}$")
+
+def export_decide(eq, score):
+    """(risk_score, döntés, döntéskód) a saját tőkéből és a pontszámból – a /recalc_kpis szabálya."""
+    risk = float(int(round(score))) if isinstance(score, (int, float)) else None
+    decision = decide_from_metrics(None if eq is None else float(eq), risk)
+    return risk, decision, _decision_code(decision)
+
+def portfolio_export(fmt: str, filters, after: Optional[str] = None):
+    """Az export bájtdarabjai; a /export és az app/scripts/export_analyses.py közös belépési pontja."""
+    versions = {"config": results.files_digest([AIRM_DIR / "scoring_config.json"]),
+                "engine": results.files_digest(AIRM_DIR.glob("*.py"))}
+    return export.stream(kpi_engine(), export_decide, fmt, filters, after, versions, header=not after)
+
+@app.get("/export")
+def export_analyses(fmt: str = Query(default="csv", alias="format"), since: Optional[str] = None,
+                    until: Optional[str] = None, sector: Optional[str] = None, min_score: Optional[float] = None,
+                    max_score: Optional[float] = None, after: Optional[str] = None):
+    """Minden tárolt elemzés (bs, pl, előző év, mutatók, pontszám, döntés, konfigverzió) CSV / JSONL-ként,
+    streamelve; szűrés dátumra (since / until), ágazatra, pontszám-tartományra; after=<cursor>: folytatás."""
+    timer = current_timer()
+    if after and not CURSOR_RE.match(after):
+        raise HTTPException(status_code=400, detail="Hibás cursor (after).")
+    try:
+        filters = export.Filters(since, until, sector, min_score, max_score)
+        body = portfolio_export(fmt, filters, after)
+    except export.ExportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    timer.meta["export_format"] = fmt
+    name = f"airm_export_{time.strftime('%Y%m%d', time.gmtime())}.{fmt}"
+    return StreamingResponse(body, media_type=export.MEDIA_TYPES[fmt],
+                             headers={"Content-Disposition": f'attachment; filename="{name}"'})
@@ -0,0 +1,505 @@
+# app/airm_module/metrics.py — Prometheus szöveges formátumú metrikák (több worker-processz összegzésével)
+"""
+Minimális, függőség nélküli metrika-regiszter.
+
+Több uvicorn worker esetén minden processz a saját pillanatképét írja az
+AIRM_METRICS_DIR mappába (<pid>.json; háttérszál, legfeljebb másodpercenként,
+csak változás esetén, atomikus cserével); a /metrics ezeket összegzi:
+- counter és histogram: minden fájl összege; a leállt processz fájlját (fájlzár alatt) a dead.json
+  összesítőbe olvasztjuk és töröljük, így a fájlok száma nem nő és a számlálók nem csökkennek,
+- gauge: csak élő processzeké (in-flight, sor-mélység).
+A mappa alapból szerverindításonként egyedi (a felügyelő – uvicorn --workers / gunicorn – processz, különben
+maga a processz: pid + indulási idő), így egy újraindítás nem örökli az előző futás számlálóit.
+Egy újrahasznosított pid első pillanatképe előtt a mappában talált (halott elődhöz tartozó) fájl szintén az
+összesítőbe kerül; a leálló worker (recycle.stopped) retire()-rel maga olvasztja be a sajátját.
+"""
+import atexit
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: zár nélkül (egy processzes fejlesztői futás)
+    fcntl = None
+
+from starlette.routing import Match
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+FLUSH_INTERVAL_S = 1.0
+DISK_USAGE_TTL_S = 10.0
+
+
+
+def _server_key() -> str:
+    """A szerverindítás azonosítója: a felügyelő (ha van) vagy a saját processz pid-je + indulási ideje."""
+    supervised = "gunicorn.arbiter" in sys.modules or multiprocessing.parent_process() is not None
+    pid = os.getppid() if supervised else os.getpid()
+    try:
+        with open(f"/proc/{pid}/stat") as f:  # 22. mező: indulási idő (órajel-tick a boot óta)
+            return f"{pid}_{f.read().rsplit(')', 1)[1].split()[19]}"
+    except (OSError, IndexError):
+        return str(pid)
+
+
+METRICS_DIR = Path(os.environ.get("AIRM_METRICS_DIR")
+                   or Path(tempfile.gettempdir()) / f"airm_metrics_{_server_key()}")
+AGGREGATE = "dead.json"   # a leállt processzek összesített counter / histogram értékei
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+
+
+def _fmt_labels(key: Iterable[Tuple[str, str]], extra: str = "") -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in key]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _decode(rows) -> Dict[LabelKey, object]:
+    return {tuple(map(tuple, k)): v for k, v in rows}
+
+
+def _encode(d: Dict[str, Dict[LabelKey, object]]) -> dict:
+    return {n: [[list(map(list, k)), v] for k, v in vals.items()] for n, vals in d.items()}
+
+
+def _accumulate(counters, gauges, hists, snap: dict, with_gauges: bool):
+    for n, rows in snap.get("counters", {}).items():
+        d = counters.setdefault(n, {})
+        for kk, v in _decode(rows).items():
+            d[kk] = d.get(kk, 0.0) + v
+    if with_gauges:
+        for n, rows in snap.get("gauges", {}).items():
+            d = gauges.setdefault(n, {})
+            for kk, v in _decode(rows).items():
+                d[kk] = d.get(kk, 0.0) + v
+    for n, rows in snap.get("hists", {}).items():
+        d = hists.setdefault(n, {})
+        for kk, v in _decode(rows).items():
+            cur = d.get(kk)
+            d[kk] = list(v) if cur is None else [a + b for a, b in zip(cur, v)]
+
+
+def _read(path: Path) -> Optional[dict]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _write(path: Path, data: dict):
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(data), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+@contextmanager
+def _dir_lock():
+    """Kizárólagos zár a mappára: összeolvasztás és az azzal versenyző összegzés közben."""
+    METRICS_DIR.mkdir(parents=True, exist_ok=True)
+    with open(METRICS_DIR / ".lock", "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _fold(paths: Iterable[Path] = (), snaps: Iterable[dict] = ()):
+    """Halott processzek pillanatképei (fájlból / memóriából) -> AGGREGATE, a fájlok törlése. Zár alatt."""
+    paths = list(paths)
+    found = [s for s in (_read(p) for p in paths) if s is not None] + list(snaps)
+    if found:
+        counters: Dict[str, Dict[LabelKey, float]] = {}
+        hists: Dict[str, Dict[LabelKey, list]] = {}
+        agg = METRICS_DIR / AGGREGATE
+        for snap in [_read(agg) or {}] + found:
+            _accumulate(counters, {}, hists, snap, with_gauges=False)
+        _write(agg, {"pid": 0, "ts": time.time(), "counters": _encode(counters), "hists": _encode(hists)})
+    for p in paths:
+        try:
+            p.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta: Dict[str, Tuple[str, str]] = {}           # name -> (type, help)
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._hists: Dict[str, Dict[LabelKey, list]] = {}     # [bucket counts..., sum, count]
+        self._collectors = []
+        self._dirty = False
+        self._flusher: Optional[threading.Thread] = None
+        self._owner: Optional[int] = None      # a pid, amelyik a <pid>.json-t írja (fork / pid-újrahasznosítás)
+        self._retired = False
+
+    # ---- definíció ----
+    def counter(self, name: str, help_text: str):
+        self._meta[name] = ("counter", help_text)
+        self._counters.setdefault(name, {})
+        return _Bound(self, name)
+
+    def gauge(self, name: str, help_text: str):
+        self._meta[name] = ("gauge", help_text)
+        self._gauges.setdefault(name, {})
+        return _Bound(self, name)
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self._meta[name] = ("histogram", help_text)
+        self._buckets[name] = tuple(buckets)
+        self._hists.setdefault(name, {})
+        return _Bound(self, name)
+
+    def add_collector(self, fn):
+        """Scrape-kor hívott függvény, ami (name, type, help, {labels: value}) sorokat ad vissza."""
+        self._collectors.append(fn)
+
+    # ---- frissítés ----
+    def inc(self, name: str, labels=None, amount: float = 1.0):
+        k = _key(labels)
+        with self._lock:
+            d = self._counters[name] if name in self._counters else self._gauges[name]
+            d[k] = d.get(k, 0.0) + amount
+        self._touch()
+
+    def set(self, name: str, value: float, labels=None):
+        with self._lock:
+            self._gauges[name][_key(labels)] = float(value)
+        self._touch()
+
+    def observe(self, name: str, value: float, labels=None):
+        k = _key(labels)
+        buckets = self._buckets[name]
+        with self._lock:
+            h = self._hists[name].get(k)
+            if h is None:
+                h = self._hists[name][k] = [0] * (len(buckets) + 2)
+            for i, b in enumerate(buckets):
+                if value <= b:
+                    h[i] += 1
+                    break
+            h[-2] += value
+            h[-1] += 1
+        self._touch()
+
+    # ---- több processz ----
+    def _snapshot(self) -> dict:
+        with self._lock:
+            return {"pid": os.getpid(), "ts": time.time(), "counters": _encode(self._counters),
+                    "gauges": _encode(self._gauges), "hists": _encode(self._hists)}
+
+    def flush(self):
+        self._dirty = False
+        if self._retired:
+            return
+        try:
+            path = METRICS_DIR / f"{os.getpid()}.json"
+            if self._owner != os.getpid():
+                with _dir_lock():  # a fájl egy korábbi, azonos pid-ű (halott) processzé: ne írjuk felül
+                    if path.exists():
+                        _fold([path])
+                self._owner = os.getpid()
+            _write(path, self._snapshot())
+        except OSError:
+            pass
+
+    def retire(self):
+        """Processz-leállás: a saját számlálók az összesítőbe, a <pid>.json törlése; utána nem írunk."""
+        if self._retired:
+            return
+        self._retired = True
+        try:
+            with _dir_lock():
+                _fold(snaps=[self._snapshot()])   # a memóriabeli állapot a frissebb: a fájlt csak töröljük
+                if self._owner == os.getpid():
+                    (METRICS_DIR / f"{os.getpid()}.json").unlink(missing_ok=True)
+        except OSError:
+            pass
+
+    def _touch(self):
+        self._dirty = True
+        if self._flusher is None or not self._flusher.is_alive():
+            # fork után (új worker) a szál nem öröklődik: itt indul újra
+            self._flusher = threading.Thread(target=self._flush_loop, name="airm-metrics-flush", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL_S)
+            if self._dirty:
+                self.flush()
+
+    def _merged(self):
+        self.flush()
+        counters: Dict[str, Dict[LabelKey, float]] = {n: {} for n in self._counters}
+        gauges: Dict[str, Dict[LabelKey, float]] = {n: {} for n in self._gauges}
+        hists: Dict[str, Dict[LabelKey, list]] = {n: {} for n in self._hists}
+        try:
+            # zár alatt: egy másik worker épp beolvasztott fájlját ne lássuk kétszer (vagy egyszer se)
+            with _dir_lock():
+                files = {f: int(f.stem) if f.stem.isdigit() else 0 for f in METRICS_DIR.glob("*.json")}
+                dead = [f for f, pid in files.items() if pid and not _pid_alive(pid)]
+                if dead:
+                    _fold(dead)
+                    files = {f: pid for f, pid in files.items() if f not in dead}
+                    files.setdefault(METRICS_DIR / AGGREGATE, 0)
+                for f, pid in files.items():
+                    snap = _read(f)
+                    if snap is not None:
+                        _accumulate(counters, gauges, hists, snap, with_gauges=pid > 0)
+        except OSError:
+            pass
+        return counters, gauges, hists
+
+    def render(self) -> str:
+        counters, gauges, hists = self._merged()
+        out = []
+        for name, (typ, help_text) in self._meta.items():
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {typ}")
+            if typ == "counter":
+                for k, v in sorted(counters.get(name, {}).items()):
+                    out.append(f"{name}{_fmt_labels(k)} {_fmt_value(v)}")
+            elif typ == "gauge":
+                for k, v in sorted(gauges.get(name, {}).items()):
+                    out.append(f"{name}{_fmt_labels(k)} {_fmt_value(v)}")
+            else:
+                buckets = self._buckets[name]
+                for k, h in sorted(hists.get(name, {}).items()):
+                    acc = 0
+                    for b, c in zip(buckets, h):
+                        acc += c
+                        le = 'le="%s"' % _fmt_value(b)
+                        out.append(f"{name}_bucket{_fmt_labels(k, le)} {acc}")
+                    le = 'le="+Inf"'
+                    out.append(f"{name}_bucket{_fmt_labels(k, le)} {int(h[-1])}")
+                    out.append(f"{name}_sum{_fmt_labels(k)} {_fmt_value(h[-2])}")
+                    out.append(f"{name}_count{_fmt_labels(k)} {int(h[-1])}")
+        for fn in self._collectors:
+            try:
+                rows = fn(counters, gauges)
+            except Exception:
+                continue
+            for name, typ, help_text, values in rows:
+                out.append(f"# HELP {name} {help_text}")
+                out.append(f"# TYPE {name} {typ}")
+                for labels, v in values:
+                    out.append(f"{name}{_fmt_labels(_key(labels))} {_fmt_value(v)}")
+        return "\n".join(out) + "\n"
+
+
+class _Bound:
+    __slots__ = ("reg", "name")
+
+    def __init__(self, reg: Registry, name: str):
+        self.reg = reg
+        self.name = name
+
+    def inc(self, amount: float = 1.0, **labels):
+        self.reg.inc(self.name, labels, amount)
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.reg.inc(self.name, labels, -amount)
+
+    def set(self, value: float, **labels):
+        self.reg.set(self.name, value, labels)
+
+    def observe(self, value: float, **labels):
+        self.reg.observe(self.name, value, labels)
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+REGISTRY = Registry()
+atexit.register(REGISTRY.flush)
+
+REQUEST_SECONDS = REGISTRY.histogram("airm_request_duration_seconds", "AIRM request latency by endpoint")
+STAGE_SECONDS = REGISTRY.histogram("airm_stage_duration_seconds", "AIRM pipeline stage latency")
+REQUESTS = REGISTRY.counter("airm_requests_total", "AIRM requests by endpoint and status")
+IN_FLIGHT = REGISTRY.gauge("airm_requests_in_flight", "AIRM requests currently being handled")
+QUEUE_DEPTH = REGISTRY.gauge("airm_queue_depth", "Heavy AIRM requests received but not yet processing")
+UPLOAD_BYTES = REGISTRY.counter("airm_upload_bytes_total", "Bytes of uploaded PDFs")
+CACHE = REGISTRY.counter("airm_cache_requests_total", "Cache lookups by cache and result (hit/miss)")
+PDF_BACKEND = REGISTRY.counter("airm_pdf_backend_attempts_total",
+                               "PDF text extraction attempts by backend and result (ok/missing/empty/error)")
+PDF_BACKEND_SECONDS = REGISTRY.histogram("airm_pdf_backend_seconds", "PDF text extraction time by backend")
+
+# nehéz (a limits.heavy_slot sorában váró) végpontok: ezekre mérjük a sor-mélységet; a forrásuk a
+# limits.ROUTE_CLASSES, a limits modul jegyzi be (a limits importálja ezt a modult, fordítva nem lehet)
+HEAVY_ROUTES = set()
+
+
+def register_heavy_routes(routes: Iterable[str]):
+    HEAVY_ROUTES.update(routes)
+
+
+def cache_event(cache: str, hit: bool, n: int = 1):
+    CACHE.inc(n, cache=cache, result="hit" if hit else "miss")
+
+
+def _cache_ratio_collector(counters, gauges):
+    per = {}
+    for k, v in counters.get("airm_cache_requests_total", {}).items():
+        d = dict(k)
+        c = per.setdefault(d.get("cache", ""), [0.0, 0.0])
+        c[0 if d.get("result") == "hit" else 1] += v
+    vals = [({"cache": name}, hit / (hit + miss)) for name, (hit, miss) in sorted(per.items()) if hit + miss]
+    return [("airm_cache_hit_ratio", "gauge", "Cache hit ratio (all workers)", vals)]
+
+
+REGISTRY.add_collector(_cache_ratio_collector)
+
+
+def pdf_backend_attempt(backend: str, result: str, seconds: float):
+    PDF_BACKEND.inc(backend=backend, result=result)
+    PDF_BACKEND_SECONDS.observe(seconds, backend=backend)
+
+
+def _pdf_backend_ratio_collector(counters, gauges):
+    per = {}
+    for k, v in counters.get("airm_pdf_backend_attempts_total", {}).items():
+        d = dict(k)
+        c = per.setdefault(d.get("backend", ""), [0.0, 0.0])
+        c[0] += v if d.get("result") == "ok" else 0.0
+        c[1] += v
+    vals = [({"backend": name}, ok / total) for name, (ok, total) in sorted(per.items()) if total]
+    return [("airm_pdf_backend_success_ratio", "gauge",
+             "Share of extraction attempts that yielded a complete statement (all workers)", vals)]
+
+
+REGISTRY.add_collector(_pdf_backend_ratio_collector)
+
+# ---- lemezhasználat (scrape-kor, rövid TTL-lel) ----
+_disk_dirs: Dict[str, Path] = {}
+_disk_cache = {"ts": 0.0, "vals": []}
+
+
+def register_disk_dir(name: str, path: Path):
+    _disk_dirs[name] = Path(path)
+
+
+def _dir_usage(path: Path) -> Tuple[int, int]:
+    total = files = 0
+    stack = [str(path)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for e in it:
+                    try:
+                        if e.is_dir(follow_symlinks=False):
+                            stack.append(e.path)
+                        elif e.is_file(follow_symlinks=False):
+                            total += e.stat(follow_symlinks=False).st_size
+                            files += 1
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return total, files
+
+
+def _disk_collector(counters, gauges):
+    now = time.monotonic()
+    if now - _disk_cache["ts"] > DISK_USAGE_TTL_S:
+        vals_b, vals_f = [], []
+        for name, p in sorted(_disk_dirs.items()):
+            b, f = _dir_usage(p)
+            vals_b.append(({"dir": name}, b))
+            vals_f.append(({"dir": name}, f))
+        _disk_cache["vals"] = [
+            ("airm_dir_bytes", "gauge", "Disk usage of AIRM data directories", vals_b),
+            ("airm_dir_files", "gauge", "Number of files in AIRM data directories", vals_f),
+        ]
+        _disk_cache["ts"] = now
+    return _disk_cache["vals"]
+
+
+REGISTRY.add_collector(_disk_collector)
+
+
+# ---- TimingMiddleware observer ----
+class RequestObserver:
+    """A timing.TimingMiddleware hívja: in-flight, végpont- és lépés-hisztogramok."""
+
+    def __init__(self, app=None):
+        self.app = app
+
+    def route_label(self, scope) -> str:
+        routes = getattr(self.app, "routes", None) or []
+        for r in routes:
+            try:
+                match, _ = r.matches(scope)
+            except Exception:
+                continue
+            if match == Match.FULL:
+                return getattr(r, "path", "other")
+        return "other"
+
+    def started(self, scope, timer):
+        route = timer.meta.setdefault("route", self.route_label(scope))
+        IN_FLIGHT.inc(endpoint=route)
+        if route in HEAVY_ROUTES:
+            timer.state["queued"] = True
+            QUEUE_DEPTH.inc()
+
+    def finished(self, scope, timer, status: int):
+        route = timer.meta.get("route", "other")
+        IN_FLIGHT.dec(endpoint=route)
+        processing_started(timer)
+        REQUESTS.inc(endpoint=route, method=scope.get("method", ""), status=str(status))
+        REQUEST_SECONDS.observe(timer.total_ms() / 1000.0, endpoint=route)
+        for stage, ms in timer.stages.items():
+            STAGE_SECONDS.observe(ms / 1000.0, stage=stage)
+
+
+def processing_started(timer):
+    """A kérés kikerült a sorból (az endpoint elkezdte a tényleges munkát)."""
+    if timer.state.pop("queued", False):
+        QUEUE_DEPTH.dec()
+
+
+def render_latest() -> str:
+    return REGISTRY.render()
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
@@ -0,0 +1,181 @@
+# app/airm_module/recycle.py — worker-újrahasznosítás (feladatszám / RSS) és előmelegítés
+"""
+A worker-processzeket a felügyelő (uvicorn --workers N, ill. gunicorn) indítja újra, ha kilépnek; a worker
+maga dönt a cseréről, a nehéz feladatok (limits.heavy_slot) után:
+
+- AIRM_WORKER_MAX_TASKS (500; 0 = nincs): ennyi befejezett nehéz feladat után; a tényleges határ workerenként
+  legfeljebb AIRM_WORKER_MAX_TASKS_JITTER-rel (alapból a 10%-a) nagyobb, hogy a workerek ne egyszerre cserélődjenek,
+- AIRM_WORKER_MAX_RSS_MB (1024; 0 = nincs): ha a rezidens memória (Linuxon /proc/self/statm) a határ fölött
+  van egy gc.collect() után is.
+
+Csere: egy JSON logsor az `airm.worker` loggerre (reason = max_tasks | max_rss, tasks, rss_mb, uptime_s), a worker
+abbahagyja az új kapcsolatok fogadását (a többi worker veszi át őket), majd ACCEPT_GRACE_S múlva SIGTERM magunknak
+(a közben elfogadott kapcsolatok kérése is beérkezik – az uvicorn leálláskor a még kérés nélküli kapcsolatot
+bontja). Az uvicorn a futó (és a sorban váró) kéréseket végigviszi, utána kilép; a felügyelő indít helyette újat.
+Az új worker a lifespan indulásakor előmelegít (motor, PDF-backendek, python-docx – warm_up), és csak utána
+fogad kapcsolatot, így kérés nem talál hideg workert.
+
+AIRM_WORKER_RECYCLE: auto (alap) – csak felügyelt workerben (uvicorn --workers >1 / gunicorn; --reload alatt
+nem, mert azt senki nem indítaná újra), on – mindig, off – soha. Metrikák: airm_worker_recycles_total{reason},
+airm_worker_rss_bytes, airm_worker_tasks.
+"""
+import asyncio
+import gc
+import json
+import logging
+import multiprocessing
+import os
+import random
+import signal
+import sys
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+try:
+    from . import metrics
+except ImportError:  # közvetlen futtatás az airm_module mappából
+    import metrics
+
+log = logging.getLogger("airm.worker")
+
+MODE = os.environ.get("AIRM_WORKER_RECYCLE", "auto").strip().lower()
+MAX_TASKS = max(0, int(os.environ.get("AIRM_WORKER_MAX_TASKS", "500")))
+MAX_TASKS_JITTER = max(0, int(os.environ.get("AIRM_WORKER_MAX_TASKS_JITTER", str(MAX_TASKS // 10))))
+MAX_RSS_MB = float(os.environ.get("AIRM_WORKER_MAX_RSS_MB", "1024"))
+ACCEPT_GRACE_S = 1.0
+
+RECYCLES = metrics.REGISTRY.counter("airm_worker_recycles_total", "Worker recycles by reason (max_tasks/max_rss)")
+RSS = metrics.REGISTRY.gauge("airm_worker_rss_bytes", "Resident memory of the live workers (sum)")
+TASKS = metrics.REGISTRY.gauge("airm_worker_tasks", "Heavy tasks completed by the live workers since their start")
+
+try:
+    PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    PAGE_SIZE = 4096
+
+
+def rss_bytes() -> Optional[int]:
+    """Aktuális rezidens memória (nem a csúcs); ahol nincs /proc, None (az RSS-határ ott nem él)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _stop_accepting(loop) -> bool:
+    """Ez a worker ne fogadjon új kapcsolatot (a megosztott socketen a többi worker fogad tovább): az uvicorn
+    Server (a SIGTERM-kezelője a handle_exit metódusa) listening socketjeit kivesszük az event loop figyeléséből.
+    Nem Server.close(): az ugyanabban a körben már elfogadott kapcsolatot az asyncio lezárt szervernél eldobja.
+    Az uvicorn belső szerkezetére épül (a verzió a requirements.txt-ben rögzítve); ha a keresés nem talál
+    szervert (más verzió / gunicorn / nem selector alapú loop), figyelmeztet és False – ekkor azonnali SIGTERM."""
+    handler = signal.getsignal(signal.SIGTERM)
+    servers = getattr(getattr(handler, "__self__", None), "servers", None)
+    stopped = False
+    for server in servers or ():
+        for sock in server.sockets:
+            stopped = loop.remove_reader(sock.fileno()) or stopped
+    if not stopped:
+        log.warning("worker-csere: a listening socket nem vehető ki az event loopból (SIGTERM-kezelő: %r, "
+                    "uvicorn-szerver: %s); azonnali SIGTERM", handler, "van" if servers else "nincs")
+    return stopped
+
+
+def supervised() -> bool:
+    """Van-e, aki a kilépő workert újraindítja (auto mód)."""
+    if MODE in ("on", "1"):
+        return True
+    if MODE in ("off", "0"):
+        return False
+    if "gunicorn.arbiter" in sys.modules:        # gunicorn worker (fork)
+        return True
+    # uvicorn --workers N: a workereket a multiprocessing spawn indítja, argv = az uvicorn parancssora
+    return multiprocessing.parent_process() is not None and "--reload" not in sys.argv
+
+
+class Recycler:
+    def __init__(self, max_tasks: int = MAX_TASKS, jitter: int = MAX_TASKS_JITTER, max_rss_mb: float = MAX_RSS_MB):
+        self.max_tasks = max_tasks + random.randint(0, jitter) if max_tasks > 0 else 0
+        self.max_rss = int(max_rss_mb * 1024 * 1024) if max_rss_mb > 0 else 0
+        self.enabled: Optional[bool] = None      # az első feladatnál dől el (a felügyelő addigra ismert)
+        self.tasks = 0
+        self.started = time.monotonic()
+        self.recycling: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def task_done(self):
+        """Egy nehéz feladat végén (az event loop szálán, a hely felszabadítása után)."""
+        with self._lock:
+            self.tasks += 1
+            tasks = self.tasks
+        TASKS.set(tasks)
+        rss = rss_bytes()
+        if rss is not None:
+            RSS.set(rss)
+        if self.recycling is not None:
+            return
+        if self.enabled is None:
+            self.enabled = supervised() and (self.max_tasks > 0 or self.max_rss > 0)
+        if not self.enabled:
+            return
+        if self.max_tasks and tasks >= self.max_tasks:
+            self.recycle("max_tasks", rss)
+        elif self.max_rss and rss is not None and rss > self.max_rss:
+            gc.collect()
+            rss = rss_bytes()
+            if rss is not None and rss > self.max_rss:
+                self.recycle("max_rss", rss)
+
+    def recycle(self, reason: str, rss: Optional[int] = None):
+        """Egyszer: log + metrika, új kapcsolat már nem, majd SIGTERM (a kecses leállás végigviszi a futó kéréseket)."""
+        with self._lock:
+            if self.recycling is not None:
+                return
+            self.recycling = reason
+        RECYCLES.inc(reason=reason)
+        metrics.REGISTRY.flush()
+        log.info(json.dumps({
+            "event": "worker_recycle", "reason": reason, "pid": os.getpid(), "tasks": self.tasks,
+            "max_tasks": self.max_tasks or None,
+            "rss_mb": round(rss / 1048576.0, 1) if rss is not None else None,
+            "max_rss_mb": round(self.max_rss / 1048576.0, 1) if self.max_rss else None,
+            "uptime_s": round(time.monotonic() - self.started, 1),
+        }))
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is not None and _stop_accepting(loop):
+            loop.call_later(ACCEPT_GRACE_S, signal.raise_signal, signal.SIGTERM)
+        else:
+            signal.raise_signal(signal.SIGTERM)
+
+RECYCLER = Recycler()
+
+
+def started(warm_up: Optional[Callable[[], Dict[str, float]]] = None):
+    """Worker-indulás (lifespan startup, a kapcsolatok fogadása előtt): előmelegítés + logsor."""
+    t0 = time.perf_counter()
+    steps: Dict[str, float] = {}
+    if warm_up is not None:
+        try:
+            steps = warm_up()
+        except Exception as e:  # a hideg worker is kiszolgál, csak lassabban
+            log.warning("warm-up hiba: %s", e)
+    rss = rss_bytes()
+    if rss is not None:
+        RSS.set(rss)
+    TASKS.set(0)
+    log.info(json.dumps({
+        "event": "worker_start", "pid": os.getpid(), "warmup_ms": round((time.perf_counter() - t0) * 1000.0, 1),
+        "steps_ms": steps, "rss_mb": round(rss / 1048576.0, 1) if rss is not None else None,
+        "recycle": supervised(), "max_tasks": RECYCLER.max_tasks or None,
+        "max_rss_mb": MAX_RSS_MB if MAX_RSS_MB > 0 else None,
+    }))
+
+
+def stopped():
+    """Lifespan shutdown (csere után is): a processz számlálói a metrika-összesítőbe, a <pid>.json törlődik
+    (a SIGTERM-mel kilépő processzben az atexit nem fut le; az új worker pid-je ne a régi fájlt találja)."""
+    metrics.REGISTRY.retire()
@@ -0,0 +1,251 @@
+# app/airm_module/results.py — determinisztikus /recalc eredmény-cache (memória + lemez, LRU)
+"""
+Kulcs: a PDF tartalom-hash-e, a kanonikus felülírások, sector, lang, a pontozási konfiguráció és a
+motor forrásának verziója (tartalom-hash-ek) -> ugyanarra a bemenetre a /recalc nem fut újra.
+Érték: a döntés JSON (a kérésfüggő mezők nélkül) + a DOCX bájtjai.
+
+Két szint: workerenkénti memória-LRU (AIRM_RESULT_CACHE_MB, alapból 64 MB) és a workerek közös
+lemez-LRU-ja (AIRM_RESULTS_DIR/<kulcs>.json + .docx, AIRM_RESULT_DISK_MB, alapból 256 MB; találatkor
+az mtime frissül, íráskor a legrégebbiek törlődnek). Az írás atomikus (tmp + os.replace), a .json
+kerül ki utoljára, így egy félkész bejegyzést senki nem lát.
+
+A kulcs a cache belügye: kifelé (ETag, letöltési azonosító) csak a szerver titkos kulcsával (AIRM_DOWNLOAD_SECRET,
+különben egy egyszer generált, a workerek közös RESULTS_DIR/.download_secret-je) képzett HMAC-ek mennek. A
+letöltési token a kulcsot a feltöltő saved_pdf-jéhez köti és aláírja: azonos tartalom-hash ismeretében sem
+hamisítható, és csak a /recalc adja ki.
+"""
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+RESULTS_DIR = Path(os.environ.get("AIRM_RESULTS_DIR") or (Path(__file__).parent / "results")).resolve()
+MEMORY_BYTES = int(float(os.environ.get("AIRM_RESULT_CACHE_MB", "64")) * 1024 * 1024)
+DISK_BYTES = int(float(os.environ.get("AIRM_RESULT_DISK_MB", "256")) * 1024 * 1024)
+
+KEY_BYTES = 16
+
+_lock = threading.Lock()
+_memory: "OrderedDict[str, Tuple[Dict[str, Any], bytes]]" = OrderedDict()
+_memory_bytes = 0
+_digests: Dict[Tuple, str] = {}   # (útvonalak, mtime-ok, méretek) -> tartalom-hash
+
+
+def _hash_files(paths: Iterable[Path]) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for p in paths:
+        h.update(p.name.encode("utf-8") + b"\0")
+        with p.open("rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def files_digest(paths: Iterable[Path]) -> str:
+    """Fájlok tartalom-hash-e; amíg egyik fájl mtime-ja / mérete sem változik, nem olvassuk újra."""
+    paths = sorted(Path(p) for p in paths)
+    sig = tuple((str(p), st.st_mtime_ns, st.st_size) for p, st in ((p, p.stat()) for p in paths))
+    digest = _digests.get(sig)
+    if digest is None:
+        digest = _digests[sig] = _hash_files(paths)
+        if len(_digests) > 1024:
+            _digests.clear()
+            _digests[sig] = digest
+    return digest
+
+
+def _canonical(v: Any) -> Any:
+    if isinstance(v, dict):
+        return {str(k): _canonical(x) for k, x in v.items()}
+    if isinstance(v, float) and v.is_integer():
+        return int(v)
+    return v
+
+
+def result_key(pdf_digest: str, overrides: Dict[str, Any], sector: str, lang: str,
+               config_version: str, engine_version: str) -> str:
+    """A bemenetek kanonikus JSON-jának hash-e (a felülírások kulcssorrendje és az 1000 / 1000.0 nem számít)."""
+    payload = json.dumps({"pdf": pdf_digest, "overrides": _canonical(overrides or {}), "sector": sector,
+                          "lang": lang, "config": config_version, "engine": engine_version},
+                         sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=KEY_BYTES).hexdigest()
+
+
+# ---- kifelé adott azonosítók (HMAC a szerver titkos kulcsával) ----
+SECRET_FILE = RESULTS_DIR / ".download_secret"
+_secret: Optional[bytes] = None
+
+
+def _load_secret() -> bytes:
+    env = os.environ.get("AIRM_DOWNLOAD_SECRET", "").strip()
+    if env:
+        return env.encode("utf-8")
+    try:
+        return SECRET_FILE.read_bytes()
+    except FileNotFoundError:
+        pass
+    except OSError:
+        return secrets.token_bytes(32)  # nem olvasható: a token csak ebben a processzben érvényes
+    # az első worker hozza létre; os.link atomikus és nem ír felül, így minden worker ugyanazt olvassa vissza
+    tmp = SECRET_FILE.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(secrets.token_bytes(32))
+        try:
+            os.link(tmp, SECRET_FILE)
+        except FileExistsError:
+            pass
+        return SECRET_FILE.read_bytes()
+    except OSError:
+        return secrets.token_bytes(32)
+    finally:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+
+
+def _mac(data: str) -> str:
+    global _secret
+    if _secret is None:
+        _secret = _load_secret()
+    return hmac.new(_secret, data.encode("utf-8"), hashlib.sha256).hexdigest()[:32]
+
+
+def public_id(key: str) -> str:
+    """A kulcs kifelé mutatható (nem visszafejthető, nem kiszámítható) párja – ETag-ekhez."""
+    return _mac("id\0" + key)
+
+
+def download_token(key: str, owner: str) -> str:
+    """Letöltési azonosító: base64url(kulcs + a feltöltő saved_pdf-je) + "." + HMAC."""
+    payload = base64.urlsafe_b64encode(bytes.fromhex(key) + owner.encode("utf-8")).rstrip(b"=").decode("ascii")
+    return payload + "." + _mac("dl\0" + payload)
+
+
+def token_key(token: str) -> Optional[str]:
+    """Az ellenőrzött token kulcsa; hamis / sérült tokenre None."""
+    payload, dot, sig = token.rpartition(".")
+    if not dot or not hmac.compare_digest(sig.encode("utf-8"), _mac("dl\0" + payload).encode("ascii")):
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+    except (binascii.Error, ValueError):
+        return None
+    return raw[:KEY_BYTES].hex() if len(raw) > KEY_BYTES else None
+
+
+def etag(key: str) -> str:
+    return f'"{public_id(key)}"'
+
+
+def etag_matches(header: Optional[str], key: str) -> bool:
+    if not header:
+        return False
+    tag = etag(key)
+    return header.strip() == "*" or any(t.strip().removeprefix("W/") == tag for t in header.split(","))
+
+
+# ---- memória ----
+def _remember(key: str, result: Dict[str, Any], docx: bytes):
+    global _memory_bytes
+    with _lock:
+        old = _memory.pop(key, None)
+        if old is not None:
+            _memory_bytes -= len(old[1])
+        _memory[key] = (result, docx)
+        _memory_bytes += len(docx)
+        while _memory and _memory_bytes > MEMORY_BYTES:
+            _, (_, evicted) = _memory.popitem(last=False)
+            _memory_bytes -= len(evicted)
+
+
+# ---- lemez ----
+def _write(path: Path, data: bytes):
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _evict_disk():
+    try:
+        entries = [(p.stat(), p) for p in RESULTS_DIR.glob("*.json")]
+    except OSError:
+        return
+    sizes = {}
+    total = 0
+    for st, p in entries:
+        docx = p.with_suffix(".docx")
+        size = st.st_size + (docx.stat().st_size if docx.exists() else 0)
+        sizes[p] = size
+        total += size
+    for st, p in sorted(entries, key=lambda e: e[0].st_mtime_ns):
+        if total <= DISK_BYTES:
+            break
+        for f in (p, p.with_suffix(".docx")):
+            try:
+                f.unlink()
+            except OSError:
+                pass
+        total -= sizes[p]
+
+
+def get(key: str) -> Optional[Tuple[Dict[str, Any], bytes, str]]:
+    """(eredmény, DOCX bájtok, szint: "memory" | "disk") vagy None."""
+    with _lock:
+        hit = _memory.get(key)
+        if hit is not None:
+            _memory.move_to_end(key)
+            return hit[0], hit[1], "memory"
+    meta = RESULTS_DIR / f"{key}.json"
+    try:
+        result = json.loads(meta.read_text(encoding="utf-8"))
+        docx = meta.with_suffix(".docx").read_bytes()
+        os.utime(meta)
+    except (OSError, ValueError):
+        return None
+    _remember(key, result, docx)
+    return result, docx, "disk"
+
+
+def report_file(key: str) -> Optional[Tuple[Path, Dict[str, Any], os.stat_result]]:
+    """A kulcs DOCX-e a lemez-szinten (ha csak a memóriában van, kiírjuk): (útvonal, eredmény, stat) vagy None.
+    A letöltés innen streamel, a bájtokat nem töltjük be."""
+    meta = RESULTS_DIR / f"{key}.json"
+    docx = meta.with_suffix(".docx")
+    try:
+        result = json.loads(meta.read_text(encoding="utf-8"))
+        st = docx.stat()
+        os.utime(meta)
+        return docx, result, st
+    except (OSError, ValueError):
+        pass
+    with _lock:
+        hit = _memory.get(key)
+    if hit is None:
+        return None
+    put(key, hit[0], hit[1])
+    try:
+        return docx, hit[0], docx.stat()
+    except OSError:
+        return None
+
+
+def put(key: str, result: Dict[str, Any], docx: bytes):
+    _remember(key, result, docx)
+    try:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        _write(RESULTS_DIR / f"{key}.docx", docx)
+        _write(RESULTS_DIR / f"{key}.json", json.dumps(result, ensure_ascii=False).encode("utf-8"))
+        _evict_disk()
+    except OSError:
+        pass  # a lemez-szint csak gyorsítás; a memória-szint így is működik
@@ -0,0 +1,325 @@
+# app/airm_module/static_assets.py — memóriából kiszolgált statikus fájlok (előtömörítve, erős ETaggel)
+"""
+A StaticFiles helyett: induláskor a teljes mappát beolvassuk, fájlonként egyszer
+- gzip (és ha a brotli / brotlicffi csomag elérhető, br) változat – csak szöveges típusokra és ha kisebb,
+- erős ETag a tartalom hash-éből (kódolásonként külön: "<hash>", "<hash>-gz", "<hash>-br"),
+- Content-Type, Last-Modified.
+Kérésenként nincs fájlrendszer-hozzáférés: Accept-Encoding szerinti változat, If-None-Match /
+If-Modified-Since -> 304, Vary: Accept-Encoding. Range (egy tartomány, a tömörítetlen változatból, If-Range-dzsel)
+-> 206, nem teljesíthető -> 416; több tartomány / ismeretlen egység: a teljes törzs (200).
+
+Cache-Control: ujjlenyomatos eszköz (a névben tartalom-hash: app.3f9a1c2b.css, vagy ?v=<hash> a
+fájl aktuális hash-ével, lásd url()) -> 1 év + immutable; minden más no-cache (mindig revalidál, ami
+ETaggel olcsó 304). html=True: könyvtár -> index.html (perjel nélkül átirányítás), ismeretlen -> 404.html.
+
+Fejlesztői mód (AIRM_STATIC_DEV=1): kérésenként (legfeljebb DEV_RESCAN_S-enként) újra-stat-oljuk a
+mappát, és a változott / új / törölt fájlokat frissítjük – szerver-újraindítás nélkül.
+"""
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from starlette.datastructures import URL, Headers
+from starlette.responses import FileResponse, PlainTextResponse, RedirectResponse, Response
+
+try:
+    import brotli as _brotli  # type: ignore
+except ImportError:
+    try:
+        import brotlicffi as _brotli  # type: ignore
+    except ImportError:
+        _brotli = None
+
+log = logging.getLogger("airm-static")
+
+DEV = os.environ.get("AIRM_STATIC_DEV", "").lower() in ("1", "true", "yes")
+DEV_RESCAN_S = 0.5
+MAX_INMEM_BYTES = int(os.environ.get("AIRM_STATIC_MAX_BYTES", str(4 * 1024 * 1024)))  # nagyobb: lemezről
+MIN_COMPRESS_BYTES = 256
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+FINGERPRINT_RE = re.compile(r"\.[0-9a-f]{8,}\.[A-Za-z0-9]+$")
+COMPRESSIBLE = ("text/", "application/javascript", "application/json", "application/xml",
+                "image/svg+xml", "application/manifest+json")
+
+
+class Asset:
+    __slots__ = ("rel", "path", "mtime_ns", "size", "media_type", "digest", "last_modified",
+                 "fingerprinted", "variants")
+
+    def __init__(self, rel: str, path: Path, st: os.stat_result, body: Optional[bytes]):
+        self.rel = rel
+        self.path = path
+        self.mtime_ns = st.st_mtime_ns
+        self.size = st.st_size
+        media_type = mimetypes.guess_type(rel)[0] or "application/octet-stream"
+        if media_type.startswith("text/") or media_type in ("application/javascript", "application/json"):
+            media_type += "; charset=utf-8"
+        self.media_type = media_type
+        self.last_modified = formatdate(st.st_mtime, usegmt=True)
+        self.fingerprinted = bool(FINGERPRINT_RE.search(rel))
+        # kódolás -> (törzs, ETag); None törzs: túl nagy, lemezről megy (FileResponse)
+        self.variants: Dict[str, Tuple[Optional[bytes], str]] = {}
+        if body is None:
+            self.digest = f"{st.st_mtime_ns:x}-{st.st_size:x}"
+            self.variants["identity"] = (None, f'"{self.digest}"')
+            return
+        self.digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+        self.variants["identity"] = (body, f'"{self.digest}"')
+        if len(body) >= MIN_COMPRESS_BYTES and media_type.startswith(COMPRESSIBLE):
+            gz = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(gz) < len(body) * 0.9:
+                self.variants["gzip"] = (gz, f'"{self.digest}-gz"')
+            if _brotli is not None:
+                br = _brotli.compress(body, quality=11)
+                if len(br) < len(body) * 0.9:
+                    self.variants["br"] = (br, f'"{self.digest}-br"')
+
+    def etags(self) -> List[str]:
+        return [etag for _, etag in self.variants.values()]
+
+
+def _accepted(header: str) -> Dict[str, float]:
+    """Accept-Encoding -> {kódolás: q}; a '*' a meg nem nevezettekre vonatkozik."""
+    out: Dict[str, float] = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        m = re.search(r"q\s*=\s*([0-9.]+)", params)
+        if m:
+            try:
+                q = float(m.group(1))
+            except ValueError:
+                q = 0.0
+        out[name] = q
+    return out
+
+
+def _choose(asset: Asset, header: str) -> str:
+    if len(asset.variants) == 1 or not header:
+        return "identity"
+    acc = _accepted(header)
+    star = acc.get("*", 0.0)
+    best, best_q = "identity", 0.0
+    for enc in ("br", "gzip"):  # azonos q mellett a kisebb br előnyben
+        q = acc.get(enc, star)
+        if enc in asset.variants and q > best_q:
+            best, best_q = enc, q
+    return best
+
+
+def _byte_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Range: bytes=a-b | a- | -n -> (első, utolsó) bájt, zárt intervallum. None: figyelmen kívül hagyjuk
+    (más egység, több tartomány, hibás alak); ValueError: nem teljesíthető (416)."""
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = (x.strip() for x in spec.partition("-"))
+    if not dash or not (first or last) or (first and not first.isdecimal()) or (last and not last.isdecimal()):
+        return None
+    if not first:  # utolsó n bájt
+        n = int(last)
+        if n == 0 or size == 0:
+            raise ValueError(header)
+        return max(0, size - n), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+def _etag_match(header: str, etags: List[str]) -> Optional[str]:
+    """If-None-Match (gyenge összevetés): az első egyező ETag, '*' esetén a legelső."""
+    if header.strip() == "*":
+        return etags[0]
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag in etags:
+            return tag
+    return None
+
+
+def _route_path(scope) -> str:
+    """Az útvonal a mount-pont (root_path) nélkül, ahogy a mountolt alkalmazás látja ('/static/app.js' -> '/app.js')."""
+    path = scope["path"]
+    root = scope.get("root_path", "")
+    if root and path.startswith(root) and path[len(root):len(root) + 1] in ("", "/"):
+        return path[len(root):]
+    return path
+
+
+class StaticAssets:
+    """ASGI alkalmazás (app.mount("/", StaticAssets(dir, html=True))); csak GET / HEAD."""
+
+    def __init__(self, directory, html: bool = False, dev: Optional[bool] = None):
+        self.directory = Path(directory).resolve()
+        self.html = html
+        self.dev = DEV if dev is None else dev
+        self._assets: Dict[str, Asset] = {}
+        self._dirs: set = set()
+        self._lock = threading.Lock()
+        self._scanned = 0.0
+        self._scan()
+        log.info("static: %d fájl memóriában (%s, %d bájt, br=%s, dev=%s)", len(self._assets), self.directory,
+                 sum(a.size for a in self._assets.values()), _brotli is not None, self.dev)
+
+    # ---- betöltés ----
+    def _scan(self):
+        assets: Dict[str, Asset] = {}
+        dirs = {""}
+        old = self._assets
+        for root, dirnames, files in os.walk(self.directory):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+            rel_root = Path(root).relative_to(self.directory).as_posix()
+            rel_root = "" if rel_root == "." else rel_root
+            dirs.add(rel_root)
+            for fn in files:
+                if fn.startswith("."):
+                    continue
+                rel = f"{rel_root}/{fn}" if rel_root else fn
+                path = Path(root) / fn
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                prev = old.get(rel)
+                if prev is not None and prev.mtime_ns == st.st_mtime_ns and prev.size == st.st_size:
+                    assets[rel] = prev
+                    continue
+                try:
+                    body = path.read_bytes() if st.st_size <= MAX_INMEM_BYTES else None
+                except OSError:
+                    continue
+                assets[rel] = Asset(rel, path, st, body)
+                if old:
+                    log.info("static: frissítve %s", rel)
+        self._assets, self._dirs = assets, dirs
+        self._scanned = time.monotonic()
+
+    def _refresh(self):
+        if time.monotonic() - self._scanned < DEV_RESCAN_S:
+            return
+        with self._lock:
+            if time.monotonic() - self._scanned >= DEV_RESCAN_S:
+                self._scan()
+
+    def url(self, rel: str, prefix: str = "") -> str:
+        """Cache-busting URL: prefix/rel?v=<tartalom-hash> – ezt a böngésző egy évig tarthatja."""
+        asset = self._assets.get(rel.lstrip("/"))
+        return f"{prefix}/{rel.lstrip('/')}" + (f"?v={asset.digest}" if asset else "")
+
+    # ---- kiszolgálás ----
+    def lookup(self, rel: str) -> Optional[Asset]:
+        if self.dev:
+            self._refresh()
+        return self._assets.get(rel)
+
+    def response(self, rel: str, headers: Headers, method: str = "GET", query: str = "",
+                 status_code: int = 200) -> Optional[Response]:
+        asset = self.lookup(rel)
+        if asset is None:
+            return None
+        return self._asset_response(asset, headers, method, query, status_code)
+
+    def _asset_response(self, asset: Asset, headers: Headers, method: str, query: str,
+                        status_code: int) -> Response:
+        ranged = status_code == 200 and "range" in headers and asset.variants["identity"][0] is not None
+        # a tartomány a tömörítetlen bájtokra vonatkozik (mint a StaticFiles-nál)
+        enc = "identity" if ranged else _choose(asset, headers.get("accept-encoding", ""))
+        body, etag = asset.variants[enc]
+        immutable = asset.fingerprinted or (f"v={asset.digest}" in query.split("&"))
+        out = {
+            "cache-control": IMMUTABLE if immutable else REVALIDATE,
+            "etag": etag,
+            "last-modified": asset.last_modified,
+        }
+        if len(asset.variants) > 1:
+            out["vary"] = "Accept-Encoding"
+        if status_code == 200:
+            inm = headers.get("if-none-match")
+            if inm is not None:
+                matched = _etag_match(inm, asset.etags())
+                if matched is not None:
+                    out["etag"] = matched
+                    return Response(status_code=304, headers=out)
+            elif headers.get("if-modified-since") and _not_modified_since(headers["if-modified-since"], asset):
+                return Response(status_code=304, headers=out)
+        if body is None:  # nagy fájl: lemezről (Range-támogatással)
+            return FileResponse(asset.path, status_code=status_code, headers=out, media_type=asset.media_type,
+                                method=method)
+        if enc != "identity":
+            out["content-encoding"] = enc
+        else:
+            out["accept-ranges"] = "bytes"
+        if ranged and headers.get("if-range", etag) in (etag, asset.last_modified):
+            try:
+                span = _byte_range(headers["range"], len(body))
+            except ValueError:
+                return PlainTextResponse("Range Not Satisfiable", status_code=416,
+                                         headers={**out, "content-range": f"bytes */{len(body)}"})
+            if span is not None:
+                start, end = span
+                out["content-range"] = f"bytes {start}-{end}/{len(body)}"
+                status_code, body = 206, body[start:end + 1]
+        out["content-length"] = str(len(body))
+        if method == "HEAD":  # a GET fejlécei (a változat hosszával), törzs nélkül
+            return Response(status_code=status_code, headers=out, media_type=asset.media_type)
+        return Response(body, status_code=status_code, headers=out, media_type=asset.media_type)
+
+    async def __call__(self, scope, receive, send):
+        assert scope["type"] == "http"
+        response = self._route(scope)
+        await response(scope, receive, send)
+
+    def _route(self, scope) -> Response:
+        method = scope["method"]
+        if method not in ("GET", "HEAD"):
+            return PlainTextResponse("Method Not Allowed", status_code=405, headers={"allow": "GET, HEAD"})
+        headers = Headers(scope=scope)
+        query = scope.get("query_string", b"").decode("latin-1")
+        route_path = _route_path(scope)
+        parts = [p for p in route_path.split("/") if p and p != "."]
+        if ".." in parts:
+            return PlainTextResponse("Not Found", status_code=404)
+        rel = "/".join(parts)
+
+        resp = self.response(rel, headers, method, query) if rel else None
+        if resp is not None:
+            return resp
+        if self.html:
+            if rel in self._dirs:
+                index = f"{rel}/index.html" if rel else "index.html"
+                if index in self._assets:
+                    if not scope["path"].endswith("/"):
+                        url = URL(scope=scope)
+                        return RedirectResponse(url=str(url.replace(path=url.path + "/")))
+                    return self.response(index, headers, method, query)
+            resp = self.response("404.html", headers, method, query, status_code=404)
+            if resp is not None:
+                return resp
+        return PlainTextResponse("Not Found", status_code=404)
+
+
+def _not_modified_since(value: str, asset: Asset) -> bool:
+    try:
+        since = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return False
+    return int(asset.mtime_ns // 1_000_000_000) <= since
@@ -0,0 +1,143 @@
+# app/airm_module/store.py — feldolgozott elemzések tartós tára cégenként (idősorhoz PDF-újraolvasás nélkül)
+"""
+<AIRM_ANALYSES_DIR>/<cégkulcs>/<saved_pdf tő>.json – egy elemzés: cégazonosító, beszámolási év, tárgyévi és
+előző évi bs/pl (ahogy a /preview kinyerte), az ágazat és az utolsó /recalc kézi felülírásai.
+A cégkulcs a motor company_key()-e (törzsszám vagy cégnév slug). Az írás atomikus (tmp + os.replace),
+így több worker is írhat egyszerre; olvasáskor a sérült / félkész fájlokat kihagyjuk.
+A saved_pdf -> cégkulcs párokat processzenként megjegyezzük (_KEYS), így a /recalc nem keres a tár minden
+cégmappájában; változatlan felülírásnál (ismételt /recalc, 304) nem írunk.
+"""
+import glob
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+ANALYSES_DIR = Path(os.environ.get("AIRM_ANALYSES_DIR") or (Path(__file__).parent / "analyses")).resolve()
+KEY_INDEX_SIZE = 20000
+
+_KEYS: Dict[str, str] = {}   # saved_pdf tő -> cégkulcs (beszúrási sorrend; a legrégebbi esik ki)
+
+
+def _remember_key(stem: str, company_key: str):
+    _KEYS.pop(stem, None)
+    _KEYS[stem] = company_key
+    while len(_KEYS) > KEY_INDEX_SIZE:
+        _KEYS.pop(next(iter(_KEYS)), None)
+
+
+def _path(company_key: str, saved_pdf: str) -> Path:
+    return ANALYSES_DIR / company_key / (Path(saved_pdf).stem + ".json")
+
+
+def _write(path: Path, record: Dict[str, Any]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(record, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _read(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def save(company_key: str, saved_pdf: str, identity: Dict[str, Any], bs, pl, bs_prev, pl_prev,
+         sector: Optional[str] = None) -> Path:
+    """sector=None (újraolvasás ágazat nélkül, pl. /recalc cache-miss): a korábbi rekord ágazata marad."""
+    now = time.time()
+    path = _path(company_key, saved_pdf)
+    if sector is None:
+        sector = (_read(path) or {}).get("sector") if path.exists() else None
+    record = {"saved_pdf": saved_pdf, "company_key": company_key, "identity": identity,
+              "year": identity.get("year"), "sector": sector, "bs": dict(bs), "pl": dict(pl), "bs_prev": bs_prev, "pl_prev": pl_prev,
+              "overrides": {}, "parsed_at": now, "updated_at": now}
+    _write(path, record)
+    _remember_key(Path(saved_pdf).stem, company_key)
+    return path
+
+
+def find(saved_pdf: str) -> Optional[Path]:
+    stem = Path(saved_pdf).stem
+    key = _KEYS.get(stem)
+    if key is not None:
+        path = ANALYSES_DIR / key / (stem + ".json")
+        if path.exists():
+            return path
+    if not ANALYSES_DIR.exists():
+        return None
+    # másik worker mentette / újraindulás után: egyszeri keresés (a tő felhasználói adat -> escape)
+    path = next(iter(ANALYSES_DIR.glob(f"*/{glob.escape(stem)}.json")), None)
+    if path is not None:
+        _remember_key(stem, path.parent.name)
+    return path
+
+
+def set_overrides(saved_pdf: str, overrides: Dict[str, Any], sector: Optional[str] = None) -> bool:
+    """Az elemzés kézi felülírásai (a legutóbbi /recalc-é; az idősor ezekkel számol), és az ágazata, ha megadták.
+    Ha sem a felülírások, sem az ágazat nem változott, nem írunk."""
+    path = find(saved_pdf)
+    record = _read(path) if path is not None else None
+    if record is None:
+        return False
+    overrides = overrides or {}
+    if record.get("overrides") == overrides and (sector is None or record.get("sector") == sector):
+        return True
+    record["overrides"] = overrides
+    if sector is not None:
+        record["sector"] = sector
+    record["updated_at"] = time.time()
+    _write(path, record)
+    return True
+
+
+def company_records(company_key: str) -> List[Dict[str, Any]]:
+    d = ANALYSES_DIR / company_key
+    if not d.is_dir() or d.parent != ANALYSES_DIR:  # a kulcs nem léphet ki a tárból
+        return []
+    return [r for r in (_read(p) for p in sorted(d.glob("*.json"))) if r is not None]
+
+
+def _names(d: Path, dirs: bool) -> List[str]:
+    try:
+        with os.scandir(d) as it:
+            return sorted(e.name for e in it if (e.is_dir() if dirs else e.name.endswith(".json")))
+    except OSError:  # közben törölt könyvtár
+        return []
+
+
+def iter_records(after: Optional[str] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """(kurzor, rekord) cégkulcs, majd fájlnév szerinti sorrendben; kurzor = "<cégkulcs>/<tő>". after: az eddig
+    átvett utolsó kurzor – az ennél nem nagyobbak kimaradnak (folytatás). Egyszerre egy rekord van a memóriában."""
+    if not ANALYSES_DIR.exists():
+        return
+    after_key, _, after_stem = (after or "").partition("/")
+    for key in _names(ANALYSES_DIR, dirs=True):
+        if after and key < after_key:
+            continue
+        for name in _names(ANALYSES_DIR / key, dirs=False):
+            stem = name[:-len(".json")]
+            if after and key == after_key and stem <= after_stem:
+                continue
+            record = _read(ANALYSES_DIR / key / name)
+            if record is not None:
+                yield f"{key}/{stem}", record
+
+
+def companies() -> List[Dict[str, Any]]:
+    """[{company_key, name, tax_number, years, analyses}] – a cégek listája a tárból."""
+    out = []
+    if not ANALYSES_DIR.exists():
+        return out
+    for d in sorted(p for p in ANALYSES_DIR.iterdir() if p.is_dir()):
+        recs = company_records(d.name)
+        if not recs:
+            continue
+        latest = max(recs, key=lambda r: r.get("updated_at") or 0)
+        ident = latest.get("identity") or {}
+        out.append({"company_key": d.name, "name": ident.get("name"), "tax_number": ident.get("tax_number"),
+                    "years": sorted({r["year"] for r in recs if r.get("year")}), "analyses": len(recs)})
+    return out
@@ -0,0 +1,130 @@
+# app/airm_module/timeline.py — többéves idősor a tárolt elemzésekből (store.py), PDF-kinyerés nélkül
+"""
+Egy cég elemzéseiből évenkénti bs/pl sorozat: az Y év értéke elsősorban az Y évi beszámoló tárgyév
+oszlopából jön, ha ott hiányzik, az Y+1 évi beszámoló előző év oszlopából (mezőnként; a forrás jelölve).
+Azonos évre több elemzésnél a legutóbb frissített nyer. A kézi felülírások (a /recalc-é) érvényesek.
+
+Az évenkénti mutatókat a motor KPI-gráfja egyetlen batch-hívásban számolja (évek = forgatókönyvek),
+a trendeket (évről évre változás, CAGR, lineáris meredekség) egy menetben, az összes oszlopra egyszerre.
+"""
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# nyers idősor-oszlopok (section, mező)
+SERIES_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ("pl", "Értékesítés nettó árbevétele"),
+    ("pl", "Üzemi (üzleti) tevékenység eredménye"),
+    ("pl", "Adózott eredmény"),
+    ("bs", "Eszközök összesen"),
+    ("bs", "Forgóeszközök"),
+    ("bs", "Saját tőke"),
+    ("bs", "Rövid lejáratú kötelezettségek"),
+    ("bs", "Kötelezettségek összesen"),
+)
+
+
+def _num(v) -> Optional[float]:
+    return float(v) if isinstance(v, (int, float)) and not isinstance(v, bool) else None
+
+
+def assemble(records: List[Dict[str, Any]], apply_overrides: Callable) -> Dict[str, Any]:
+    """{years, values: {év: {"bs", "pl"}}, sources: {év: {"current": pdf | None, "filled": {mező: pdf}}}, undated}
+    apply_overrides: a motor apply_overrides(bs, pl, bs_prev, pl_prev, overrides) függvénye."""
+    current: Dict[int, Tuple[float, Dict[str, Any]]] = {}   # év -> (updated_at, record)
+    previous: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+    undated = []
+    for r in records:
+        year = r.get("year")
+        if not isinstance(year, int):
+            undated.append(r.get("saved_pdf"))
+            continue
+        bs, pl = dict(r.get("bs") or {}), dict(r.get("pl") or {})
+        bs_prev, pl_prev = dict(r.get("bs_prev") or {}), dict(r.get("pl_prev") or {})
+        apply_overrides(bs, pl, bs_prev, pl_prev, r.get("overrides") or None)
+        ts = r.get("updated_at") or 0
+        item = {"bs": bs, "pl": pl, "bs_prev": bs_prev, "pl_prev": pl_prev, "saved_pdf": r.get("saved_pdf")}
+        if year not in current or current[year][0] <= ts:
+            current[year] = (ts, item)
+        if year - 1 not in previous or previous[year - 1][0] <= ts:
+            previous[year - 1] = (ts, item)
+
+    values: Dict[int, Dict[str, Dict[str, Any]]] = {}
+    sources: Dict[int, Dict[str, Any]] = {}
+    for year in sorted(set(current) | set(previous)):
+        cur = current.get(year, (0, None))[1]
+        prv = previous.get(year, (0, None))[1]
+        bs = dict(cur["bs"]) if cur else {}
+        pl = dict(cur["pl"]) if cur else {}
+        filled = {}
+        if prv:
+            for sec, target, src in (("bs", bs, prv["bs_prev"]), ("pl", pl, prv["pl_prev"])):
+                for k, v in src.items():
+                    if target.get(k) is None and v is not None:
+                        target[k] = v
+                        filled[f"{sec}.{k}"] = prv["saved_pdf"]
+        values[year] = {"bs": bs, "pl": pl}
+        sources[year] = {"current": cur["saved_pdf"] if cur else None, "filled": filled}
+    return {"years": sorted(values), "values": values, "sources": sources, "undated": undated}
+
+
+def trends(years: Sequence[int], columns: Dict[str, List[Any]]) -> Dict[str, Dict[str, Any]]:
+    """Oszloponként: yoy (évről évre, arány), change (utolsó - első), cagr, slope (évenkénti lineáris meredekség).
+    Egy menet az éveken, minden oszlop akkumulátora egyszerre frissül."""
+    names = list(columns)
+    cols = [columns[n] for n in names]
+    k = len(names)
+    n = [0] * k
+    sx = [0.0] * k; sy = [0.0] * k; sxy = [0.0] * k; sxx = [0.0] * k
+    first: List[Optional[Tuple[int, float]]] = [None] * k
+    last: List[Optional[Tuple[int, float]]] = [None] * k
+    yoy: List[List[Optional[float]]] = [[] for _ in range(k)]
+    prev: List[Optional[float]] = [None] * k
+    for i, year in enumerate(years):
+        x = float(year)
+        for c in range(k):
+            y = _num(cols[c][i])
+            p = prev[c]
+            yoy[c].append(None if i == 0 or y is None or not p else round(y / p - 1.0, 6))
+            prev[c] = y
+            if y is None:
+                continue
+            n[c] += 1; sx[c] += x; sy[c] += y; sxy[c] += x * y; sxx[c] += x * x
+            if first[c] is None:
+                first[c] = (year, y)
+            last[c] = (year, y)
+    out = {}
+    for c, name in enumerate(names):
+        den = n[c] * sxx[c] - sx[c] * sx[c]
+        slope = (n[c] * sxy[c] - sx[c] * sy[c]) / den if n[c] >= 2 and den else None
+        cagr = None
+        if first[c] and last[c] and last[c][0] > first[c][0] and first[c][1] > 0 and last[c][1] > 0:
+            cagr = round((last[c][1] / first[c][1]) ** (1.0 / (last[c][0] - first[c][0])) - 1.0, 6)
+        out[name] = {
+            "yoy": yoy[c],
+            "change": (last[c][1] - first[c][1]) if first[c] and last[c] else None,
+            "cagr": cagr,
+            "slope": slope,
+        }
+    return out
+
+
+def build(engine, records: List[Dict[str, Any]], sector: str = "default") -> Dict[str, Any]:
+    """A teljes idősor-válasz: évek, nyers oszlopok, évenkénti mutatók + pontszám, trendek, források."""
+    asm = assemble(records, engine.apply_overrides)
+    years = asm["years"]
+    series = {f"{sec}.{f}": [asm["values"][y][sec].get(f) for y in years] for sec, f in SERIES_FIELDS}
+    kpi_names = tuple(k for k in engine.RATIO_KEYS if k != "Kockázati besorolás") + ("score",)
+    kpis: Dict[str, List[Any]] = {k: [] for k in kpi_names}
+    if years:
+        scenarios = [engine.kpi_inputs(asm["values"][y]["bs"], asm["values"][y]["pl"], sector) for y in years]
+        base = engine.evaluate_kpis(asm["values"][years[0]]["bs"], asm["values"][years[0]]["pl"], sector)
+        for row in engine.evaluate_scenarios(base, scenarios, kpi_names):
+            for name, v in zip(kpi_names, row):
+                kpis[name].append(v)
+    return {
+        "years": years,
+        "series": series,
+        "kpis": kpis,
+        "trends": trends(years, {**series, **kpis}),
+        "sources": {str(y): asm["sources"][y] for y in years},
+        "undated": asm["undated"],
+    }
@@ -0,0 +1,142 @@
+# app/airm_module/timing.py — kérésenkénti lépésidők (Server-Timing + strukturált log)
+import contextvars
+import json
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+log = logging.getLogger("airm.timing")
+
+_current: contextvars.ContextVar[Optional["StageTimer"]] = contextvars.ContextVar("airm_stage_timer", default=None)
+
+
+class StageTimer:
+    """Egy kérés lépésideje (ms) + metaadatai (PDF oldalszám, méret, ...).
+    budget: opcionális időkeret (budget.Budget) – a lépések elején és végén, ill. a check()-nél ellenőrizzük."""
+    __slots__ = ("endpoint", "t0", "stages", "meta", "state", "budget")
+
+    def __init__(self, endpoint: str = ""):
+        self.endpoint = endpoint
+        self.t0 = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.meta: Dict[str, Any] = {}   # a JSON logsorba kerül
+        self.state: Dict[str, Any] = {}  # belső állapot (nem logoljuk)
+        self.budget = None
+
+    @contextmanager
+    def stage(self, name: str):
+        budget = self.budget
+        if budget is not None:
+            budget.enter(name)
+        t = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.add(name, (time.perf_counter() - t) * 1000.0)
+            if budget is not None:
+                budget.leave(name)
+        if budget is not None:  # a lépés a kereten túl futott -> a következő már nem indul
+            budget.check()
+
+    def check(self):
+        """Kooperatív megszakítási pont (pl. oldalanként): Cancelled, ha a keret lejárt / a kliens bontott."""
+        if self.budget is not None:
+            self.budget.check()
+
+    def add(self, name: str, ms: float):
+        self.stages[name] = self.stages.get(name, 0.0) + ms
+
+    def mark_since_start(self, name: str):
+        """A kérés kezdete óta eltelt idő (pl. 'upload': a multipart feldolgozás az endpoint előtt fut).
+        Csak az első jelölés számít (a sorban állás előtt a limits.heavy_slot is jelöli)."""
+        if name not in self.stages:
+            self.add(name, (time.perf_counter() - self.t0) * 1000.0)
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.t0) * 1000.0
+
+    def server_timing(self, total_ms: Optional[float] = None) -> str:
+        parts = [f"{name};dur={ms:.1f}" for name, ms in self.stages.items()]
+        parts.append(f"total;dur={(self.total_ms() if total_ms is None else total_ms):.1f}")
+        return ", ".join(parts)
+
+
+class _NullTimer:
+    """Időzítő nélküli hívásokhoz (CLI, GUI): ugyanaz a felület, nem mér semmit."""
+    __slots__ = ()
+
+    @property
+    def meta(self) -> Dict[str, Any]:
+        return {}
+
+    @property
+    def state(self) -> Dict[str, Any]:
+        return {}
+
+    @contextmanager
+    def stage(self, name: str):
+        yield self
+
+    def add(self, name: str, ms: float):
+        pass
+
+    def mark_since_start(self, name: str):
+        pass
+
+    def check(self):
+        pass
+
+
+NULL_TIMER = _NullTimer()
+
+
+def current_timer():
+    t = _current.get()
+    return t if t is not None else NULL_TIMER
+
+
+class TimingMiddleware:
+    """Tiszta ASGI middleware: Server-Timing fejléc + egy JSON logsor kérésenként.
+
+    observer: opcionális objektum .started(scope, timer) / .finished(scope, timer, status)
+    metódusokkal (pl. metrics.RequestObserver)."""
+
+    def __init__(self, app, observer=None):
+        self.app = app
+        self.observer = observer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timer = StageTimer(scope.get("path", ""))
+        token = _current.set(timer)
+        status = {"code": 500}
+        if self.observer is not None:
+            self.observer.started(scope, timer)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timer.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            rec = {
+                "event": "airm_request",
+                "method": scope.get("method"),
+                "path": scope.get("path"),
+                "status": status["code"],
+                "total_ms": round(timer.total_ms(), 1),
+                "stages": {k: round(v, 1) for k, v in timer.stages.items()},
+            }
+            rec.update(timer.meta)
+            log.info(json.dumps(rec, ensure_ascii=False))
+            if self.observer is not None:
+                self.observer.finished(scope, timer, status["code"])
@@ -0,0 +1,145 @@
+# app/airm_module/whatif.py — érzékenységvizsgálat / what-if rács a motor KPI-gráfján (DOCX nélkül)
+"""
+Rács: {"mode": "pct"|"abs", "bs": {mező: [lépések]}, "pl": {mező: [lépések]}}
+  pct  a lépés százalék a kiinduló értékhez képest (-10 = 10%-kal kevesebb) – alapértelmezés
+  abs  a lépés abszolút eltérés (ezer HUF)
+A forgatókönyvek a tengelyek Descartes-szorzata; mindet egyetlen hívás értékeli ki
+(airm_kpigraph.KpiGraph.grid: egy csomópont csak a tőle függő tengelyek lépésein fut újra).
+Fordulópont (break_even): egy tengely mentén (a többi tengely rögzített) két szomszédos rácspont között,
+ahol a döntés megváltozik; a pontos helyet felezéssel keressük.
+"""
+import itertools
+import math
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+MAX_SCENARIOS = int(os.environ.get("AIRM_WHATIF_MAX", "20000"))
+MAX_BREAK_EVEN = 64          # ennyi fordulópontot finomítunk felezéssel (a többi csak rácsköz)
+BISECT_STEPS = 30
+BISECT_TOL = {"pct": 0.01, "abs": 1.0}
+MAX_VALUE = 1e15             # ezer HUF; efölött (és a nem véges lépéseknél) GridError, nem OverflowError -> 500
+
+
+class GridError(ValueError):
+    """Hibás what-if rács (a végpont 400-zal adja vissza)."""
+
+
+class Axis:
+    __slots__ = ("key", "section", "field", "base", "steps")
+
+    def __init__(self, section: str, field: str, base, steps: List[float]):
+        self.key = f"{section}.{field}"
+        self.section = section
+        self.field = field
+        self.base = base
+        self.steps = steps
+
+    def raw(self, step: float, mode: str) -> Optional[float]:
+        if not isinstance(self.base, (int, float)):
+            return None
+        return self.base * (1 + step / 100.0) if mode == "pct" else self.base + step
+
+    def value(self, step: float, mode: str) -> Optional[int]:
+        """A mező értéke a lépésnél (egész ezer HUF, mint a kézi felülírásnál); ismeretlen alapból None."""
+        v = self.raw(step, mode)
+        return None if v is None else int(round(v))
+
+
+def parse_grid(grid: Any, bs: Dict[str, Any], pl: Dict[str, Any], fields: Dict[str, Sequence[str]]) -> Tuple[List[Axis], str]:
+    """grid (JSON dict) -> (tengelyek, mód). fields: {"bs": KPI_BS_FIELDS, "pl": KPI_PL_FIELDS}."""
+    if not isinstance(grid, dict):
+        raise GridError("A rács egy JSON objektum legyen.")
+    mode = grid.get("mode", "pct")
+    if mode not in BISECT_TOL:
+        raise GridError(f"Ismeretlen mód: {mode!r} (pct | abs).")
+    axes: List[Axis] = []
+    for section, values in (("bs", bs), ("pl", pl)):
+        sec = grid.get(section) or {}
+        if not isinstance(sec, dict):
+            raise GridError(f"A(z) {section} rész {{mező: [lépések]}} legyen.")
+        for field, steps in sec.items():
+            if field not in fields[section]:
+                raise GridError(f"{section}.{field}: nem KPI-bemenet (nem hat a mutatókra / pontszámra).")
+            if not isinstance(steps, list) or not steps:
+                raise GridError(f"{section}.{field}: a lépések nem üres lista legyen.")
+            try:
+                clean = sorted({float(x) for x in steps})
+            except (TypeError, ValueError, OverflowError):
+                raise GridError(f"{section}.{field}: a lépések számok legyenek.")
+            if not all(math.isfinite(x) for x in clean):
+                raise GridError(f"{section}.{field}: a lépések véges számok legyenek.")
+            axis = Axis(section, field, values.get(field), clean)
+            for x in (clean[0], clean[-1]):  # az érték a lépésben monoton: a szélső lépések elég
+                v = axis.raw(x, mode)
+                if v is not None and not (math.isfinite(v) and abs(v) <= MAX_VALUE):
+                    raise GridError(f"{section}.{field}: a(z) {x:g} lépésnél az érték kívül esik ±{MAX_VALUE:g}-en.")
+            axes.append(axis)
+    if not axes:
+        raise GridError("Üres rács: legalább egy bs/pl mezőt adj meg lépésekkel.")
+    n = 1
+    for a in axes:
+        n *= len(a.steps)
+    if n > MAX_SCENARIOS:
+        raise GridError(f"Túl sok forgatókönyv: {n} (legfeljebb {MAX_SCENARIOS}).")
+    return axes, mode
+
+
+def _changes(axes: List[Axis], steps: Sequence[float], mode: str) -> Dict[str, Any]:
+    return {a.key: a.value(s, mode) for a, s in zip(axes, steps)}
+
+
+def run_grid(engine, base_values: Dict[str, Any], axes: List[Axis], mode: str,
+             decide: Callable[[Any, Any], Tuple[Optional[float], str]]) -> Dict[str, Any]:
+    """A teljes rács kiértékelése. decide(saját tőke, pontszám) -> (risk_score, döntéskód).
+    Kimenet: oszlopok + sorok (tengelylépések, mutatók, score, risk_score, decision_code) és fordulópontok."""
+    kpis = tuple(k for k in engine.RATIO_KEYS if k != "Kockázati besorolás") + ("score",)
+    outputs = kpis + ("bs.Saját tőke",)
+    grid = list(itertools.product(*[a.steps for a in axes]))
+    results = engine.evaluate_grid(base_values, [(a.key, [a.value(s, mode) for s in a.steps]) for a in axes], outputs)
+
+    rows = []
+    codes: Dict[Tuple[float, ...], str] = {}
+    for g, res in zip(grid, results):
+        risk, code = decide(res[-1], res[-2])
+        codes[g] = code
+        rows.append([*g, *res[:-1], risk, code])
+
+    def code_at(steps: Sequence[float]) -> str:
+        res = engine.evaluate_scenarios(base_values, [_changes(axes, steps, mode)], outputs)[0]
+        return decide(res[-1], res[-2])[1]
+
+    break_even = []
+    refined = 0
+    for i, axis in enumerate(axes):
+        other_axes = [a for j, a in enumerate(axes) if j != i]
+        for fixed in itertools.product(*[a.steps for a in other_axes]):
+            line = [fixed[:i] + (s,) + fixed[i:] for s in axis.steps]
+            for lo, hi in zip(line, line[1:]):
+                if codes[lo] == codes[hi]:
+                    continue
+                item = {"axis": axis.key, "between": [lo[i], hi[i]], "from": codes[lo], "to": codes[hi],
+                        "at": {a.key: s for a, s in zip(other_axes, fixed)}}
+                if refined < MAX_BREAK_EVEN:
+                    refined += 1
+                    a_, b_ = lo[i], hi[i]
+                    for _ in range(BISECT_STEPS):
+                        if b_ - a_ <= BISECT_TOL[mode]:
+                            break
+                        mid = (a_ + b_) / 2.0
+                        if code_at(fixed[:i] + (mid,) + fixed[i:]) == codes[lo]:
+                            a_ = mid
+                        else:
+                            b_ = mid
+                    item["flip_at"] = round(b_, 2)
+                    item["value"] = axis.value(b_, mode)
+                break_even.append(item)
+
+    return {
+        "mode": mode,
+        "axes": [{"key": a.key, "base": a.base, "steps": a.steps} for a in axes],
+        "columns": [a.key for a in axes] + list(kpis) + ["risk_score", "decision_code"],
+        "rows": rows,
+        "scenarios": len(rows),
+        "break_even": break_even,
+        "break_even_refined": refined,
+    }
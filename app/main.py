@@ -24,12 +24,12 @@ async def report(file: UploadFile = File(...)):
     return {"ok": True, "report": "generated.docx (placeholder)"}
 
 # app/main.py — UNIFIED (fix: CORSMiddleware import + order)
-import sys, importlib, logging
+import os, sys, importlib, logging
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI
-from fastapi.responses import FileResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware  # <-- LÉNYEGES!
 
 log = logging.getLogger("airm-unified")
@@ -45,12 +45,24 @@ for p in (str(BASE_DIR), str(AIRM_PKG_DIR), str(ROOT_DIR)):
     if p not in sys.path:
         sys.path.insert(0, p)
 
-app = FastAPI(title="AIRM Unified", version="2025.10.02", docs_url=None, redoc_url=None)
+from airm_module.static_assets import StaticAssets
 
-# --- CORS (szigorítható domain-listára) ---
+# --- Lifespan: a mountolt AIRM app lifespanjét (worker-előmelegítés, recycle.py) a Starlette magától nem futtatja ---
+@asynccontextmanager
+async def lifespan(app):
+    sub = getattr(app, "_airm_app", None)
+    if sub is None:
+        yield
+        return
+    async with sub.router.lifespan_context(sub):
+        yield
+
+app = FastAPI(title="AIRM Unified", version="2025.10.02", docs_url=None, redoc_url=None, lifespan=lifespan)
+
+# --- CORS (AIRM_CORS_ORIGINS: vesszővel elválasztott domain-lista; alapból "*") ---
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=[o.strip() for o in os.environ.get("AIRM_CORS_ORIGINS", "*").split(",") if o.strip()],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -69,6 +81,26 @@ def healthz():
 def airm_healthz():
     return {"ok": bool(getattr(app, "_airm_mounted", False))}
 
+# --- Readiness: tartós túlterhelésnél (a nehéz sor a cél fölött) 503, hogy a load balancer máshova küldjön ---
+@app.get("/readyz")
+def readyz():
+    if not getattr(app, "_airm_mounted", False):
+        return JSONResponse({"ready": False, "reason": "airm not mounted"}, status_code=503)
+    from airm_module import limits
+    state = limits.readiness()
+    if state["ready"]:
+        return state
+    return JSONResponse(state, status_code=503, headers={"Retry-After": str(state["retry_after"])})
+
+# --- Prometheus metrikák (minden worker-processz összegezve) ---
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    try:
+        from airm_module import metrics as airm_metrics
+    except Exception as e:
+        return PlainTextResponse(f"# metrics unavailable: {e}\n", status_code=503)
+    return PlainTextResponse(airm_metrics.render_latest(), media_type=airm_metrics.CONTENT_TYPE)
+
 # --- AIRM subapp mount (/airm) ---
 def try_mount_airm():
     try:
@@ -78,6 +110,7 @@ def try_mount_airm():
             raise RuntimeError("airm_module.main nincs 'app' FastAPI instance")
         app.mount("/airm", sub)
         setattr(app, "_airm_mounted", True)
+        setattr(app, "_airm_app", sub)
         log.info("Mounted AIRM at /airm")
     except Exception as e:
         setattr(app, "_airm_mounted", False)
@@ -85,19 +118,20 @@ def try_mount_airm():
 
 try_mount_airm()
 
-# --- Statikus site (/ → public/) ---
-if PUBLIC_DIR.is_dir():
-    app.mount("/static", StaticFiles(directory=str(PUBLIC_DIR)), name="static")
+# --- Statikus site (/ → public/, memóriából, előtömörítve; AIRM_STATIC_DEV=1: automatikus frissítés) ---
+SITE = StaticAssets(PUBLIC_DIR, html=True) if PUBLIC_DIR.is_dir() else None
+if SITE is not None:
+    app.mount("/static", SITE, name="static")
 
 @app.get("/", include_in_schema=False)
-def root_index():
-    idx = PUBLIC_DIR / "index.html"
-    if idx.is_file():
-        return FileResponse(str(idx))
+def root_index(request: Request):
+    resp = SITE.response("index.html", request.headers, request.method) if SITE is not None else None
+    if resp is not None:
+        return resp
     return JSONResponse({"error": "index.html not found in /public"}, status_code=404)
 
-if PUBLIC_DIR.is_dir():
-    app.mount("/", StaticFiles(directory=str(PUBLIC_DIR), html=True), name="site")
+if SITE is not None:
+    app.mount("/", SITE, name="site")
     log.info("Mounted static site at / from %s", PUBLIC_DIR)
 else:
     log.warning("public/ not found at %s", PUBLIC_DIR)
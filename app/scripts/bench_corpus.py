@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Szintetikus e-beszámoló korpusz a benchmarkokhoz.
+
+- Mérleg + eredménykimutatás sorok sorkóddal, ezres csoportosítással.
+- Változatok: 2 oszlopos (előző év / tárgyév), 3 oszlopos (középen Módosítások),
+  "ragadt" számsorok ("510 432155 474"), ahol a két oszlop összefolyik, valamint
+  "tight": valódi, szűk oszlopközű PDF, ahol csak a széles számok érnek össze.
+- Minimális, függőség nélküli PDF író (Helvetica + ő/ű kiegészítő kódolás),
+  hogy a read_pdf_text is mérhető legyen valódi kliens PDF nélkül.
+"""
+import random
+import zlib
+from pathlib import Path
+
+BS_ROWS = [
+    ("001.", "A.", "Befektetett eszközök"),
+    ("002.", "I.", "Immateriális javak"),
+    ("010.", "II.", "Tárgyi eszközök"),
+    ("020.", "III.", "Befektetett pénzügyi eszközök"),
+    ("032.", "B.", "Forgóeszközök"),
+    ("033.", "I.", "Készletek"),
+    ("040.", "II.", "Követelések"),
+    ("041.", "1.", "Követelések áruszállításból és szolgáltatásból (vevők)"),
+    ("060.", "IV.", "Pénzeszközök"),
+    ("063.", "C.", "Aktív időbeli elhatárolások"),
+    ("067.", "", "Eszközök (aktívák) összesen"),
+    ("068.", "D.", "Saját tőke"),
+    ("069.", "I.", "Jegyzett tőke"),
+    ("076.", "VI.", "Eredménytartalék"),
+    ("079.", "IX.", "Adózott eredmény"),
+    ("080.", "E.", "Céltartalékek"),
+    ("084.", "F.", "Kötelezettségek"),
+    ("086.", "II.", "Hosszú lejáratú kötelezettségek"),
+    ("096.", "III.", "Rövid lejáratú kötelezettségek"),
+    ("101.", "3.", "Kötelezettségek áruszállításból és szolgáltatásból (szállítók)"),
+    ("111.", "G.", "Passzív időbeli elhatárolások"),
+    ("115.", "", "Források (passzívák) összesen"),
+]
+
+PL_ROWS = [
+    ("001.", "", "01. Belföldi értékesítés nettó árbevétele"),
+    ("002.", "", "02. Exportértékesítés nettó árbevétele"),
+    ("003.", "I.", "Értékesítés nettó árbevétele"),
+    ("006.", "III.", "Egyéb bevételek"),
+    ("012.", "IV.", "Anyagjellegű ráfordítások"),
+    ("016.", "V.", "Személyi jellegű ráfordítások"),
+    ("017.", "VI.", "Értékcsökkenési leírás"),
+    ("018.", "VII.", "Egyéb ráfordítások"),
+    ("019.", "A.", "Üzemi (üzleti) tevékenység eredménye"),
+    ("020.", "VIII.", "Pénzügyi műveletek bevételei"),
+    ("021.", "IX.", "Pénzügyi műveletek ráfordításai"),
+    ("022.", "B.", "Pénzügyi műveletek eredménye"),
+    ("023.", "C.", "Adózás előtti eredmény"),
+    ("024.", "X.", "Adófizetési kötelezettség"),
+    ("025.", "D.", "Adózott eredmény"),
+]
+
+COMPANY_NAMES = [
+    "Minta Kereskedelmi Kft.", "Duna Gépgyártó Zrt.", "Tisza Építőipari Kft.", "Balaton Szolgáltató Bt.",
+    "Mátra Energia Kft.", "Hernád Logisztikai Kft.", "Őrség Élelmiszeripari Zrt.", "Kőrös Fűtéstechnika Kft.",
+]
+
+COLUMN_HEADER_2 = "Sorszám A tétel megnevezése Előző év Tárgyév"
+COLUMN_HEADER_3 = "Sorszám A tétel megnevezése Előző év Előző év(ek) módosításai Tárgyév"
+
+FILLER_LABELS = [
+    "Vagyoni értékű jogok", "Szellemi termékek", "Ingatlanok és a kapcsolódó vagyoni értékű jogok",
+    "Műszaki berendezések, gépek, járművek", "Egyéb berendezések, felszerelések, járművek",
+    "Beruházások, felújítások", "Tartós részesedés kapcsolt vállalkozásban", "Anyagok",
+    "Befejezetlen termelés és félkész termékek", "Áruk", "Követelések kapcsolt vállalkozással szemben",
+    "Egyéb követelések", "Pénztár, csekkek", "Bankbetétek", "Tőketartalék", "Lekötött tartalék",
+    "Rövid lejáratú kölcsönök", "Vevőktől kapott előlegek", "Egyéb rövid lejáratú kötelezettségek",
+]
+
+
+def fmt_grouped(v: int, paren_neg: bool = True) -> str:
+    """510432 -> '510 432'; negatívnál '(510 432)' vagy '-510 432'."""
+    s = f"{abs(int(v)):,}".replace(",", " ")
+    if v < 0:
+        return f"({s})" if paren_neg else f"-{s}"
+    return s
+
+
+def _row_values(rng: random.Random, scale: int):
+    prev = rng.randint(scale // 20, scale)
+    cur = int(prev * rng.uniform(0.7, 1.4))
+    if rng.random() < 0.08:
+        cur = -cur
+    return prev, cur
+
+
+def company_identity(seed: int = 1):
+    """(cégnév, adószám) determinisztikusan a seed-ből."""
+    rng = random.Random(seed * 7919)
+    name = COMPANY_NAMES[seed % len(COMPANY_NAMES)]
+    tax = f"{rng.randint(10_000_000, 29_999_999)}-{rng.randint(1, 5)}-{rng.randint(1, 44):02d}"
+    return name, tax
+
+
+def statement_rows(seed: int = 1, filler_rows: int = 0, scale: int = 3_000_000, mod_ratio: float = 0.0):
+    """(section, code, roman, label, prev, mod, cur) sorok determinisztikusan.
+
+    mod_ratio: a sorok ekkora hányadában nem nulla a Módosítások oszlop."""
+    rng = random.Random(seed)
+    rows = []
+    for code, roman, label in BS_ROWS:
+        prev, cur = _row_values(rng, scale)
+        mod = -rng.randint(1, max(1, prev // 50)) if mod_ratio and rng.random() < mod_ratio else 0
+        rows.append(("bs", code, roman, label, prev, mod, cur))
+    for i in range(filler_rows):
+        prev, cur = _row_values(rng, scale // 10)
+        label = FILLER_LABELS[i % len(FILLER_LABELS)]
+        rows.append(("bs", f"{120 + i:03d}.", "", label, prev, 0, cur))
+    for code, roman, label in PL_ROWS:
+        prev, cur = _row_values(rng, scale * 3)
+        rows.append(("pl", code, roman, label, prev, 0, cur))
+    return rows
+
+
+def series_rows(seed: int = 1, years: int = 5, filler_rows: int = 0, scale: int = 3_000_000, mod_ratio: float = 0.0):
+    """Egy cég egymást követő évei: az N. év előző éve az (N-1). év tárgyéve (a PDF-ek egymásra épülnek)."""
+    rng = random.Random(seed * 31 + 1)
+    series = [statement_rows(seed, filler_rows, scale, mod_ratio)]
+    for _ in range(years - 1):
+        rows = []
+        for sec, code, roman, label, _prev, _mod, cur in series[-1]:
+            nxt = int(cur * rng.uniform(0.8, 1.25))
+            mod = -rng.randint(1, max(1, abs(cur) // 50)) if mod_ratio and rng.random() < mod_ratio else 0
+            rows.append((sec, code, roman, label, cur, mod, nxt))
+        series.append(rows)
+    return series
+
+
+def render_line(row, layout: str = "2col", paren_neg: bool = True) -> str:
+    _sec, code, roman, label, prev, mod, cur = row
+    head = " ".join(x for x in (code, roman, label) if x)
+    p, c = fmt_grouped(prev, paren_neg), fmt_grouped(cur, paren_neg)
+    if layout == "3col":
+        return f"{head} {p} {fmt_grouped(mod, paren_neg)} {c}"
+    if layout == "glued":
+        return f"{head} {p}{c}"
+    return f"{head} {p} {c}"
+
+
+def _header_lines(seed: int, layout: str, year: int):
+    name, tax = company_identity(seed)
+    return [name, f"Adószám: {tax}", f"{year}. ÉVI EGYSZERŰSÍTETT ÉVES BESZÁMOLÓ", "A MÉRLEGE",
+            "Adatok: ezer forintban", COLUMN_HEADER_3 if layout == "3col" else COLUMN_HEADER_2]
+
+
+def _note_line(i: int, rng: random.Random) -> str:
+    return (f"{i + 1}. A társaság a számviteli politikájában rögzítettek szerint "
+            f"{rng.randint(1, 99)} %-os értékhatár felett egyedileg értékel.")
+
+
+def statement_text(seed: int = 1, filler_rows: int = 0, layout: str = "2col", notes_lines: int = 0,
+                   mod_ratio: float = 0.0, year: int = 2024, rows=None) -> str:
+    rows = rows or statement_rows(seed, filler_rows, mod_ratio=mod_ratio)
+    out = _header_lines(seed, layout, year)
+    pl_started = False
+    for r in rows:
+        if r[0] == "pl" and not pl_started:
+            pl_started = True
+            out.append("EREDMÉNYKIMUTATÁS")
+        out.append(render_line(r, layout))
+    if notes_lines:
+        out.append("KIEGÉSZÍTŐ MELLÉKLET")
+        rng = random.Random(seed + 7)
+        for i in range(notes_lines):
+            out.append(_note_line(i, rng))
+    return "\n".join(out)
+
+
+# ---- minimális PDF író ----
+_PDF_EXTRA = {"ő": (0x80, "odblacute"), "ű": (0x81, "udblacute"), "Ő": (0x82, "Odblacute"),
+              "Ű": (0x83, "Udblacute"), "−": (0x84, "minus")}
+_DIGIT_W = 0.556  # Helvetica számjegy szélesség (em)
+_CHAR_W = {" ": 0.278, "(": 0.333, ")": 0.333, "-": 0.333, "−": 0.584}  # a többi számjegy-szélességű
+
+
+def _pdf_str(s: str) -> bytes:
+    out = bytearray()
+    for ch in s:
+        b = _PDF_EXTRA[ch][0] if ch in _PDF_EXTRA else ch.encode("cp1252", "replace")[0]
+        if ch in "()\\":
+            out += b"\\" + bytes([b])
+        elif b < 32 or b > 126:
+            out += b"\\%03o" % b
+        else:
+            out.append(b)
+    return bytes(out)
+
+
+def write_pdf(path: Path, pages, font_size: int = 8) -> Path:
+    """pages: oldalanként [(x, y, szöveg), ...] lista (PDF koordináták, bal alsó sarok)."""
+    objs = []
+
+    def add(b: bytes) -> int:
+        objs.append(b)
+        return len(objs)
+
+    diffs = " ".join(f"{c} /{n}" for c, n in _PDF_EXTRA.values())
+    font = add(("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding << /Type /Encoding "
+                f"/BaseEncoding /WinAnsiEncoding /Differences [{diffs}] >> >>").encode())
+    pages_id = add(b"")
+    kids = []
+    for items in pages:
+        body = bytearray(b"BT /F1 %d Tf\n" % font_size)
+        for x, y, t in items:
+            body += b"1 0 0 1 %.2f %.2f Tm (" % (x, y) + _pdf_str(t) + b") Tj\n"
+        body += b"ET"
+        data = zlib.compress(bytes(body))
+        c = add(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(data) + data + b"\nendstream")
+        kids.append(add((f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 595 842] "
+                         f"/Resources << /Font << /F1 {font} 0 R >> >> /Contents {c} 0 R >>").encode()))
+    objs[pages_id - 1] = (f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] "
+                          f"/Count {len(kids)} >>").encode()
+    cat = add(f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode())
+    out = bytearray(b"%PDF-1.4\n")
+    offs = []
+    for i, o in enumerate(objs, 1):
+        offs.append(len(out))
+        out += b"%d 0 obj\n" % i + o + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1)
+    for o in offs:
+        out += b"%010d 00000 n \n" % o
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, cat, xref)
+    path = Path(path)
+    path.write_bytes(bytes(out))
+    return path
+
+
+def _text_w(s: str, size: int) -> float:
+    return sum(_CHAR_W.get(ch, _DIGIT_W) for ch in s) * size
+
+
+def _right(x_right: float, s: str, size: int) -> float:
+    return x_right - _text_w(s, size)
+
+
+def statement_pdf(path: Path, seed: int = 1, filler_rows: int = 0, layout: str = "2col",
+                  notes_lines: int = 0, font_size: int = 8, mod_ratio: float = 0.0, year: int = 2024,
+                  rows=None) -> Path:
+    """A statement_text() PDF megfelelője, oszlopokba igazított számokkal. rows: pl. series_rows() egy éve."""
+    rows = rows or statement_rows(seed, filler_rows, mod_ratio=mod_ratio)
+    lead = font_size + 4
+    # tight: a tárgyév oszlop jobb széle = előző év jobb széle + a legszélesebb tárgyévi szám + 0.5 pt
+    tight_right = 470.5 + max(_text_w(fmt_grouped(r[6]), font_size) for r in rows)
+    pages, cur = [], []
+    y = 800
+
+    def put(x, t):
+        nonlocal y, cur
+        if y < 40:
+            pages.append(cur)
+            cur, y = [], 800
+        cur.append((x, y, t))
+
+    def nl():
+        nonlocal y
+        y -= lead
+
+    for t in _header_lines(seed, layout, year):
+        put(40, t)
+        nl()
+    pl_started = False
+    for r in rows:
+        if r[0] == "pl" and not pl_started:
+            pl_started = True
+            put(40, "EREDMÉNYKIMUTATÁS")
+            nl()
+        _sec, code, roman, label, prev, mod, cv = r
+        put(40, " ".join(x for x in (code, roman, label) if x))
+        p, c = fmt_grouped(prev), fmt_grouped(cv)
+        if layout == "glued":
+            # a két oszlop szorosan egymás mellett: extract_text() szóköz nélkül fűzi össze
+            put(_right(520, p + c, font_size), p + c)
+        elif layout == "tight":
+            # jobbra zárt oszlopok szűk közzel: a széles tárgyévi szám hozzáér az előző évhez
+            # (pdfplumber x_tolerance alatt) -> extract_text() ragadt láncot ad, a koordináták nem
+            put(_right(470, p, font_size), p)
+            put(_right(tight_right, c, font_size), c)
+        else:
+            put(_right(420, p, font_size), p)
+            if layout == "3col":
+                m = fmt_grouped(mod)
+                put(_right(480, m, font_size), m)
+            put(_right(555, c, font_size), c)
+        nl()
+    if notes_lines:
+        rng = random.Random(seed + 7)
+        put(40, "KIEGÉSZÍTŐ MELLÉKLET")
+        nl()
+        for i in range(notes_lines):
+            put(40, _note_line(i, rng))
+            nl()
+    if cur:
+        pages.append(cur)
+    return write_pdf(path, pages, font_size)
+
+
+# name -> (filler_rows, layout, notes_lines)
+CASES = {
+    "small_2col": (0, "2col", 0),
+    "small_3col": (0, "3col", 0),
+    "small_glued": (0, "glued", 0),
+    "large_2col": (400, "2col", 600),
+    "large_3col": (400, "3col", 600),
+}
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+PDF-átadás benchmark: a feltöltött PDF átadása egy másik processzben futó kinyerésnek – bájtokként
+(pickle-ben a teljes tartalom) vs airm_pdftext.PdfSource-ként (pickle-ben csak útvonal + tartalom-hash, a worker
+a fájlt mmap-pel olvassa).
+
+Használat (repo gyökérből):
+    python app/scripts/bench_handoff.py                       # 50 oldal + 8 MB "szkennelt" tartalom, 20 átadás
+    python app/scripts/bench_handoff.py --pages 300 --pad-mb 32 --plumber
+    python app/scripts/bench_handoff.py --pdf beszamolo.pdf
+
+A szintetikus PDF szöveges (kicsi); --pad-mb egy inkrementális frissítésben hivatkozás nélküli, tömöríthetetlen
+stream-et fűz hozzá (mint egy szkennelt oldal képe), így a fájl a szkennelt beszámolók méretű.
+Mért értékek: az átadott pickle mérete, egy átadás ideje a worker-processzbe (a worker a kapott tartalom méretét
+adja vissza: bytes-nál a pickle-ből kicsomagolt másolatét, PdfSource-nál a leképezését), és egy teljes
+pdfium-kinyerés a workerben mindkét módon; a szövegnek egyeznie kell (különben a kilépési kód 1). Egy processzen
+belül (a szolgáltatás mostani felállása) ugyanez: Path vs PdfSource (pdfplumber csak --plumber-rel, lassú).
+"""
+import argparse
+import os
+import pickle
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+ROOT_DIR = SCRIPTS_DIR.parents[1]
+AIRM_DIR = ROOT_DIR / "app" / "airm_module" / "airm_src"
+
+for p in (str(SCRIPTS_DIR), str(AIRM_DIR)):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+import bench_corpus  # noqa: E402
+import airm_pdftext  # noqa: E402
+
+LINES_PER_PAGE = 64
+
+
+def _init():
+    for p in (str(SCRIPTS_DIR), str(AIRM_DIR)):
+        if p not in sys.path:
+            sys.path.insert(0, p)
+
+
+def pad_pdf(src: Path, dst: Path, mb: float) -> Path:
+    """src + inkrementális frissítés egy hivatkozás nélküli, mb méretű véletlen stream-mel (a szöveg nem változik)."""
+    data = src.read_bytes()
+    prev = int(re.findall(rb"startxref\s+(\d+)", data)[-1])
+    trailer = re.findall(rb"trailer\s*<<(.*?)>>", data, re.S)[-1]
+    size = int(re.search(rb"/Size\s+(\d+)", trailer).group(1))
+    root = re.search(rb"/Root\s+(\d+\s+\d+\s+R)", trailer).group(1)
+    blob = os.urandom(int(mb * 1024 * 1024))
+    with open(dst, "wb") as f:
+        f.write(data if data.endswith(b"\n") else data + b"\n")
+        offset = f.tell()
+        f.write(b"%d 0 obj\n<< /Length %d >>\nstream\n" % (size, len(blob)) + blob + b"\nendstream\nendobj\n")
+        xref = f.tell()
+        f.write(b"xref\n%d 1\n%010d 00000 n \ntrailer\n<< /Size %d /Root %s /Prev %d >>\nstartxref\n%d\n%%%%EOF\n"
+                % (size, offset, size + 1, root, prev, xref))
+    return dst
+
+
+def _touch(data):
+    """Worker: csak az átadás – a kapott tartalom mérete (bytes: a kicsomagolt másolat; PdfSource: a leképezés)."""
+    if isinstance(data, bytes):
+        return len(data)
+    with data.opened() as mm:
+        return len(mm)
+
+
+def _extract(data):
+    """Worker: teljes pdfium-kinyerés a kapott bájtokból / forrásból."""
+    import pypdfium2 as pdfium
+    if isinstance(data, bytes):
+        pdf = pdfium.PdfDocument(data)
+        try:
+            parts = []
+            for i in range(len(pdf)):
+                page = pdf[i]
+                tp = page.get_textpage()
+                try:
+                    parts.append(airm_pdftext._pdfium_page(tp, page.get_height())[0])
+                finally:
+                    tp.close()
+                    page.close()
+        finally:
+            pdf.close()
+        return "\n".join(parts)
+    return airm_pdftext.PdfiumBackend().extract(data).text
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1e3
+
+
+def main():
+    ap = argparse.ArgumentParser(description="PDF-átadás: bytes vs PdfSource (útvonal + mmap)")
+    ap.add_argument("--pages", type=int, default=50, help="A szintetikus PDF (legalább) ennyi oldalas")
+    ap.add_argument("--pad-mb", type=float, default=8.0, help="Szkennelt tartalom (MB) a szintetikus PDF-hez")
+    ap.add_argument("--pdf", help="Meglévő PDF mérése generálás helyett")
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--plumber", action="store_true", help="pdfplumber helyben is (lassú)")
+    args = ap.parse_args()
+    if not airm_pdftext.PdfiumBackend.available():
+        print("A mérés a pypdfium2-t használja.", file=sys.stderr)
+        return 2
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.pdf:
+            pdf = Path(args.pdf)
+        else:
+            pdf = Path(tmp) / f"ebeszamolo_{args.pages}p.pdf"
+            bench_corpus.statement_pdf(pdf, seed=7, filler_rows=200, layout="2col",
+                                       notes_lines=args.pages * LINES_PER_PAGE)
+            if args.pad_mb > 0:
+                pdf = pad_pdf(pdf, Path(tmp) / f"ebeszamolo_{args.pages}p_{args.pad_mb:g}mb.pdf", args.pad_mb)
+        payloads = {"bytes": pdf.read_bytes(), "PdfSource": airm_pdftext.PdfSource(pdf)}
+        print(f"PDF: {pdf.name} ({pdf.stat().st_size / 1e6:.1f} MB)")
+        print(f"{'':22s} {'bytes':>10s} {'PdfSource':>10s}")
+        sizes = {k: len(pickle.dumps(v, pickle.HIGHEST_PROTOCOL)) for k, v in payloads.items()}
+        print(f"{'pickle (B)':22s} {sizes['bytes']:>10d} {sizes['PdfSource']:>10d}")
+
+        bad = 0
+        with ProcessPoolExecutor(max_workers=1, initializer=_init) as pool:
+            pool.submit(_touch, b"").result()   # a worker indulása ne számítson
+            touch = {k: _best(lambda v=v: pool.submit(_touch, v).result(), args.repeat) for k, v in payloads.items()}
+            texts = {k: pool.submit(_extract, v).result() for k, v in payloads.items()}
+            extract = {k: _best(lambda v=v: pool.submit(_extract, v).result(), max(1, args.repeat // 5))
+                       for k, v in payloads.items()}
+        bad += texts["bytes"] != texts["PdfSource"]
+        print(f"{'átadás, worker (ms)':22s} {touch['bytes']:>10.2f} {touch['PdfSource']:>10.2f}")
+        print(f"{'kinyerés, worker (ms)':22s} {extract['bytes']:>10.1f} {extract['PdfSource']:>10.1f}")
+
+        local = {}
+        for name in ("pdfium", "pdfplumber") if args.plumber else ("pdfium",):
+            cls = airm_pdftext.BACKENDS[name]
+            if not cls.available():
+                continue
+            backend = cls()
+            runs = {"Path": lambda: backend.extract(pdf).text,
+                    "PdfSource": lambda: backend.extract(airm_pdftext.PdfSource(pdf)).text}
+            bad += runs["Path"]() != runs["PdfSource"]()
+            n = max(1, args.repeat // (20 if name == "pdfplumber" else 5))
+            local[name] = {k: _best(f, n) for k, f in runs.items()}
+        for name, r in local.items():
+            print(f"{name + ', helyben (ms)':22s} {r['Path']:>10.1f} {r['PdfSource']:>10.1f}   (Path vs PdfSource)")
+    print("OK" if not bad else f"{bad} szöveg-eltérés")
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+PDF-kinyerés memória-benchmark: csúcs-RSS egy szintetikus, sokoldalas (alapból 300 oldalas) e-beszámolón.
+
+Használat (repo gyökérből, Linuxon – /proc/self kell):
+    python app/scripts/bench_memory.py                         # minden telepített backend, 300 oldal
+    python app/scripts/bench_memory.py --backends pdfplumber --pages 500 --max-mb 80
+
+Backendenként külön processzben fut (tiszta RSS): az importok utáni RSS az alap, a kinyerés alatti csúcs
+(VmHWM, a /proc/self/clear_refs-szel nullázva; ha az nem megy, 2 ms-os mintavétel) és az alap különbsége a
+mért érték. Korai kilépés nélkül olvas (minden oldal). Ha bármelyik backend túllépi a --max-mb plafont,
+a kilépési kód 1 – a kinyerés memóriája nem nőhet az oldalszámmal (oldalanként felszabadítjuk a cache-eket).
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+ROOT_DIR = SCRIPTS_DIR.parents[1]
+AIRM_DIR = ROOT_DIR / "app" / "airm_module" / "airm_src"
+
+for p in (str(SCRIPTS_DIR), str(AIRM_DIR)):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+import bench_corpus  # noqa: E402
+
+LINES_PER_PAGE = 64   # a bench_corpus.write_pdf oldalanként ennyi sort tesz ki 8 pt-os betűvel (kb.)
+DEFAULT_MAX_MB = 64.0
+
+
+def _status_kb(field: str) -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def _child(backend_name: str, pdf_path: str):
+    """Gyerekprocessz: egy backend, egy teljes kinyerés; JSON az stdout-ra."""
+    import threading
+    import airm_pdftext
+
+    from airm_columns import ColumnRows
+
+    backend = airm_pdftext.BACKENDS[backend_name]()
+    backend.available()  # a backend könyvtárának importja ne számítson a kinyeréshez
+    acc = ColumnRows()
+    base_kb = _status_kb("VmRSS")
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")   # VmHWM := VmRSS
+        sampled = False
+    except OSError:
+        sampled = True
+    peak = {"kb": base_kb}
+    done = threading.Event()
+
+    def sample():
+        while not done.is_set():
+            peak["kb"] = max(peak["kb"], _status_kb("VmRSS"))
+            time.sleep(0.002)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    if sampled:
+        sampler.start()
+    t0 = time.perf_counter()
+    doc = backend.extract(Path(pdf_path), on_words=acc.feed)   # mint a motor read_and_parse-a
+    secs = time.perf_counter() - t0
+    done.set()
+    peak_kb = max(peak["kb"], _status_kb("VmRSS")) if sampled else _status_kb("VmHWM")
+    print(json.dumps({
+        "backend": backend_name, "pages": doc.pages, "pages_read": doc.pages_read,
+        "text_mb": len(doc.text.encode("utf-8")) / 1e6,
+        "column_rows": len(acc.rows()),
+        "base_mb": base_kb / 1024.0, "peak_mb": peak_kb / 1024.0, "growth_mb": (peak_kb - base_kb) / 1024.0,
+        "seconds": secs, "method": "sampled" if sampled else "VmHWM",
+    }))
+
+
+def make_pdf(out_dir: Path, pages: int) -> Path:
+    path = out_dir / f"ebeszamolo_{pages}p.pdf"
+    bench_corpus.statement_pdf(path, seed=7, filler_rows=200, layout="2col", notes_lines=pages * LINES_PER_PAGE)
+    return path
+
+
+def main():
+    ap = argparse.ArgumentParser(description="PDF-kinyerés csúcs-RSS mérése sokoldalas szintetikus PDF-en")
+    ap.add_argument("--pages", type=int, default=300, help="A szintetikus PDF (legalább) ennyi oldalas")
+    ap.add_argument("--backends", default="", help="Vesszővel (alapból minden telepített backend)")
+    ap.add_argument("--max-mb", type=float, default=DEFAULT_MAX_MB, help="Megengedett RSS-növekedés (MB)")
+    ap.add_argument("--pdf", help="Meglévő PDF mérése generálás helyett")
+    ap.add_argument("--child", nargs=2, metavar=("BACKEND", "PDF"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        _child(*args.child)
+        return 0
+    if not Path("/proc/self/status").exists():
+        print("A mérés /proc/self/status-t használ (Linux).", file=sys.stderr)
+        return 2
+
+    import airm_pdftext
+    names = [n.strip() for n in args.backends.split(",") if n.strip()] or list(airm_pdftext.BACKENDS)
+    names = [n for n in names if n in airm_pdftext.BACKENDS and airm_pdftext.BACKENDS[n].available()]
+
+    failed = []
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf = Path(args.pdf) if args.pdf else make_pdf(Path(tmp), args.pages)
+        print(f"PDF: {pdf.name} ({pdf.stat().st_size / 1e6:.1f} MB), plafon: +{args.max_mb:.0f} MB RSS")
+        print(f"{'backend':<12}{'oldal':>7}{'szöveg MB':>11}{'alap MB':>9}{'csúcs MB':>10}{'növekedés':>11}{'idő s':>8}")
+        for name in names:
+            out = subprocess.run([sys.executable, __file__, "--child", name, str(pdf)],
+                                 capture_output=True, text=True)
+            if out.returncode != 0:
+                print(f"{name:<12} HIBA: {out.stderr.strip().splitlines()[-1] if out.stderr else out.returncode}")
+                failed.append(name)
+                continue
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            ok = r["growth_mb"] <= args.max_mb
+            print(f"{name:<12}{r['pages']:>7}{r['text_mb']:>11.2f}{r['base_mb']:>9.1f}{r['peak_mb']:>10.1f}"
+                  f"{r['growth_mb']:>+10.1f}{'' if ok else '!':1}{r['seconds']:>8.2f}")
+            if not ok:
+                failed.append(name)
+    if failed:
+        print(f"RSS-plafon túllépve / hiba: {', '.join(failed)}")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
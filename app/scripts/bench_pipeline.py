@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+AIRM pipeline mikrobenchmark – minden lépés külön mérve.
+
+Használat (repo gyökérből):
+    python app/scripts/bench_pipeline.py                      # teljes futás, JSON a bench_results/ alá
+    python app/scripts/bench_pipeline.py --quick --only parse  # gyors, szűrt futás
+    python app/scripts/bench_pipeline.py --compare bench_results/elozo.json
+
+Mért lépések: read_pdf_text (alap lánc + backendenként), read_and_parse, segment_sections, parse_financials_with_raw,
+current_year_value_from_line, a 4 szállító-detektor, compute_ratios,
+score_from_rules, evaluate_kpis, update_kpis (egy felülírt mező), evaluate_grid (what-if rács),
+build_cf_section, make_docx.
+Riport: átviteli sebesség (ops/s), p50/p95/p99, allokációk (tracemalloc külön menetben).
+"""
+import argparse
+import gc
+import importlib.util
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+ROOT_DIR = SCRIPTS_DIR.parents[1]
+AIRM_DIR = ROOT_DIR / "app" / "airm_module" / "airm_src"
+
+for p in (str(SCRIPTS_DIR), str(AIRM_DIR)):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+import bench_corpus  # noqa: E402
+
+
+def load_engine():
+    spec = importlib.util.spec_from_file_location("airm_main_module", str(AIRM_DIR / "main.py"))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)  # type: ignore
+    return mod
+
+
+def percentile(sorted_vals, q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = (len(sorted_vals) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+
+def measure(fn, repeat: int, min_time: float, warmup: int = 2):
+    """Idők mikroszekundumban, hívásonként. Legalább `repeat` hívás és `min_time` mp."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    gc_was = gc.isenabled()
+    gc.disable()
+    try:
+        t_start = time.perf_counter()
+        while len(samples) < repeat or (time.perf_counter() - t_start) < min_time:
+            t0 = time.perf_counter_ns()
+            fn()
+            samples.append((time.perf_counter_ns() - t0) / 1000.0)
+            if len(samples) >= repeat * 50:
+                break
+    finally:
+        if gc_was:
+            gc.enable()
+    return samples
+
+
+def measure_alloc(fn):
+    """Egy hívás allokációi: csúcs (kB) és a hívás alatt lefoglalt blokkok száma."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        base_cur, _ = tracemalloc.get_traced_memory()
+        fn()
+        cur, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(max(0, s.count_diff) for s in after.compare_to(before, "filename"))
+    return {
+        "alloc_peak_kb": round((peak - base_cur) / 1024.0, 1),
+        "alloc_retained_kb": round((cur - base_cur) / 1024.0, 1),
+        "alloc_blocks": blocks,
+    }
+
+
+def build_stages(mod, case: str, workdir: Path):
+    """(stage_name, callable, units_per_call, unit) lista egy korpusz-esethez."""
+    filler, layout, notes = bench_corpus.CASES[case]
+    text = bench_corpus.statement_text(seed=7, filler_rows=filler, layout=layout, notes_lines=notes)
+    pdf = bench_corpus.statement_pdf(workdir / f"{case}.pdf", seed=7, filler_rows=filler,
+                                     layout=layout, notes_lines=notes)
+    lines = [ln for ln in text.splitlines() if any(ch.isdigit() for ch in ln)]
+    bs, pl, raw = mod.parse_financials_with_raw(text)
+    prev_bs = {k: (raw.get("balance", {}).get(k) or {}).get("previous") for k in raw.get("balance", {})}
+    ratios = mod.compute_ratios(bs, pl)
+    derived = {
+        "cr": ratios.get("Current ratio"), "qr": ratios.get("Quick ratio"), "de": ratios.get("Debt/Equity"),
+        "dso": ratios.get("Vevőállomány forgási ideje (nap)"), "dio": ratios.get("Készlet forgási ideje (nap)"),
+        "dpo": ratios.get("Szállítói napok (DPO)"), "ccc": None,
+    }
+    out_docx = workdir / f"{case}.docx"
+    kpis = mod.evaluate_kpis(bs, pl, "kereskedelem")
+    bs_override = dict(bs, **{"Készletek": (bs.get("Készletek") or 0) + 1000})
+    ns, stl = pl.get("Értékesítés nettó árbevétele") or 0, bs.get("Rövid lejáratú kötelezettségek") or 0
+    whatif_axes = [("pl.Értékesítés nettó árbevétele", [int(ns * (1 - i / 100)) for i in range(0, 40)]),
+                   ("bs.Rövid lejáratú kötelezettségek", [int(stl * (1 + i / 100)) for i in range(0, 50, 2)])]
+
+    def cyv_all():
+        f = mod.current_year_value_from_line
+        for ln in lines:
+            f(ln)
+
+    def cf_section():
+        from docx import Document
+        mod.build_cf_section(Document(), "hu", bs, prev_bs, pl)
+
+    def docx():
+        mod.make_docx("Bench Kft.", bs, pl, ratios, out_docx, sector="default", lang="hu",
+                      prev={"bs": prev_bs, "pl": {}}, raw=raw)
+
+    def docx_mem():
+        import io
+        mod.make_docx("Bench Kft.", bs, pl, ratios, io.BytesIO(), sector="default", lang="hu",
+                      prev={"bs": prev_bs, "pl": {}}, raw=raw)
+
+    size = pdf.stat().st_size
+    per_backend = [(f"read_pdf_text[{b.name}]", (lambda n=b.name: mod.read_pdf_text(pdf, backends=[n])), size, "B")
+                   for b in mod.backend_chain()]
+    return [
+        ("read_pdf_text", lambda: mod.read_pdf_text(pdf), size, "B"),
+        *per_backend,
+        ("read_and_parse", lambda: mod.read_and_parse(pdf), size, "B"),
+        ("read_and_parse[full]", lambda: mod.read_and_parse(pdf, early_exit=False), size, "B"),
+        ("segment_sections", lambda: mod.segment_sections(text), len(text), "B"),
+        ("parse_financials_with_raw", lambda: mod.parse_financials_with_raw(text), len(text), "B"),
+        ("current_year_value_from_line", cyv_all, len(lines), "line"),
+        ("get_suppliers_from_pdf101", lambda: mod.get_suppliers_from_pdf101(text), 1, "call"),
+        ("get_suppliers_by_label", lambda: mod.get_suppliers_by_label(text), 1, "call"),
+        ("get_trade_payables_dual_universal", lambda: mod.get_trade_payables_dual_universal(text), 1, "call"),
+        ("get_trade_payables_universal", lambda: mod.get_trade_payables_universal(text), 1, "call"),
+        ("compute_ratios", lambda: mod.compute_ratios(bs, pl), 1, "call"),
+        ("score_from_rules", lambda: mod.score_from_rules(ratios, bs, pl, derived, "kereskedelem"), 1, "call"),
+        ("evaluate_kpis", lambda: mod.evaluate_kpis(bs, pl, "kereskedelem"), 1, "call"),
+        ("update_kpis[1 mező]", lambda: mod.update_kpis(kpis, bs_override, pl, "kereskedelem"), 1, "call"),
+        ("evaluate_grid[what-if 40×25]", lambda: mod.evaluate_grid(kpis, whatif_axes), 1000, "scenario"),
+        ("build_cf_section", cf_section, 1, "call"),
+        ("make_docx", docx, 1, "call"),
+        ("make_docx[memória]", docx_mem, 1, "call"),
+    ]
+
+
+def git_rev() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=str(ROOT_DIR),
+                              capture_output=True, text=True, timeout=10).stdout.strip()
+    except Exception:
+        return ""
+
+
+def run(args):
+    mod = load_engine()
+    results = []
+    cases = [c for c in bench_corpus.CASES if not args.case or any(s in c for s in args.case)]
+    with tempfile.TemporaryDirectory(prefix="airm_bench_") as td:
+        for case in cases:
+            for name, fn, units, unit in build_stages(mod, case, Path(td)):
+                if args.only and not any(s in name for s in args.only):
+                    continue
+                samples = sorted(measure(fn, args.repeat, args.min_time))
+                mean = statistics.fmean(samples)
+                row = {
+                    "stage": name,
+                    "case": case,
+                    "n": len(samples),
+                    "mean_us": round(mean, 2),
+                    "p50_us": round(percentile(samples, 0.50), 2),
+                    "p95_us": round(percentile(samples, 0.95), 2),
+                    "p99_us": round(percentile(samples, 0.99), 2),
+                    "ops_per_s": round(1e6 / mean, 2) if mean else None,
+                    "throughput": round(units * 1e6 / mean, 2) if mean else None,
+                    "throughput_unit": f"{unit}/s",
+                }
+                row.update(measure_alloc(fn))
+                results.append(row)
+                print(f"{case:12s} {name:34s} p50 {row['p50_us']:>11.1f}us  p95 {row['p95_us']:>11.1f}us  "
+                      f"p99 {row['p99_us']:>11.1f}us  {row['ops_per_s'] or 0:>10.1f} ops/s  "
+                      f"peak {row['alloc_peak_kb']:>8.1f}kB", flush=True)
+    return {
+        "meta": {
+            "timestamp": int(time.time()),
+            "git_rev": git_rev(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "min_time": args.min_time,
+        },
+        "results": results,
+    }
+
+
+def compare(old: dict, new: dict):
+    idx = {(r["case"], r["stage"]): r for r in old.get("results", [])}
+    print(f"\n{'case':12s} {'stage':34s} {'p50 old':>11s} {'p50 new':>11s} {'delta':>8s}")
+    for r in new.get("results", []):
+        o = idx.get((r["case"], r["stage"]))
+        if not o or not o.get("p50_us"):
+            continue
+        d = (r["p50_us"] - o["p50_us"]) / o["p50_us"] * 100.0
+        print(f"{r['case']:12s} {r['stage']:34s} {o['p50_us']:>11.1f} {r['p50_us']:>11.1f} {d:>+7.1f}%")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="AIRM pipeline mikrobenchmark")
+    ap.add_argument("--repeat", type=int, default=30, help="Minimális mintaszám lépésenként")
+    ap.add_argument("--min-time", type=float, default=0.5, help="Minimális mérési idő lépésenként (mp)")
+    ap.add_argument("--quick", action="store_true", help="Gyors futás (repeat=5, min-time=0)")
+    ap.add_argument("--only", nargs="*", help="Csak ezek a lépések (részsztring)")
+    ap.add_argument("--case", nargs="*", help="Csak ezek a korpusz-esetek (részsztring)")
+    ap.add_argument("--out", help="Kimeneti JSON (alapértelmezés: bench_results/bench_<ts>.json)")
+    ap.add_argument("--compare", help="Korábbi JSON, amihez viszonyítunk")
+    args = ap.parse_args()
+    if args.quick:
+        args.repeat, args.min_time = 5, 0.0
+    report = run(args)
+    out = Path(args.out) if args.out else ROOT_DIR / "bench_results" / f"bench_{report['meta']['timestamp']}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\nEredmény: {out}")
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text(encoding="utf-8")), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Kimutatás-reprezentáció benchmark: dict vs airm_statement.Statement (pickle-méret, memória, KPI-idő).
+
+Használat (repo gyökérből):
+    python app/scripts/bench_statement.py                  # 500 szintetikus elemzés
+    python app/scripts/bench_statement.py --n 2000 --filler 40
+
+Elemzésenként négy kimutatás (tárgyévi és előző évi bs / pl) a motor parse_financials_with_raw +
+previous_year kimenetéből, a bench_corpus szintetikus e-beszámolóin. Mért értékek elemzésenként:
+- pickle: a négy kimutatás együtt (ez utazik processzek / cache-réteg között),
+- memória: a pickle-ből visszatöltött négy kimutatás (tracemalloc, a címkékkel és a szám-objektumokkal együtt –
+  úgy, ahogy egy másik processzben / cache-ben élne),
+- KPI: evaluate_kpis ideje mindkét alakon (a Statement olvasása bitmaszk + tömb, nem dict-hash).
+A két alak értékeit is összeveti (dict(Statement) == dict); eltérésnél a kilépési kód 1.
+"""
+import argparse
+import pickle
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+ROOT_DIR = SCRIPTS_DIR.parents[1]
+AIRM_DIR = ROOT_DIR / "app" / "airm_module" / "airm_src"
+
+for p in (str(SCRIPTS_DIR), str(AIRM_DIR)):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+import bench_corpus  # noqa: E402
+
+
+def analyses(engine, n: int, filler: int):
+    out = []
+    for seed in range(1, n + 1):
+        text = bench_corpus.statement_text(seed=seed, filler_rows=filler, layout=("2col", "3col")[seed % 2])
+        bs, pl, raw = engine.parse_financials_with_raw(text)
+        prev_bs, prev_pl = engine.previous_year(raw)
+        out.append((bs, pl, prev_bs, prev_pl))
+    return out
+
+
+def retained(blobs) -> int:
+    """A visszatöltött objektumok által lefoglalt bájtok (tracemalloc)."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        held = [pickle.loads(b) for b in blobs]
+        size = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del held
+    return size
+
+
+def kpi_ms(engine, items) -> float:
+    best = float("inf")
+    for _ in range(3):
+        t0 = time.perf_counter()
+        for bs, pl, _, _ in items:
+            engine.evaluate_kpis(bs, pl)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1e3
+
+
+def main():
+    ap = argparse.ArgumentParser(description="dict vs Statement: pickle-méret, memória, KPI-idő")
+    ap.add_argument("--n", type=int, default=500, help="Elemzések száma")
+    ap.add_argument("--filler", type=int, default=20, help="Töltelék-sorok beszámolónként (bench_corpus)")
+    args = ap.parse_args()
+
+    import main as engine
+
+    typed = analyses(engine, args.n, args.filler)
+    plain = [tuple(dict(st) for st in item) for item in typed]
+    bad = sum(1 for t, p in zip(typed, plain) if [dict(st) for st in t] != list(p))
+
+    blobs = {"dict": [pickle.dumps(item, pickle.HIGHEST_PROTOCOL) for item in plain],
+             "Statement": [pickle.dumps(item, pickle.HIGHEST_PROTOCOL) for item in typed]}
+    sizes = {k: sum(map(len, v)) / args.n for k, v in blobs.items()}
+    mem = {k: retained(v) / args.n for k, v in blobs.items()}
+    engine.evaluate_kpis(*plain[0][:2])  # a scoring_config betöltése ne számítson
+    kpi = {"dict": kpi_ms(engine, plain), "Statement": kpi_ms(engine, typed)}
+
+    print(f"{args.n} elemzés (4 kimutatás / elemzés), {bad} eltérés")
+    print(f"{'':24s} {'dict':>10s} {'Statement':>10s} {'arány':>7s}")
+    for label, vals, unit in (("pickle / elemzés", sizes, "B"), ("memória / elemzés", mem, "B"),
+                              ("evaluate_kpis össz.", kpi, "ms")):
+        d, s = vals["dict"], vals["Statement"]
+        print(f"{label + ' (' + unit + ')':24s} {d:>10.1f} {s:>10.1f} {s / d:>6.2f}x")
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
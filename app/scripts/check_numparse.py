@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Módonkénti egyezés-ellenőrzés és sebességmérés az airm_numparse magra.
+
+Minden korábbi számértelmező (a régi kód szó szerinti másolata lent, "legacy") össze van vetve
+azzal a mag-hívással, amely a helyére lépett, a saját bemeneti tartományán generált tokeneken/sorokon.
+A szándékos eltéréseket (pl. keskeny NBSP mint ezres-elválasztó a sor-szkennerben) esetenként egy
+predikátum jelöli: ezeket külön számolja, nem hibák. Minden más eltérés hiba (kilépési kód 1).
+Mérés mellett az is hiba, ha bármelyik hívási hely lassabb a régi kódnál (gyorsulás < 1.0x).
+
+Használat (repo gyökérből):
+    python app/scripts/check_numparse.py               # egyezés + mérés
+    python app/scripts/check_numparse.py --n 50000 --show 5
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+AIRM_DIR = SCRIPTS_DIR.parents[0] / "airm_module" / "airm_src"
+for p in (str(SCRIPTS_DIR), str(AIRM_DIR)):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+import airm_numparse as npc  # noqa: E402
+from check_parse_equivalence import fuzz_line  # noqa: E402
+
+
+# ---- legacy parserek (a mag előtti állapot másolata) ----
+_MINUS = "\u2212\u2012\u2013\u2014"
+
+
+def legacy_parse_int_signed(token):
+    if token is None:
+        return None
+    s = str(token).strip()
+    neg = False
+    if s.startswith("(") and s.endswith(")"):
+        neg = True
+        s = s[1:-1].strip()
+    if s and (s[0] in "+-" or s[0] in _MINUS):
+        if s[0] in "-" or s[0] in _MINUS:
+            neg = not neg
+        s = s[1:].strip()
+    for ch in (" ", "\xa0", "\u202f"):
+        s = s.replace(ch, "")
+    s = s.replace(".", "")
+    if not s.isdigit():
+        return None
+    v = int(s)
+    return -v if neg else v
+
+
+def legacy_grouped_numbers(line):
+    s = line.replace('\u00A0', ' ')
+    pat = re.compile(r'[-+−]?(?:\d{1,3}(?:[ .]\d{3})+|\d+)', re.UNICODE)
+    nums = []
+    for m in pat.finditer(s):
+        token = m.group(0).replace('−', '-').replace(' ', '').replace('.', '')
+        try:
+            val = int(token)
+        except Exception:
+            continue
+        nums.append(val)
+    return tuple(nums)
+
+
+def legacy_to_num(x):  # compute_ratios
+    if isinstance(x, (int, float)):
+        return x
+    if isinstance(x, str):
+        s = re.sub(r'[^0-9\-]', '', x)
+        try:
+            return int(s) if s not in ('', '-') else None
+        except Exception:
+            return None
+    return None
+
+
+def legacy_cf_num(x):  # build_cf_section
+    try:
+        if x is None: return None
+        if isinstance(x, (int, float)): return float(x)
+        s = str(x).replace("\xa0", "").replace(" ", "").replace(",", "").replace(".", "")
+        if s in ("", "-", "—"): return None
+        return float(int(s))
+    except Exception:
+        return None
+
+
+_num_pattern = re.compile(r"-?\d{1,3}(?:[ .]\d{3})*(?:[.,]\d+)?")
+
+
+def legacy_parse_first_number(s):  # szolgáltatás: find_score / find_equity
+    m = _num_pattern.search(s or "")
+    if not m:
+        return None
+    raw = m.group(0)
+    neg = raw.startswith("-")
+    raw = raw.replace(" ", "").replace(".", "")
+    if "," in raw: raw = raw.replace(",", ".")
+    try:
+        val = float(raw)
+        if neg: val = -abs(val)
+        return val
+    except Exception:
+        return None
+
+
+def legacy_coerce_num(val):  # szolgáltatás: /recalc overrides
+    if isinstance(val, (int, float)): return val
+    if isinstance(val, str):
+        v = val.strip()
+        if not v: return v
+        v2 = v.replace(" ", "").replace(".", "").replace(",", "")
+        if v2.lstrip("-").isdigit():
+            try: return int(v2)
+            except: return v
+        return v
+    return val
+
+
+_HOTFIX_SEP = re.compile("[ \\t\u00A0\u2007\u202F]")
+
+
+def legacy_hotfix_token(token):
+    s = token.strip()
+    neg = False
+    if s.startswith("(") and s.endswith(")"):
+        neg = True
+        s = s[1:-1].strip()
+    s = s.replace("\u2212", "-")
+    if s.startswith("-"):
+        neg = not neg
+    s = _HOTFIX_SEP.sub("", s)
+    core = s[1:] if s.startswith("-") else s
+    if not core.isdigit():
+        digits = "".join(ch for ch in core if ch.isdigit())
+        if not digits:
+            raise ValueError(token)
+        core = digits
+    val = int(core)
+    return -val if neg else val
+
+
+# ---- új hívások (ahogy a motor / szolgáltatás / hotfix használja) ----
+def new_cf_num(x):
+    if x.__class__ is str:
+        s = x.replace(" ", "").replace(".", "")
+        if s.isdecimal() or (x[:1] == "-" and s[1:].isdecimal()):
+            return float(s)
+    elif isinstance(x, (int, float)):
+        return float(x)
+    v = npc.to_number(x, npc.AMOUNT)
+    return None if v is None else float(v)
+
+
+_parse_amount = npc.number_parser(npc.AMOUNT)
+new_parse_first_number = npc.number_finder(npc.DECIMAL, as_float=True)
+
+
+def new_coerce_num(val):
+    if not isinstance(val, str): return val  # szám (és minden más) változatlan
+    v = val.strip()
+    if not v: return v
+    d = v.replace(" ", "").replace(".", "")
+    if d.isdecimal() or (v[:1] == "-" and d[1:].isdecimal()): return int(d)
+    n = _parse_amount(v)
+    return v if n is None else n
+
+
+def _load_hotfix():
+    import airm_hotfix_universal
+    return airm_hotfix_universal._normalize_num_token
+
+
+# ---- bemenet-generátorok ----
+_SEPS = [" ", " ", "\xa0", "\u202f", ".", "", "\t", "\u2007", ","]
+_SIGNS = ["", "", "", "-", "+", "\u2212", "\u2013", "- "]
+
+
+def amount_token(rng: random.Random, seps=_SEPS, signs=_SIGNS, garbage=True) -> str:
+    v = rng.choice([rng.randint(0, 999), rng.randint(1000, 999_999), rng.randint(10**6, 10**10)])
+    s = f"{v:,}".replace(",", rng.choice(seps))
+    s = rng.choice(signs) + s
+    if rng.random() < 0.15:
+        s = f"({s})"
+    if garbage and rng.random() < 0.1:
+        pos = rng.randint(0, len(s))
+        s = s[:pos] + rng.choice(["x", " ", "(", ")", ",5", "--", "²", "1"]) + s[pos:]
+    if rng.random() < 0.1:
+        s = rng.choice([" ", "\t"]) + s + rng.choice(["", " "])
+    return s
+
+
+def hu_amount(rng: random.Random) -> str:
+    """Szabályos magyar formátum: szóköz/pont ezres tagolás, '-' előjel."""
+    v = rng.choice([rng.randint(0, 999), rng.randint(1000, 10**10)])
+    return rng.choice(["", "", "-"]) + f"{v:,}".replace(",", rng.choice([" ", " ", "."]))
+
+
+def score_text(rng: random.Random) -> str:
+    n = rng.choice([hu_amount(rng), str(rng.randint(0, 100)), f"{rng.randint(0, 99)},{rng.randint(0, 99)}"])
+    return rng.choice(["pontszám: {}/100 • tartomány", "saját tőke\n{}\nx", "saját tőke {} ezer ft", "{}"]).format(n)
+
+
+def _any(chars):
+    return lambda x: isinstance(x, str) and any(c in x for c in chars)
+
+
+# név, legacy, új, generátor, szándékos-eltérés predikátum
+CASES = [
+    ("AMOUNT token (parse_int_signed)", legacy_parse_int_signed, npc.number_parser(npc.AMOUNT),
+     lambda r: amount_token(r),
+     # vessző mint ezres-elválasztó; nem-decimális unicode számjegy ('²')
+     lambda x: "," in x or any(c.isdigit() and not c.isdecimal() for c in x)),
+    ("GROUPED|UNICODE_MINUS sor (_extract_grouped_numbers)", legacy_grouped_numbers,
+     lambda ln: tuple(npc.scan_numbers(ln, npc.GROUPED | npc.UNICODE_MINUS)),
+     lambda r: fuzz_line(r) if r.random() < 0.7 else " ".join(amount_token(r) for _ in range(r.randint(1, 4))),
+     # keskeny NBSP és vessző ezres-elválasztó; '‒–—' közvetlenül a szám előtt mínusz
+     _any("\u202f,\u2012\u2013\u2014")),
+    ("AMOUNT érték (compute_ratios.to_num)", legacy_to_num, lambda x: npc.to_number(x, npc.AMOUNT),
+     lambda r: hu_amount(r) if r.random() < 0.8 else r.choice([r.randint(-10**6, 10**6), 1.5, None, (1, 2), "-", ""]),
+     None),
+    ("AMOUNT érték (build_cf_section._num)", legacy_cf_num, new_cf_num,
+     lambda r: hu_amount(r) if r.random() < 0.8 else r.choice([r.randint(-10**6, 10**6), 2.5, None, "—", "-", ""]),
+     None),
+    ("DECIMAL szöveg (parse_first_number)", legacy_parse_first_number, new_parse_first_number,
+     score_text,
+     # a régi minta 3 jegynél elvágta a tagolatlan számot ('12345' -> 123)
+     lambda x: re.search(r"(?<![\d .])\d{4,}", x) is not None),
+    ("AMOUNT kézi bevitel (_coerce_num)", legacy_coerce_num, new_coerce_num,
+     lambda r: hu_amount(r) if r.random() < 0.8 else r.choice(["", " ", "abc", "12a", 42, 3.5, "1 234,5"]),
+     None),
+    ("AMOUNT hotfix token (_normalize_num_token)", legacy_hotfix_token, None,
+     lambda r: amount_token(r, seps=[" ", "\xa0", "\u202f", "\u2007", "\t", ""], signs=["", "-", "\u2212"], garbage=False).strip(),
+     None),
+]
+
+
+def _call(fn, x):
+    try:
+        return fn(x)
+    except Exception as e:
+        return ("EXC", type(e).__name__)
+
+
+def _best_of(fn, inputs, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for x in inputs:
+            try:
+                fn(x)
+            except Exception:
+                pass
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description="airm_numparse: módonkénti egyezés a régi parserekkel + mérés")
+    ap.add_argument("--n", type=int, default=20000, help="Bemenetek száma esetenként")
+    ap.add_argument("--seed", type=int, default=2024)
+    ap.add_argument("--show", type=int, default=5, help="Ennyi váratlan eltérést ír ki esetenként")
+    ap.add_argument("--repeat", type=int, default=5, help="Ismétlésszám a méréshez")
+    ap.add_argument("--no-bench", action="store_true")
+    args = ap.parse_args()
+
+    bad = 0
+    slower = []
+    print(f"{'eset':52s} {'n':>6s} {'egyező':>7s} {'szándékos':>9s} {'hiba':>5s} {'régi µs':>8s} {'új µs':>7s} {'gyorsulás':>9s}")
+    for name, old, new, gen, intended in CASES:
+        new = new or _load_hotfix()
+        rng = random.Random(args.seed)
+        inputs = [gen(rng) for _ in range(args.n)]
+        same = known = 0
+        shown = 0
+        for x in inputs:
+            a, b = _call(old, x), _call(new, x)
+            if a == b and type(a) is type(b):
+                same += 1
+            elif intended is not None and intended(x):
+                known += 1
+            else:
+                bad += 1
+                if shown < args.show:
+                    shown += 1
+                    print(f"  ELTÉRÉS {x!r}: régi={a!r} új={b!r}")
+        line = f"{name:52s} {len(inputs):>6d} {same:>7d} {known:>9d} {len(inputs) - same - known:>5d}"
+        if not args.no_bench:
+            t_old = t_new = float("inf")
+            for _ in range(5):  # felváltva, hogy a gép zaja mindkettőt egyformán érje
+                t_old = min(t_old, _best_of(old, inputs, args.repeat) / len(inputs) * 1e6)
+                t_new = min(t_new, _best_of(new, inputs, args.repeat) / len(inputs) * 1e6)
+            line += f" {t_old:>8.2f} {t_new:>7.2f} {t_old / t_new:>8.2f}x"
+            if t_new > t_old:
+                slower.append(name)
+        print(line)
+    for name in slower:
+        print(f"LASSULÁS: {name} (az új hívás lassabb a réginél)")
+    sys.exit(1 if bad or slower else 0)
+
+
+if __name__ == "__main__":
+    main()
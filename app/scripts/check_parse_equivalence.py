@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Regressziós egyezés-ellenőrzés a számfelismerő heurisztikákra.
+
+A munkakönyvtár motorját (airm_src/main.py) összeveti egy git-revízió motorjával
+(alapból HEAD) ugyanazon a korpuszon: szintetikus e-beszámolók (2/3 oszlop, ragadt
+oszlopok, zárójeles és mínuszos negatívok) + determinisztikusan generált "nehéz" sorok
+(tab, keskeny nbsp, hosszú számjegysorok, előjelek, sorkódok).
+
+Összehasonlított függvények: current_year_value_from_line, numbers_on_line, find_line
+(KEYS_BS / KEYS_PL), get_suppliers_by_label, parse_financials_with_raw.
+
+Használat (repo gyökérből, commit előtt):
+    python app/scripts/check_parse_equivalence.py              # munkakönyvtár vs HEAD
+    python app/scripts/check_parse_equivalence.py --ref 3d2082e --lines 200000
+    python app/scripts/check_parse_equivalence.py --bench      # + sebesség: ref vs új, ugyanazon a korpuszon
+Kilépési kód: 0 ha minden egyezik, 1 ha van eltérés (az első néhányat kiírja).
+"""
+import argparse
+import importlib.util
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import unicodedata
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+ROOT_DIR = SCRIPTS_DIR.parents[1]
+AIRM_DIR = ROOT_DIR / "app" / "airm_module" / "airm_src"
+ENGINE_REL = "app/airm_module/airm_src/main.py"
+
+for p in (str(SCRIPTS_DIR), str(AIRM_DIR)):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+import bench_corpus  # noqa: E402
+
+
+def load_module(path: Path, name: str):
+    spec = importlib.util.spec_from_file_location(name, str(path))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)  # type: ignore
+    return mod
+
+
+def load_ref_engine(ref: str, workdir: Path):
+    src = subprocess.run(["git", "show", f"{ref}:{ENGINE_REL}"], cwd=str(ROOT_DIR),
+                         capture_output=True, check=True).stdout
+    path = workdir / "airm_ref_main.py"
+    path.write_bytes(src)
+    return load_module(path, "airm_ref_main")
+
+
+# ---- korpusz ----
+_SIGNS = ["", "", "", "-", "−", "–", "+", "- "]
+_SEPS = [" ", " ", " ", "\xa0", " ", "\t", ".", "  "]
+_LABELS = ["Szállítók", "Készletek", "Saját tőke", "Követelések", "Pénzeszközök", "Forgóeszközök",
+           "Értékesítés nettó árbevétele", "Adózott eredmény", "Egyéb bevételek",
+           "Kötelezettségek áruszállításból és szolgáltatásból (szállítók)", "Eszközök (aktívák) összesen",
+           "Anyagjellegű ráfordítások", "Trade payables", "ebből: 7 %-os", "Adószám:"]
+
+
+def _amount(rng: random.Random) -> str:
+    kind = rng.random()
+    if kind < 0.15:
+        return str(rng.randint(0, 999))
+    v = rng.choice([rng.randint(1000, 999_999), rng.randint(1_000_000, 99_999_999), rng.randint(0, 5_000_000_000)])
+    if kind < 0.30:
+        return str(v)
+    sep = rng.choice(_SEPS)
+    s = f"{v:,}".replace(",", sep)
+    r = rng.random()
+    if r < 0.12:
+        return f"({s})"
+    if r < 0.30:
+        return rng.choice(_SIGNS[3:]) + s
+    return s
+
+
+def fuzz_line(rng: random.Random) -> str:
+    parts = []
+    if rng.random() < 0.7:
+        parts.append(rng.choice([f"{rng.randint(1, 130):03d}.", f"{rng.randint(1, 130)}.", f"{rng.randint(1, 130)})",
+                                 " " + str(rng.randint(1, 9)), "I.", "B."]))
+    if rng.random() < 0.85:
+        parts.append(rng.choice(_LABELS))
+    for _ in range(rng.choice([0, 1, 2, 2, 2, 3, 3, 4])):
+        parts.append(_amount(rng))
+    line = " ".join(parts)
+    r = rng.random()
+    if r < 0.10:  # ragadt oszlopok
+        line = line.replace(" ", "", 1) if rng.random() < 0.3 else line + _amount(rng)
+    elif r < 0.18:
+        line += rng.choice([" ", "  ", ")", " Ft", " %", ".", "\t", "-"])
+    elif r < 0.22:
+        line = rng.choice(["  ", "\t", "-"]) + line
+    return line
+
+
+def corpus_texts(n_seeds: int):
+    texts = []
+    for seed in range(1, n_seeds + 1):
+        for layout in ("2col", "3col", "glued"):
+            texts.append(bench_corpus.statement_text(seed=seed, filler_rows=seed % 5 * 10, layout=layout,
+                                                     notes_lines=seed % 3 * 20, mod_ratio=0.3))
+            rows = bench_corpus.statement_rows(seed, 5, mod_ratio=0.3)
+            body = [bench_corpus.render_line(r, layout, paren_neg=False) for r in rows]
+            texts.append("\n".join(["A MÉRLEGE"] + body[:-len(bench_corpus.PL_ROWS)] + ["EREDMÉNYKIMUTATÁS"]
+                                   + body[-len(bench_corpus.PL_ROWS):]))
+    return texts
+
+
+def fuzz_text(rng: random.Random) -> str:
+    lines = ["A MÉRLEGE"] + [fuzz_line(rng) for _ in range(rng.randint(5, 25))]
+    lines += ["EREDMÉNYKIMUTATÁS"] + [fuzz_line(rng) for _ in range(rng.randint(5, 25))]
+    return "\n".join(lines)
+
+
+# ---- összevetés ----
+def _deburr_ref(s: str) -> str:
+    s = s.replace("\u00A0", " ")
+    nf = unicodedata.normalize("NFD", s)
+    return "".join(ch for ch in nf if unicodedata.category(ch) != "Mn").lower()
+
+
+
+def _call(fn, *args):
+    try:
+        return fn(*args)
+    except Exception as e:  # a kivétel típusa is része a viselkedésnek
+        return ("EXC", type(e).__name__)
+
+
+class Diff:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.count = 0
+        self.checked = 0
+
+    def check(self, what: str, arg, a, b):
+        self.checked += 1
+        if a != b:
+            self.count += 1
+            if self.count <= self.limit:
+                print(f"ELTÉRÉS {what}: {arg!r}\n    ref: {a!r}\n    új:  {b!r}")
+
+
+def run(ref_mod, new_mod, args) -> Diff:
+    d = Diff(args.show)
+    rng = random.Random(args.seed)
+    texts = corpus_texts(args.seeds) + [fuzz_text(rng) for _ in range(args.texts)]
+    lines = [ln for t in texts for ln in t.splitlines()] + [fuzz_line(rng) for _ in range(args.lines)]
+    for fname in ("current_year_value_from_line", "numbers_on_line"):
+        f_ref, f_new = getattr(ref_mod, fname), getattr(new_mod, fname)
+        for ln in lines:
+            d.check(fname, ln, _call(f_ref, ln), _call(f_new, ln))
+    if hasattr(new_mod, "_deburr"):  # címke-normalizálás: egész soros NFD vs karakter-tábla
+        odd = ["Szállítók\u1734x ő", "e\u0301\u1b44a", "\u1d165\u0301 Ű", "ﬁ ǅ Ⅻ ß İ"]
+        for ln in lines[:20000] + odd:
+            d.check("deburr", ln, _deburr_ref(ln), _call(new_mod._deburr, ln))
+    keys = list(ref_mod.KEYS_BS) + list(ref_mod.KEYS_PL)
+    for t in texts:
+        for _key, rgx in keys:
+            d.check("find_line", (rgx, t[:80]), _call(ref_mod.find_line, t, rgx), _call(new_mod.find_line, t, rgx))
+        for fname in ("get_suppliers_by_label", "parse_financials_with_raw"):
+            d.check(fname, t[:80], _call(getattr(ref_mod, fname), t), _call(getattr(new_mod, fname), t))
+    return d
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def bench(ref_mod, new_mod, repeat: int):
+    """Legjobb futásidő (ms) a korpusz-esetekre; ref és új felváltva, ugyanabban a processzben."""
+    print(f"\n{'eset':12s} {'függvény':30s} {'ref ms':>9s} {'új ms':>9s} {'gyorsulás':>9s}")
+    for case, (filler, layout, notes) in bench_corpus.CASES.items():
+        text = bench_corpus.statement_text(seed=7, filler_rows=filler, layout=layout, notes_lines=notes)
+        lines = [ln for ln in text.splitlines() if any(ch.isdigit() for ch in ln)]
+        for fname in ("current_year_value_from_line", "parse_financials_with_raw", "get_suppliers_by_label"):
+            def make(mod):
+                f = getattr(mod, fname)
+                if fname == "current_year_value_from_line":
+                    return lambda: [f(ln) for ln in lines]
+                return lambda: f(text)
+            f_ref, f_new = make(ref_mod), make(new_mod)
+            t_ref = t_new = float("inf")
+            for _ in range(3):
+                t_ref = min(t_ref, _best_of(f_ref, repeat))
+                t_new = min(t_new, _best_of(f_new, repeat))
+            print(f"{case:12s} {fname:30s} {t_ref * 1e3:>9.2f} {t_new * 1e3:>9.2f} {t_ref / t_new:>8.2f}x")
+            memo = getattr(new_mod, "_AIRM_LAST_LINE_MEMO", None)
+            if fname == "parse_financials_with_raw" and memo:
+                kinds = " ".join(f"{k}={v['hits']}/{v['hits'] + v['misses']}" for k, v in memo["by_kind"].items())
+                print(f"{'':12s} {'  sor-memo találat/lekérés':30s} {memo['hits']}/{memo['hits'] + memo['misses']}  {kinds}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="AIRM számfelismerés: munkakönyvtár vs git-revízió")
+    ap.add_argument("--ref", default="HEAD", help="Összevetési git-revízió (alapból HEAD)")
+    ap.add_argument("--seeds", type=int, default=40, help="Szintetikus beszámolók seed-száma (layoutonként)")
+    ap.add_argument("--texts", type=int, default=300, help="Generált vegyes szövegek száma")
+    ap.add_argument("--lines", type=int, default=50000, help="Generált önálló sorok száma")
+    ap.add_argument("--seed", type=int, default=2024)
+    ap.add_argument("--show", type=int, default=10, help="Ennyi eltérést ír ki")
+    ap.add_argument("--bench", action="store_true", help="Sebességmérés is (ref vs új)")
+    ap.add_argument("--repeat", type=int, default=20, help="Ismétlésszám a --bench méréshez")
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory(prefix="airm_eq_") as td:
+        ref_mod = load_ref_engine(args.ref, Path(td))
+        new_mod = load_module(AIRM_DIR / "main.py", "airm_main_module")
+        d = run(ref_mod, new_mod, args)
+        print(f"{d.checked} összevetés, {d.count} eltérés (ref: {args.ref})")
+        if args.bench:
+            bench(ref_mod, new_mod, args.repeat)
+    sys.exit(1 if d.count else 0)
+
+
+if __name__ == "__main__":
+    main()
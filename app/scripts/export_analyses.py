@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Portfólió-export a tárolt elemzésekből (AIRM_ANALYSES_DIR) CSV / JSONL fájlba – ugyanaz, mint a GET /airm/export.
+
+Használat (repo gyökérből):
+    python app/scripts/export_analyses.py --format csv --out portfolio.csv
+    python app/scripts/export_analyses.py --format jsonl --since 2025-01-01 --sector default --min-score 40 --out p.jsonl
+    python app/scripts/export_analyses.py --format jsonl --out p.jsonl --resume     # megszakadt export folytatása
+
+Soronként egy elemzés: a (felülírt) tárgyévi és előző évi bs/pl, mutatók, pontszám, risk_score, döntés,
+scoring_config- és motorverzió. A kimenet darabonként készül (a memória nem nő az elemzések számával).
+--resume: a meglévő --out fájl utolsó sorának `cursor`-ától folytat és hozzáfűz (CSV-nél fejléc nélkül).
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+APP_DIR = SCRIPTS_DIR.parent
+
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+from airm_module import export  # noqa: E402
+
+
+def last_cursor(path: Path, fmt: str):
+    """A fájl utolsó teljes sorának cursor-a (a félbeszakadt utolsó sort levágja); None, ha nincs adatsor."""
+    with open(path, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        pos = size
+        tail = b""
+        while pos > 0 and tail.count(b"\n") < 2:
+            step = min(65536, pos)
+            pos -= step
+            f.seek(pos)
+            tail = f.read(step) + tail
+        complete = tail[:tail.rfind(b"\n") + 1] if b"\n" in tail else b""
+        if len(complete) < len(tail):  # félbeszakadt utolsó sor: eldobjuk, újra kiírjuk
+            f.truncate(size - (len(tail) - len(complete)))
+    lines = complete.decode("utf-8").splitlines()
+    if not lines:
+        return None
+    line = lines[-1]
+    if fmt == "jsonl":
+        return json.loads(line).get("cursor")
+    cursor = next(csv.reader([line]))[0]
+    return None if cursor == "cursor" else cursor  # csak a fejléc van meg
+
+
+def main():
+    ap = argparse.ArgumentParser(description="A tárolt elemzések exportja CSV / JSONL-ként (streamelve)")
+    ap.add_argument("--format", choices=sorted(export.MEDIA_TYPES), default="csv")
+    ap.add_argument("--out", help="Kimeneti fájl (alapból stdout)")
+    ap.add_argument("--since", help="Legalább ekkor frissített elemzések (ISO dátum / időpont, UTC)")
+    ap.add_argument("--until", help="Legfeljebb eddig (dátumnál a nap végéig)")
+    ap.add_argument("--sector", help="Csak ez az ágazat")
+    ap.add_argument("--min-score", type=float)
+    ap.add_argument("--max-score", type=float)
+    ap.add_argument("--after", help="Folytatás ettől a cursor-tól (kizárólag)")
+    ap.add_argument("--resume", action="store_true", help="Folytatás a --out fájl utolsó sorától (hozzáfűzés)")
+    args = ap.parse_args()
+
+    from airm_module import main as service  # a motor és a döntési szabály a szolgáltatásé
+
+    after = args.after
+    mode = "wb"
+    if args.resume:
+        if not args.out:
+            ap.error("--resume csak --out fájllal")
+        out_path = Path(args.out)
+        if out_path.exists() and out_path.stat().st_size:
+            after = last_cursor(out_path, args.format) or after
+            mode = "ab"
+    try:
+        filters = export.Filters(args.since, args.until, args.sector, args.min_score, args.max_score)
+        chunks = service.portfolio_export(args.format, filters, after)
+    except export.ExportError as e:
+        ap.error(str(e))
+    if mode == "ab" and args.format == "csv" and after is None:
+        chunks = (c.split(b"\n", 1)[1] if i == 0 else c for i, c in enumerate(chunks))  # a fejléc már megvan
+
+    out = open(args.out, mode) if args.out else sys.stdout.buffer
+    n = 0
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+            out.flush()
+            n += chunk.count(b"\n")
+    finally:
+        if args.out:
+            out.close()
+    if args.out:
+        print(f"{args.out}: {n} sor{' (folytatás ' + after + ' után)' if after else ''}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
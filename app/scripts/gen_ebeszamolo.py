@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Szintetikus e-beszámoló PDF generátor (offline, ügyféladat nélkül).
+
+Használat:
+    python app/scripts/gen_ebeszamolo.py --out corpus --count 20
+    python app/scripts/gen_ebeszamolo.py --out corpus --count 5 --layout 3col --notes 800 --filler 300
+    python app/scripts/gen_ebeszamolo.py --out corpus --count 3 --years 5   # cégenként 5 év (idősor)
+
+Minden PDF tartalmaz: cégnév + adószám, MÉRLEGE és EREDMÉNYKIMUTATÁS szakasz,
+sorkódok, ezres csoportosítás, zárójeles negatívok; opcionálisan középső
+Módosítások oszlop és hosszú kiegészítő melléklet. Mellé egy manifest.json készül
+a generált (várt) értékekkel, hogy a kinyerés helyessége is ellenőrizhető legyen.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import bench_corpus  # noqa: E402
+
+LAYOUTS = ("2col", "3col", "glued", "tight")
+
+
+def generate(out_dir: Path, count: int, layout: str = "mix", filler: int = 0, notes: int = 0,
+             mod_ratio: float = 0.3, seed: int = 1, years: int = 1, last_year: int = 2024):
+    """years > 1: cégenként egymást követő évek PDF-jei (ugyanaz a cégnév/adószám, láncolt értékek)."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = []
+    for i in range(count):
+        s = seed + i
+        lay = LAYOUTS[i % len(LAYOUTS)] if layout == "mix" else layout
+        name, tax = bench_corpus.company_identity(s)
+        mr = mod_ratio if lay == "3col" else 0.0
+        series = (bench_corpus.series_rows(s, years, filler, mod_ratio=mr) if years > 1
+                  else [bench_corpus.statement_rows(s, filler, mod_ratio=mr)])
+        for k, rows in enumerate(series):
+            year = last_year - len(series) + 1 + k
+            fname = f"ebeszamolo_{s:04d}_{lay}.pdf" if years == 1 else f"ebeszamolo_{s:04d}_{year}_{lay}.pdf"
+            path = bench_corpus.statement_pdf(out_dir / fname, seed=s, filler_rows=filler, layout=lay,
+                                              notes_lines=notes, mod_ratio=mr, year=year, rows=rows)
+            manifest.append({
+                "file": fname,
+                "company": name,
+                "tax_number": tax,
+                "year": year,
+                "layout": lay,
+                "bytes": path.stat().st_size,
+                "rows": [{"section": r[0], "code": r[1], "label": r[3], "previous": r[4], "mod": r[5], "current": r[6]}
+                         for r in rows],
+            })
+    (out_dir / "manifest.json").write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    return manifest
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Szintetikus e-beszámoló PDF-ek generálása")
+    ap.add_argument("--out", default="corpus", help="Kimeneti mappa")
+    ap.add_argument("--count", type=int, default=10, help="PDF-ek száma")
+    ap.add_argument("--layout", default="mix", choices=("mix",) + LAYOUTS, help="Oszlopelrendezés")
+    ap.add_argument("--filler", type=int, default=0, help="Extra részletező mérlegsorok száma")
+    ap.add_argument("--notes", type=int, default=0, help="Kiegészítő melléklet sorainak száma")
+    ap.add_argument("--mod-ratio", type=float, default=0.3, help="Nem nulla Módosítások aránya (3col)")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--years", type=int, default=1, help="Cégenként ennyi egymást követő év (idősor-teszthez)")
+    ap.add_argument("--last-year", type=int, default=2024, help="A legutolsó beszámolási év")
+    args = ap.parse_args()
+    manifest = generate(Path(args.out), args.count, args.layout, args.filler, args.notes, args.mod_ratio, args.seed,
+                        args.years, args.last_year)
+    total = sum(m["bytes"] for m in manifest)
+    print(f"{len(manifest)} PDF -> {args.out} ({total / 1024:.1f} kB)")
+
+
+if __name__ == "__main__":
+    main()
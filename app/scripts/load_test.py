@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Lokális terheléses teszt a /airm/preview és /airm/recalc végpontokra.
+
+Minden --workers értékre elindít egy lokális uvicorn-t (app.main:app), megvárja a
+/healthz-t, majd --concurrency párhuzamos kliens --duration mp-ig futtatja a
+preview -> recalc kört a szintetikus korpusz PDF-jeivel.
+Riport végpontonként: kérés/mp, p50/p95/p99 késleltetés, hibaszám.
+
+Használat (repo gyökérből):
+    python app/scripts/load_test.py --workers 1 2 4 --concurrency 8 --duration 20
+    python app/scripts/load_test.py --url http://127.0.0.1:8000 --concurrency 4   # futó szerver ellen
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import urlsplit
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+ROOT_DIR = SCRIPTS_DIR.parents[1]
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import gen_ebeszamolo  # noqa: E402
+from bench_pipeline import percentile  # noqa: E402
+
+
+def multipart(fields: dict, files: dict):
+    boundary = uuid.uuid4().hex
+    out = bytearray()
+    for k, v in fields.items():
+        out += (f"--{boundary}\r\nContent-Disposition: form-data; name=\"{k}\"\r\n\r\n{v}\r\n").encode("utf-8")
+    for k, (fname, data, ctype) in files.items():
+        out += (f"--{boundary}\r\nContent-Disposition: form-data; name=\"{k}\"; filename=\"{fname}\"\r\n"
+                f"Content-Type: {ctype}\r\n\r\n").encode("utf-8")
+        out += data + b"\r\n"
+    out += f"--{boundary}--\r\n".encode("utf-8")
+    return bytes(out), f"multipart/form-data; boundary={boundary}"
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.lat = {}
+        self.err = {}
+
+    def add(self, endpoint: str, ms: float, ok: bool):
+        with self.lock:
+            if ok:
+                self.lat.setdefault(endpoint, []).append(ms)
+            else:
+                self.err[endpoint] = self.err.get(endpoint, 0) + 1
+
+
+def client_loop(base: str, pdfs, stats: Stats, stop_at: float, idx: int, lang: str):
+    u = urlsplit(base)
+    conn = http.client.HTTPConnection(u.hostname, u.port or 80, timeout=120)
+    i = idx
+    while time.perf_counter() < stop_at:
+        name, data = pdfs[i % len(pdfs)]
+        i += 1
+        body, ctype = multipart({"sector": "default", "lang": lang}, {"file": (name, data, "application/pdf")})
+        t0 = time.perf_counter()
+        try:
+            conn.request("POST", "/airm/preview", body=body, headers={"Content-Type": ctype})
+            r = conn.getresponse()
+            payload = r.read()
+            ok = r.status == 200
+        except Exception:
+            conn.close()
+            conn = http.client.HTTPConnection(u.hostname, u.port or 80, timeout=120)
+            ok, payload = False, b""
+        stats.add("preview", (time.perf_counter() - t0) * 1000.0, ok)
+        if not ok:
+            continue
+        saved = json.loads(payload).get("saved_pdf")
+        body, ctype = multipart({"saved_pdf": saved, "sector": "default", "lang": lang, "overrides_json": "{}"}, {})
+        t0 = time.perf_counter()
+        try:
+            conn.request("POST", "/airm/recalc", body=body, headers={"Content-Type": ctype})
+            r = conn.getresponse()
+            r.read()
+            ok = r.status == 200
+        except Exception:
+            conn.close()
+            conn = http.client.HTTPConnection(u.hostname, u.port or 80, timeout=120)
+            ok = False
+        stats.add("recalc", (time.perf_counter() - t0) * 1000.0, ok)
+    conn.close()
+
+
+def wait_healthy(base: str, timeout: float = 60.0) -> bool:
+    u = urlsplit(base)
+    t_end = time.time() + timeout
+    while time.time() < t_end:
+        try:
+            c = http.client.HTTPConnection(u.hostname, u.port or 80, timeout=2)
+            c.request("GET", "/healthz")
+            r = c.getresponse()
+            body = r.read()
+            if r.status == 200 and json.loads(body).get("airm_mounted"):
+                return True
+        except Exception:
+            pass
+        time.sleep(0.3)
+    return False
+
+
+def run_round(base: str, pdfs, concurrency: int, duration: float, lang: str):
+    stats = Stats()
+    stop_at = time.perf_counter() + duration
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=client_loop, args=(base, pdfs, stats, stop_at, i, lang), daemon=True)
+               for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    out = {}
+    for ep in ("preview", "recalc"):
+        lat = sorted(stats.lat.get(ep, []))
+        out[ep] = {
+            "requests": len(lat),
+            "errors": stats.err.get(ep, 0),
+            "rps": round(len(lat) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(lat, 0.50), 1),
+            "p95_ms": round(percentile(lat, 0.95), 1),
+            "p99_ms": round(percentile(lat, 0.99), 1),
+        }
+    return out
+
+
+def start_server(port: int, workers: int):
+    cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+           "--workers", str(workers), "--log-level", "warning"]
+    return subprocess.Popen(cmd, cwd=str(ROOT_DIR), env=dict(os.environ))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="AIRM lokális terheléses teszt")
+    ap.add_argument("--url", help="Már futó szerver (pl. http://127.0.0.1:8000); ekkor nincs worker-sweep")
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="uvicorn worker-számok")
+    ap.add_argument("--concurrency", type=int, default=8, help="Párhuzamos kliensek")
+    ap.add_argument("--duration", type=float, default=20.0, help="Mérési idő körönként (mp)")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--corpus", help="Meglévő PDF mappa (különben generálunk)")
+    ap.add_argument("--docs", type=int, default=6, help="Generált PDF-ek száma")
+    ap.add_argument("--filler", type=int, default=40)
+    ap.add_argument("--notes", type=int, default=200)
+    ap.add_argument("--lang", default="hu")
+    ap.add_argument("--out", help="Eredmény JSON")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="airm_load_") as td:
+        corpus = Path(args.corpus) if args.corpus else Path(td)
+        if not args.corpus:
+            gen_ebeszamolo.generate(corpus, args.docs, filler=args.filler, notes=args.notes)
+        pdfs = [(p.name, p.read_bytes()) for p in sorted(corpus.glob("*.pdf"))]
+        if not pdfs:
+            sys.exit(f"Nincs PDF: {corpus}")
+
+        report = {"meta": {"concurrency": args.concurrency, "duration": args.duration, "docs": len(pdfs),
+                           "timestamp": int(time.time())}, "rounds": []}
+        rounds = [None] if args.url else args.workers
+        for w in rounds:
+            proc = None
+            base = args.url
+            if not base:
+                base = f"http://127.0.0.1:{args.port}"
+                proc = start_server(args.port, w)
+            try:
+                if not wait_healthy(base):
+                    sys.exit(f"A szerver nem lett egészséges: {base}")
+                res = run_round(base, pdfs, args.concurrency, args.duration, args.lang)
+            finally:
+                if proc:
+                    proc.terminate()
+                    try:
+                        proc.wait(timeout=15)
+                    except subprocess.TimeoutExpired:
+                        proc.kill()
+            report["rounds"].append({"workers": w, "endpoints": res})
+            for ep, r in res.items():
+                print(f"workers={w or '-':>2} {ep:8s} {r['rps']:>7.2f} req/s  p50 {r['p50_ms']:>8.1f}ms  "
+                      f"p95 {r['p95_ms']:>8.1f}ms  p99 {r['p99_ms']:>8.1f}ms  err {r['errors']}", flush=True)
+
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()